@@ -0,0 +1,163 @@
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import OrderedDict, deque
+
+# =========================
+# 🚦 ADMISSION CONTROL (token bucket + antrean adil)
+# =========================
+# Permintaan upstream baru dikirim ke worker pool setelah mendapat token dari bucket
+# (api key, model). Bucket bisa disimpan di SQLite agar beberapa replika di satu host
+# berbagi batas yang sama. Job yang belum dapat token menunggu di antrean FIFO per bucket
+# (bucket dilayani bergiliran), dan posisinya bisa ditampilkan ke pengguna.
+# (permintaan per detik, burst) per model; model lain memakai DEFAULT_RATE.
+RATE_LIMITS = {
+    "mistralai/mistral-7b-instruct:free": (20 / 60, 5),
+}
+DEFAULT_RATE = (2.0, 10)
+
+log = logging.getLogger(__name__)
+
+def bucket_key(api_key_str: str, model_name: str) -> str:
+    # API key tidak pernah disimpan apa adanya.
+    digest = hashlib.sha256((api_key_str or "").encode("utf-8")).hexdigest()[:16]
+    return f"{digest}:{model_name}"
+
+def _refill(tokens: float, updated: float, now: float, rate: float, burst: float):
+    tokens = min(burst, tokens + max(0.0, now - updated) * rate)
+    if tokens >= 1:
+        return tokens - 1, 0.0
+    return tokens, (1 - tokens) / rate
+
+class MemoryBuckets:
+    def __init__(self):
+        self._state = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, key: str, rate: float, burst: float) -> float:
+        # 0 = token didapat; selain itu detik sampai token berikutnya tersedia.
+        now = time.time()
+        with self._lock:
+            tokens, updated = self._state.get(key, (burst, now))
+            tokens, wait = _refill(tokens, updated, now, rate, burst)
+            self._state[key] = (tokens, now)
+            return wait
+
+class SQLiteBuckets:
+    def __init__(self, path: str = "admission.sqlite3"):
+        self._lock = threading.Lock()
+        # isolation_level=None: transaksi diatur manual (BEGIN IMMEDIATE) agar antar-proses atomik.
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=5.0)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)")
+
+    def acquire(self, key: str, rate: float, burst: float) -> float:
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                row = self._db.execute("SELECT tokens, updated FROM buckets WHERE key = ?", (key,)).fetchone()
+                tokens, wait = _refill(row[0] if row else burst, row[1] if row else now, now, rate, burst)
+                self._db.execute("INSERT OR REPLACE INTO buckets (key, tokens, updated) VALUES (?, ?, ?)", (key, tokens, now))
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+            return wait
+
+class AdmissionController:
+    def __init__(self, buckets=None, limits=None, default_rate=DEFAULT_RATE):
+        self.buckets = buckets or MemoryBuckets()
+        self.limits = dict(RATE_LIMITS if limits is None else limits)
+        self.default_rate = default_rate
+        self._queues = OrderedDict()  # bucket key -> deque[(job, model, dispatch)]
+        self._cond = threading.Condition()
+        threading.Thread(target=self._loop, name="admission", daemon=True).start()
+
+    def rate_for(self, model_name: str):
+        return self.limits.get(model_name, self.default_rate)
+
+    def submit(self, key: str, model_name: str, job, dispatch):
+        # `dispatch()` dipanggil (di thread admission) begitu token tersedia.
+        with self._cond:
+            self._queues.setdefault(key, deque()).append((job, model_name, dispatch))
+            self._cond.notify()
+
+    def try_acquire(self, key: str, model_name: str) -> bool:
+        # Tanpa antre: True bila token langsung tersedia (mis. untuk hedged request tambahan).
+        rate, burst = self.rate_for(model_name)
+        return self.buckets.acquire(key, rate, burst) == 0
+
+    def position(self, job) -> int:
+        # 0 = sudah dikirim ke worker; 1 = berikutnya di bucket-nya; dst.
+        with self._cond:
+            for q in self._queues.values():
+                ahead = 0
+                for j, _, _ in q:
+                    if j is job:
+                        return ahead + 1
+                    if not j.cancelled:
+                        ahead += 1
+        return 0
+
+    def queued(self) -> int:
+        with self._cond:
+            return sum(len(q) for q in self._queues.values())
+
+    def _pop(self, key: str, job):
+        with self._cond:
+            q = self._queues.get(key)
+            if q and q[0][0] is job:
+                q.popleft()
+                if not q:
+                    self._queues.pop(key, None)
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                while not self._queues:
+                    self._cond.wait()
+                keys = list(self._queues)
+            next_wake = None
+            # Satu job per bucket per putaran: bucket yang ramai tidak menyerobot bucket lain.
+            for key in keys:
+                with self._cond:
+                    q = self._queues.get(key)
+                    while q and q[0][0].cancelled:
+                        q.popleft()[0]._finish()
+                    if not q:
+                        self._queues.pop(key, None)
+                        continue
+                    job, model_name, dispatch = q[0]
+                try:
+                    rate, burst = self.rate_for(model_name)
+                    wait = self.buckets.acquire(key, rate, burst)
+                    if wait:
+                        next_wake = wait if next_wake is None else min(next_wake, wait)
+                        continue
+                    self._pop(key, job)
+                    if job.cancelled:
+                        job._finish()
+                    else:
+                        dispatch()
+                except Exception as e:
+                    # Mis. SQLite "database is locked" atau dispatch gagal: job ini saja yang gagal,
+                    # thread admission (satu-satunya) harus tetap hidup untuk antrean lain.
+                    log.exception("Admission gagal untuk job di bucket %s", key)
+                    self._pop(key, job)
+                    if not job.done:
+                        job._finish(error=e)
+            with self._cond:
+                if next_wake is not None and self._queues:
+                    self._cond.wait(timeout=next_wake)
+
+def make_admission(backend: str = "memory", path: str = "admission.sqlite3"):
+    if backend == "off":
+        return None
+    if backend == "sqlite":
+        return AdmissionController(SQLiteBuckets(path))
+    if backend == "memory":
+        return AdmissionController(MemoryBuckets())
+    raise ValueError(f"Backend admission tidak dikenal: {backend}")
@@ -0,0 +1,166 @@
+import os
+import sys
+import json
+import time
+import queue
+import argparse
+import threading
+
+from chat_core import (
+    MODEL_OPTIONS, build_payload, resolve_model, make_client, make_engine, make_metrics, make_response_cache,
+)
+from context_window import ContextWindow
+from conversation_store import DEFAULT_SYSTEM_PROMPT
+
+# =========================
+# 📦 BATCH RUNNER (CLI, tanpa Streamlit)
+# =========================
+# Input JSONL, satu item per baris:
+#   {"id": "q1", "prompt": "..."}                      → diberi system prompt default
+#   {"id": "q2", "messages": [{"role": ..., "content": ...}, ...]}
+# Output JSONL ditulis begitu tiap item selesai. Item yang sudah sukses di file output
+# dilewati saat dijalankan ulang, jadi batch bisa dilanjutkan setelah crash.
+#
+#   python batch_runner.py prompts.jsonl hasil.jsonl --model "Mistral 7B" --concurrency 8 --rate 5
+DEFAULT_CONCURRENCY = 4
+
+class RatePacer:
+    # Maksimal `rate` permintaan per detik untuk semua worker (0 = tanpa batas).
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(self._next, now)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+def completed_ids(path: str):
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                continue  # baris terakhir terpotong saat crash
+            if rec.get("error") is None:
+                done.add(rec.get("id"))
+    return done
+
+def read_items(path: str, skip=()):
+    # Baris rusak tidak menghentikan batch: di-yield sebagai item dengan "_error" dan
+    # dicatat gagal di output seperti error saat generasi.
+    with open(path, encoding="utf-8") as f:
+        for n, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                item = json.loads(line)
+            except ValueError as e:
+                yield {"id": f"line-{n}", "_error": f"Baris {n}: JSON tidak valid ({e})"}
+                continue
+            if not isinstance(item, dict):
+                yield {"id": f"line-{n}", "_error": f"Baris {n}: bukan objek JSON"}
+                continue
+            item.setdefault("id", f"line-{n}")
+            if item["id"] in skip:
+                continue
+            if "messages" not in item:
+                if "prompt" not in item:
+                    yield {"id": item["id"], "_error": f"Baris {n}: butuh 'prompt' atau 'messages'"}
+                    continue
+                item["messages"] = [{"role": "system", "content": item.get("system", DEFAULT_SYSTEM_PROMPT)},
+                                    {"role": "user", "content": item["prompt"]}]
+            yield item
+
+def run_batch(input_path: str, output_path: str, model_id: str, api_key: str, concurrency: int = DEFAULT_CONCURRENCY,
+              rate: float = 0.0, max_tokens: int = 1024, temperature: float = 0.7, context_budget=None,
+              cache_mode: str = "auto", engine=None, log=sys.stderr):
+    done = completed_ids(output_path)
+    engine = engine or make_engine(make_client(make_metrics()), cache=make_response_cache(), max_workers=concurrency)
+    pacer = RatePacer(rate)
+    # Antrean terbatas: pembacaan input tidak mendahului worker terlalu jauh.
+    todo = queue.Queue(maxsize=concurrency * 2)
+    write_lock = threading.Lock()
+    counts = {"ok": 0, "error": 0}
+
+    def worker(out):
+        while True:
+            item = todo.get()
+            if item is None:
+                return
+            try:
+                if "_error" in item:
+                    raise ValueError(item["_error"])
+                payload = build_payload(ContextWindow(model_id), item["messages"], [model_id], max_tokens,
+                                        context_budget)
+                pacer.wait()
+                job = engine.submit(payload, model_id, api_key, max_tokens, temperature, stream=False,
+                                    conv_id=item["id"], kind="batch", cache_mode=cache_mode)
+                job.wait()
+                engine.pop(job.id)
+                rec = {
+                    "id": item["id"],
+                    "model": model_id,
+                    "reply": job.text,
+                    "error": None if job.error is None else str(job.error),
+                    "latency": job.latency,
+                    "usage": job.usage,
+                    "cache_hit": job.cache_hit,
+                }
+            except Exception as e:
+                # Item rusak (mis. pesan tanpa 'content') dicatat gagal; worker tetap mengambil
+                # antrean supaya feeder tidak macet di todo.put.
+                rec = {"id": item.get("id"), "model": model_id, "reply": "", "error": f"{type(e).__name__}: {e}",
+                       "latency": None, "usage": None, "cache_hit": False}
+            with write_lock:
+                out.write(json.dumps(rec, ensure_ascii=False) + "\n")
+                out.flush()
+                counts["error" if rec["error"] is not None else "ok"] += 1
+
+    started = time.perf_counter()
+    with open(output_path, "a", encoding="utf-8") as out:
+        threads = [threading.Thread(target=worker, args=(out,), daemon=True) for _ in range(concurrency)]
+        for th in threads:
+            th.start()
+        try:
+            for item in read_items(input_path, done):
+                todo.put(item)
+        finally:
+            for _ in threads:
+                todo.put(None)
+            for th in threads:
+                th.join()
+    elapsed = time.perf_counter() - started
+    print(f"Selesai: {counts['ok']} sukses, {counts['error']} gagal, {len(done)} dilewati, {elapsed:.1f} dtk",
+          file=log)
+    return counts
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Jalankan prompt JSONL secara batch ke OpenRouter.")
+    ap.add_argument("input")
+    ap.add_argument("output")
+    ap.add_argument("--model", default=next(iter(MODEL_OPTIONS)), help="Label MODEL_OPTIONS atau id model.")
+    ap.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    ap.add_argument("--rate", type=float, default=0.0, help="Maks permintaan per detik (0 = tanpa batas).")
+    ap.add_argument("--max-tokens", type=int, default=1024)
+    ap.add_argument("--temperature", type=float, default=0.7)
+    ap.add_argument("--context-budget", type=int, default=None)
+    ap.add_argument("--cache", choices=["auto", "always", "off"], default="auto")
+    ap.add_argument("--api-key", default=os.getenv("OPENROUTER_API_KEY", ""))
+    args = ap.parse_args(argv)
+
+    counts = run_batch(args.input, args.output, resolve_model(args.model), args.api_key, args.concurrency, args.rate,
+                       args.max_tokens, args.temperature, args.context_budget, args.cache)
+    return 1 if counts["error"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+import gc
+import sys
+import json
+import time
+import argparse
+import threading
+import tracemalloc
+
+from metrics import Metrics, percentile
+from gen_engine import GenerationEngine, MAX_INFLIGHT
+from openrouter_client import OpenRouterClient
+from chat_core import ChatSession
+from conversation_store import make_store
+from response_cache import make_cache
+from mock_openrouter import MockConfig, start_mock
+
+# =========================
+# 🏁 BENCHMARK (offline, mock OpenRouter lokal)
+# =========================
+# Mensimulasikan N sesi bersamaan dengan alur yang sama seperti chatbot.py:
+# kirim pesan → simpan ke store → bangun payload → submit ke engine → poll job tiap
+# JOB_POLL_INTERVAL → simpan jawaban. Tidak butuh jaringan maupun API key asli.
+JOB_POLL_INTERVAL = 0.1
+MODEL = "deepseek/deepseek-chat-v3-0324"
+
+class SimulatedSession:
+    def __init__(self, store, engine, model: str, stream: bool, max_tokens: int = 1024, temperature: float = 0.7):
+        self.engine = engine
+        self.model = model
+        self.stream = stream
+        self.max_tokens = max_tokens
+        self.temperature = temperature
+        self.chat = ChatSession(store, store.create("Benchmark"), model)
+        self.turn_latencies = []
+        self.errors = 0
+
+    def turn(self, text: str, poll: float = JOB_POLL_INTERVAL):
+        started = time.perf_counter()
+        self.chat.append("user", text)
+        job = self.chat.submit(self.engine, "reply", self.model, "sk-or-mock", self.max_tokens, self.temperature,
+                               stream=self.stream)
+        # Seperti fragment run_every: jawaban baru terlihat pada poll berikutnya.
+        while not job.wait(poll):
+            pass
+        self.engine.pop(job.id)
+        self.chat.commit(job)
+        self.turn_latencies.append(time.perf_counter() - started)
+        if job.error is not None:
+            self.errors += 1
+
+def run_benchmark(sessions: int = 20, turns: int = 5, stream: bool = True, workers: int = MAX_INFLIGHT,
+                  mock: MockConfig = None, poll: float = JOB_POLL_INTERVAL, cache: str = "off"):
+    server = start_mock(mock or MockConfig())
+    metrics = Metrics(window=sessions * turns * 2)
+    client = OpenRouterClient(model_ids=[MODEL], metrics=metrics, url=server.url)
+    engine = GenerationEngine(client, max_workers=workers, metrics=metrics,
+                              cache=make_cache("memory") if cache != "off" else None)
+    store = make_store("memory")
+    try:
+        gc.collect()
+        tracemalloc.start()
+        base = tracemalloc.get_traced_memory()[0]
+        sims = [SimulatedSession(store, engine, MODEL, stream) for _ in range(sessions)]
+
+        def drive(sim):
+            for t in range(turns):
+                sim.turn(f"Pertanyaan {t + 1}: jelaskan topik nomor {t + 1} secara singkat.", poll)
+
+        threads = [threading.Thread(target=drive, args=(sim,)) for sim in sims]
+        started = time.perf_counter()
+        for th in threads:
+            th.start()
+        for th in threads:
+            th.join()
+        elapsed = time.perf_counter() - started
+        gc.collect()
+        used, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    finally:
+        engine.executor.shutdown(wait=False, cancel_futures=True)
+        server.shutdown()
+
+    lat = [x for sim in sims for x in sim.turn_latencies]
+    ttfb = [r for r in metrics.summary() if r["metric"] == "ttfb"]
+    return {
+        "sessions": sessions,
+        "turns": len(lat),
+        "errors": sum(sim.errors for sim in sims),
+        "elapsed_s": elapsed,
+        "throughput_turns_per_s": len(lat) / elapsed if elapsed else 0.0,
+        "turn_p50_s": percentile(lat, 0.5),
+        "turn_p95_s": percentile(lat, 0.95),
+        "turn_p99_s": percentile(lat, 0.99),
+        "ttfb_p50_s": ttfb[0]["p50"] if ttfb else None,
+        "upstream_requests": server.config.requests,
+        "mem_per_session_kb": (used - base) / sessions / 1024,
+        "mem_peak_kb": peak / 1024,
+    }
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark chatbot offline dengan mock OpenRouter lokal.")
+    ap.add_argument("--sessions", type=int, default=20)
+    ap.add_argument("--turns", type=int, default=5)
+    ap.add_argument("--workers", type=int, default=MAX_INFLIGHT)
+    ap.add_argument("--no-stream", action="store_true")
+    ap.add_argument("--poll", type=float, default=JOB_POLL_INTERVAL)
+    ap.add_argument("--cache", choices=["off", "memory"], default="off")
+    ap.add_argument("--latency", type=float, default=0.2)
+    ap.add_argument("--token-delay", type=float, default=0.01)
+    ap.add_argument("--tokens", type=int, default=40)
+    ap.add_argument("--error-rate", type=float, default=0.0)
+    ap.add_argument("--rate-429", type=float, default=0.0)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--max-p95", type=float, default=None,
+                    help="Gagal (exit 1) bila p95 latensi per giliran melebihi nilai ini (detik).")
+    args = ap.parse_args(argv)
+
+    mock = MockConfig(args.latency, args.token_delay, args.tokens, args.error_rate, args.rate_429, seed=args.seed)
+    result = run_benchmark(args.sessions, args.turns, not args.no_stream, args.workers, mock, args.poll, args.cache)
+    print(json.dumps(result, indent=2))
+    if args.max_p95 is not None and result["turn_p95_s"] > args.max_p95:
+        print(f"REGRESI: p95 {result['turn_p95_s']:.3f}s > {args.max_p95:.3f}s", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
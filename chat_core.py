@@ -0,0 +1,241 @@
+import os
+import sys
+import threading
+
+from openrouter_client import OpenRouterClient
+from gen_engine import GenerationEngine, MAX_INFLIGHT
+from response_cache import make_cache
+from context_window import ContextWindow, prompt_budget
+from conversation_store import make_store, new_message
+from metrics import Metrics, serve_prometheus
+from admission import make_admission
+from router import ModelRouter
+from session_memory import SessionRegistry, DEFAULT_BUDGET_MB, DEFAULT_IDLE_SPILL
+from semantic_cache import SemanticCache, DEFAULT_THRESHOLD
+
+# =========================
+# 🧩 CHAT CORE (tanpa Streamlit)
+# =========================
+# Logika percakapan & generasi yang dipakai bersama oleh chatbot.py, batch_runner.py dan
+# bench_chatbot.py. Modul ini tidak mengimpor Streamlit.
+MODEL_OPTIONS = {
+    "DeepSeek V3": "deepseek/deepseek-chat-v3-0324",
+    "Mistral 7B": "mistralai/mistral-7b-instruct:free",
+    "Grok 3 Mini": "x-ai/grok-3-mini",
+    "Llama 3 70B": "meta-llama/llama-3.3-70b-instruct",
+}
+
+CACHE_MODES = {"Otomatis (temperature 0)": "auto", "Selalu": "always", "Mati": "off"}
+
+TITLE_LENGTH = 40
+
+def resolve_model(name: str) -> str:
+    # Terima label MODEL_OPTIONS ("DeepSeek V3") maupun id model OpenRouter.
+    if name in MODEL_OPTIONS:
+        return MODEL_OPTIONS[name]
+    if name in MODEL_OPTIONS.values():
+        return name
+    raise ValueError(f"Model tidak dikenal: {name} (pilihan: {', '.join(MODEL_OPTIONS)})")
+
+# =========================
+# 🏭 FACTORIES (konfigurasi lewat env)
+# =========================
+# CHAT_METRICS_JSONL: tulis tiap permintaan ke file; CHAT_METRICS_PORT: endpoint Prometheus /metrics.
+def make_metrics():
+    metrics = Metrics(jsonl_path=os.getenv("CHAT_METRICS_JSONL") or None)
+    if os.getenv("CHAT_METRICS_PORT"):
+        serve_prometheus(metrics, int(os.getenv("CHAT_METRICS_PORT")))
+    return metrics
+
+def make_client(metrics=None):
+    return OpenRouterClient(model_ids=list(MODEL_OPTIONS.values()), metrics=metrics)
+
+# CHAT_CACHE_BACKEND=memory (default) atau sqlite (CHAT_CACHE_PATH).
+def make_response_cache():
+    return make_cache(os.getenv("CHAT_CACHE_BACKEND", "memory"), os.getenv("CHAT_CACHE_PATH", "response_cache.sqlite3"))
+
+# CHAT_STORE_BACKEND=sqlite (default) atau memory; file di CHAT_STORE_PATH.
+def make_conversation_store():
+    return make_store(os.getenv("CHAT_STORE_BACKEND", "sqlite"), os.getenv("CHAT_STORE_PATH", "conversations.sqlite3"))
+
+# CHAT_ADMISSION=memory (default, bucket per proses), sqlite (dibagi antar replika lewat
+# CHAT_ADMISSION_PATH) atau off.
+def make_admission_control():
+    return make_admission(os.getenv("CHAT_ADMISSION", "memory"), os.getenv("CHAT_ADMISSION_PATH", "admission.sqlite3"))
+
+def make_router(client, metrics=None):
+    return ModelRouter(client, MODEL_OPTIONS.values(), metrics=metrics)
+
+# CHAT_MEMORY_BUDGET_MB: batas memori percakapan terbuka untuk seluruh proses;
+# CHAT_IDLE_SPILL_S: sesi idle selama ini melepas pesannya (dimuat ulang dari store).
+def make_session_registry():
+    return SessionRegistry(int(float(os.getenv("CHAT_MEMORY_BUDGET_MB", DEFAULT_BUDGET_MB)) * 1024 * 1024),
+                           float(os.getenv("CHAT_IDLE_SPILL_S", DEFAULT_IDLE_SPILL)))
+
+# CHAT_SEMANTIC_THRESHOLD: kemiripan cosine minimum untuk hit cache semantik (selain guard
+# kata di semantic_cache; 1.0 = hanya prompt ternormalisasi yang sama).
+def make_semantic_cache():
+    return SemanticCache(threshold=float(os.getenv("CHAT_SEMANTIC_THRESHOLD", DEFAULT_THRESHOLD)))
+
+def make_engine(client, cache=None, metrics=None, max_workers: int = MAX_INFLIGHT, admission=None, router=None,
+                semantic=None):
+    return GenerationEngine(client, max_workers=max_workers, cache=cache, metrics=metrics, admission=admission,
+                            router=router, semantic=semantic)
+
+# =========================
+# 💬 CONVERSATION
+# =========================
+def default_chat_id(store, owner=None) -> str:
+    # Chat terbaru milik `owner`; chat pertama dibuat bila owner ini belum punya chat.
+    items = store.list_conversations(limit=1, owner=owner)
+    return items[-1][0] if items else store.create("Percakapan 1", owner=owner or "")
+
+def title_from(text: str) -> str:
+    line = text.strip().split("\n")[0][:TITLE_LENGTH]
+    return line + ("…" if line and len(text) > TITLE_LENGTH else "")
+
+def build_payload(window: ContextWindow, messages, model_ids, max_tokens: int, context_budget=None,
+                  summarize: bool = False, upto=None):
+    # Payload yang sama untuk semua model di `model_ids`: dibatasi konteks model terkecil.
+    window.set_model(model_ids[0])
+    cap = min(prompt_budget(m, max_tokens) for m in model_ids)
+    if context_budget is not None:
+        cap = min(cap, int(context_budget))
+    return window.build(messages, max_tokens, budget_cap=cap, summarize=summarize, upto=upto)
+
+class ChatSession:
+    # Satu percakapan yang sedang dibuka: pesan dimuat dari store sekali, jendela konteks
+    # diperbarui per pesan, dan tiap perubahan langsung ditulis ke store. Daftar pesan bisa
+    # dilepas (spill) saat sesi idle dan dimuat ulang dari store saat diakses lagi.
+    # `owner`: hanya percakapan milik owner ini yang boleh dibuka (KeyError bila bukan).
+    def __init__(self, store, conv_id: str, model_id: str = "", owner=None):
+        conv = store.load(conv_id, owner=owner)
+        if conv is None:
+            raise KeyError(conv_id)
+        self.store = store
+        self.owner = owner
+        self._conv = conv
+        self._lock = threading.Lock()
+        self.window = ContextWindow(model_id)
+        self.window.sync(conv["messages"])
+
+    @property
+    def id(self) -> str:
+        return self._conv["id"]
+
+    @property
+    def conv_title(self) -> str:
+        return self._conv["title"]
+
+    @property
+    def conv(self):
+        with self._lock:
+            if self._conv["messages"] is None:
+                conv = self.store.load(self.id, owner=self.owner)
+                self._conv["messages"] = conv["messages"] if conv else []
+                self.window.reset()
+                self.window.sync(self._conv["messages"])
+            return self._conv
+
+    @property
+    def messages(self):
+        return self.conv["messages"]
+
+    @property
+    def spilled(self) -> bool:
+        return self._conv["messages"] is None
+
+    def message_count(self) -> int:
+        msgs = self._conv["messages"]
+        return len(msgs) if msgs is not None else 0
+
+    def memory_bytes(self) -> int:
+        # Perkiraan memori pesan + jendela konteks (0 bila sudah di-spill).
+        msgs = self._conv["messages"]
+        if msgs is None:
+            return 0
+        return sys.getsizeof(msgs) + sum(m.nbytes() for m in msgs) + sys.getsizeof(self.window.counts)
+
+    def spill(self) -> int:
+        with self._lock:
+            freed = self.memory_bytes()
+            self._conv["messages"] = None
+            self.window.reset()
+            return freed
+
+    def _parent(self, index: int):
+        return self.messages[index - 1]["id"] if index > 0 else None
+
+    def append(self, role: str, content: str, model=None):
+        nid = self.store.append_message(self.id, self._parent(len(self.messages)), role, content, model)
+        self.messages.append(new_message(role, content, model, nid))
+        # sync, bukan append: hanya pesan yang belum terhitung (di sini cukup pesan baru).
+        self.window.sync(self.messages)
+
+    def replace_last(self, content: str, model=None):
+        # Jawaban baru jadi saudara pesan terakhir; versi lama tetap tersimpan sebagai cabang.
+        self.window.sync(self.messages)
+        last = self.messages[-1]
+        nid = self.store.append_message(self.id, self._parent(len(self.messages) - 1), last["role"], content, model)
+        self.messages[-1] = new_message(last["role"], content, model, nid)
+        self.window.replace_last(content)
+
+    def edit(self, index: int, content: str):
+        # Ganti pesan ke-`index` dengan versi baru di cabang baru; pesan setelahnya ditinggal
+        # di cabang lama.
+        del self.messages[index:]
+        self.window.truncate(index)
+        self.append("user", content)
+
+    def fork(self, index: int):
+        # Lanjutkan percakapan dari pesan ke-`index` (pesan setelahnya tetap di cabang lama).
+        del self.messages[index + 1:]
+        self.window.truncate(index + 1)
+        self.store.set_head(self.id, self.messages[index]["id"])
+
+    def siblings(self):
+        # {node id: [id saudara]} untuk pesan di cabang aktif yang punya versi lain.
+        found = self.store.siblings(m["id"] for m in self.messages if "id" in m)
+        return {nid: ids for nid, ids in found.items() if len(ids) > 1}
+
+    def switch(self, node_id):
+        # Pindah ke cabang yang memuat `node_id` (sampai ujung terbarunya).
+        self.store.set_head(self.id, self.store.leaf_of(node_id))
+        conv = self.store.load(self.id, owner=self.owner)
+        self.conv["messages"] = conv["messages"]
+        self.window.reset()
+        self.window.sync(self.messages)
+
+    def rename(self, title: str):
+        self._conv["title"] = title
+        self.store.rename(self.id, title, owner=self.owner)
+
+    def auto_title(self):
+        first_user = next((m for m in self.messages if m["role"] == "user"), None)
+        if first_user is not None and title_from(first_user["content"]):
+            self.rename(title_from(first_user["content"]))
+
+    def build_payload(self, kind: str, model_ids, max_tokens: int, context_budget=None, summarize: bool = False):
+        # "reply": seluruh percakapan; "regen": tanpa jawaban terakhir yang akan diganti.
+        return build_payload(self.window, self.messages, model_ids, max_tokens, context_budget, summarize,
+                             upto=None if kind == "reply" else len(self.messages) - 1)
+
+    def submit(self, engine, kind: str, model_id: str, api_key: str, max_tokens: int, temperature: float,
+               stream: bool = True, cache_mode: str = "auto", payload=None, context_budget=None,
+               summarize: bool = False, route: bool = False, semantic: bool = False):
+        if payload is None:
+            payload = self.build_payload(kind, [model_id], max_tokens, context_budget, summarize)
+        return engine.submit(payload, model_id, api_key, max_tokens, temperature, stream=stream,
+                             conv_id=self.id, kind=kind, cache_mode=cache_mode, route=route, semantic=semantic)
+
+    def commit(self, job) -> bool:
+        # Simpan hasil job yang sudah selesai; job batal atau milik chat lain diabaikan.
+        if job.cancelled or job.conv_id != self.id:
+            return False
+        if job.kind == "regen":
+            if not self.messages or self.messages[-1]["role"] != "assistant":
+                return False
+            self.replace_last(job.reply(), job.answered_by)
+        else:
+            self.append("assistant", job.reply(), job.answered_by)
+        return True
@@ -1,15 +1,22 @@
 import os
 import time
-import json
 import uuid
-import requests
 import streamlit as st
-from datetime import datetime
+from chat_core import (
+    MODEL_OPTIONS, CACHE_MODES, ChatSession, default_chat_id,
+    make_metrics, make_client, make_engine, make_response_cache, make_conversation_store, make_admission_control,
+    make_router, make_session_registry, make_semantic_cache, title_from,
+)
+from history_io import export_bytes, import_ndjson
+from rerun_profiler import start_rerun, render_panel
 
 # =========================
 # 🎨 PAGE & STYLES
 # =========================
 st.set_page_config(page_title="AI Chatbot Bubble Style", page_icon="🧠", layout="wide")
+# Profil per bagian script: APP_PROFILE=1 atau ?profile=1 (lihat rerun_profiler).
+_trace = start_rerun("chatbot")
+_trace.section("styles")
 
 BUBBLE_CSS = """
 <style>
@@ -54,28 +61,6 @@ BUBBLE_CSS = """
 .model-badge {font-weight:600; color:#10b981;}
 .via-badge {font-weight:600; color:#111827;}
 .header-title {font-size:40px; font-weight:800; letter-spacing:.3px;}
-.chat-input-wrap {margin-top:18px;}
-
-/* ===== Send row like ChatGPT ===== */
-.send-row { position: relative; }
-.send-row textarea {
-  border-radius: 9999px !important;
-  padding-right: 64px !important;
-  min-height: 56px !important;
-}
-.send-btn .stButton>button {
-  position: absolute;
-  right: 10px;
-  top: 50%;
-  transform: translateY(-50%);
-  width: 44px; height: 44px;
-  border-radius: 9999px;
-  background: #111111; color: #ffffff;
-  border: none;
-  font-size: 18px;
-  box-shadow: 0 4px 12px rgba(0,0,0,.2);
-}
-.send-btn .stButton>button:hover { background: #000000; }
 </style>
 """
 st.markdown(BUBBLE_CSS, unsafe_allow_html=True)
@@ -83,79 +68,191 @@ st.markdown(BUBBLE_CSS, unsafe_allow_html=True)
 # =========================
 # 🔧 Helpers: conversation ops
 # =========================
-def _now_iso():
-    return datetime.now().isoformat(timespec="seconds")
-
-def _new_conv(title: str = "Percakapan Baru"):
-    return {
-        "id": str(uuid.uuid4()),
-        "title": title,
-        "created_at": _now_iso(),
-        "messages": [
-            {"role": "system", "content": "Kamu adalah asisten yang membantu dan sopan. Jawab dalam Bahasa Indonesia baku kecuali diminta lain."}
-        ],
-    }
+# Jumlah bubble terakhir yang dirender; pesan lebih lama dimuat per halaman lewat tombol.
+HISTORY_PAGE = 40
+# Sidebar hanya menampilkan N chat terbaru; chat lama dicari lewat kotak pencarian.
+SIDEBAR_RECENT = 30
+
+# Riwayat disimpan di store bersama (SQLite secara default: CHAT_STORE_BACKEND / CHAT_STORE_PATH).
+# Session hanya menyimpan id chat aktif dan ChatSession untuk chat itu saja.
+@st.cache_resource
+def get_conversation_store():
+    return make_conversation_store()
+
+# Memori percakapan terbuka semua sesi (budget per proses + spill sesi idle, lihat chat_core).
+@st.cache_resource
+def get_session_registry():
+    return make_session_registry()
+
+# Pemilik percakapan per browser, disimpan di URL (?uid=...) seperti ?rid di riwayat kuis:
+# tetap sama setelah reload/bookmark, dan sesi lain tidak melihat chat milik uid lain.
+OWNER_PARAM = "uid"
+
+def owner_id() -> str:
+    if "owner" not in st.session_state:
+        uid = st.query_params.get(OWNER_PARAM)
+        if not uid:
+            uid = uuid.uuid4().hex
+            st.query_params[OWNER_PARAM] = uid
+        st.session_state.owner = uid
+    return st.session_state.owner
 
 def _ensure_state():
-    if "conversations" not in st.session_state:
-        first = _new_conv("Percakapan 1")
-        st.session_state.conversations = {first["id"]: first}
-        st.session_state.active_chat_id = first["id"]
+    if "session_key" not in st.session_state:
+        st.session_state.session_key = str(uuid.uuid4())
+    if "active_chat_id" not in st.session_state:
+        st.session_state.active_chat_id = default_chat_id(get_conversation_store(), owner_id())
     if "active_model" not in st.session_state:
         st.session_state.active_model = None
 
+def _chat() -> ChatSession:
+    # Pesan dimuat dari store hanya saat chat aktif berganti.
+    chat = st.session_state.get("chat")
+    if chat is None or chat.id != st.session_state.active_chat_id:
+        store = get_conversation_store()
+        model = st.session_state.get("active_model") or ""
+        try:
+            chat = ChatSession(store, st.session_state.active_chat_id, model, owner=owner_id())
+        except KeyError:
+            # Chat sudah dihapus dari sesi lain (atau bukan milik owner ini).
+            st.session_state.active_chat_id = default_chat_id(store, owner_id())
+            chat = ChatSession(store, st.session_state.active_chat_id, model, owner=owner_id())
+        st.session_state.chat = chat
+        st.session_state.history_limit = HISTORY_PAGE
+        st.session_state.bubble_cache = {}
+    get_session_registry().touch(st.session_state.session_key, chat)
+    return chat
+
 def _active_conv():
-    return st.session_state.conversations[st.session_state.active_chat_id]
+    return _chat().conv
 
 def _set_active(chat_id: str):
-    if chat_id in st.session_state.conversations:
+    # Hanya chat milik owner ini (mis. id dari hasil pencarian yang sudah kedaluwarsa).
+    if chat_id != st.session_state.active_chat_id and get_conversation_store().title(chat_id, owner=owner_id()) is not None:
+        _cancel_pending_job()
         st.session_state.active_chat_id = chat_id
 
 def _create_new_chat():
-    c = _new_conv(f"Percakapan {len(st.session_state.conversations)+1}")
-    st.session_state.conversations[c["id"]] = c
-    st.session_state.active_chat_id = c["id"]
+    _cancel_pending_job()
+    store = get_conversation_store()
+    st.session_state.active_chat_id = store.create(f"Percakapan {store.count(owner=owner_id())+1}", owner=owner_id())
 
 def _delete_active_chat():
-    if len(st.session_state.conversations) <= 1:
+    store = get_conversation_store()
+    ids = [cid for cid, _ in store.list_conversations(limit=SIDEBAR_RECENT, owner=owner_id())]
+    if len(ids) <= 1:
         st.warning("Minimal harus ada 1 chat.")
         return
+    _cancel_pending_job()
     cid = st.session_state.active_chat_id
-    ids = list(st.session_state.conversations.keys())
-    idx = max(0, ids.index(cid)-1)
-    st.session_state.conversations.pop(cid, None)
-    st.session_state.active_chat_id = ids[idx] if ids[idx] in st.session_state.conversations else list(st.session_state.conversations.keys())[0]
+    idx = max(0, ids.index(cid)-1) if cid in ids else len(ids)-1
+    store.delete(cid, owner=owner_id())
+    ids = [i for i in ids if i != cid]
+    st.session_state.active_chat_id = ids[min(idx, len(ids)-1)]
 
 def _rename_active_chat(new_title: str):
     if new_title.strip():
-        st.session_state.conversations[st.session_state.active_chat_id]["title"] = new_title.strip()
+        _chat().rename(new_title.strip())
 
 def _append_msg(role, content):
-    st.session_state.conversations[st.session_state.active_chat_id]["messages"].append({"role": role, "content": content})
-
-def _visible_msgs(conv):
-    return [m for m in conv["messages"] if m["role"] in ("user","assistant")]
-
-def _auto_title_from_first_user(conv):
-    try:
-        first_user = next(m for m in conv["messages"] if m["role"] == "user")
-        text = first_user["content"].strip().split("\n")[0][:40]
-        if text:
-            conv["title"] = text + ("…" if len(first_user["content"]) > 40 else "")
-    except StopIteration:
-        pass
+    _chat().append(role, content)
+
+def _visible_tail(conv, limit: int):
+    # Ambil `limit` pesan user/assistant terakhir (dengan seq-nya) dari belakang,
+    # tanpa memfilter seluruh transkrip.
+    items, msgs = [], conv["messages"]
+    i = len(msgs) - 1
+    while i >= 0 and len(items) < limit:
+        if msgs[i]["role"] in ("user", "assistant"):
+            items.append((i, msgs[i]))
+        i -= 1
+    has_more = any(msgs[j]["role"] in ("user", "assistant") for j in range(i, -1, -1))
+    return items[::-1], has_more
 
 # =========================
 # ⚙️ STATE & MODEL LIST
 # =========================
+_trace.section("state")
 _ensure_state()
 
-MODEL_OPTIONS = {
-    "DeepSeek V3": "deepseek/deepseek-chat-v3-0324",
-    "Mistral 7B": "mistralai/mistral-7b-instruct:free",
-    "Grok 3 Mini": "x-ai/grok-3-mini",
-    "Llama 3 70B": "meta-llama/llama-3.3-70b-instruct",
-}
+# Metrik bersama semua sesi (CHAT_METRICS_JSONL / CHAT_METRICS_PORT, lihat chat_core).
+@st.cache_resource
+def get_metrics():
+    return make_metrics()
+
+# Satu client (connection pool + circuit breaker per model) untuk semua sesi.
+@st.cache_resource
+def get_openrouter_client():
+    return make_client(metrics=get_metrics())
+
+# Worker pool bersama: membatasi jumlah permintaan upstream yang berjalan untuk semua sesi.
+@st.cache_resource
+def get_generation_engine():
+    return make_engine(get_openrouter_client(), cache=get_response_cache(), metrics=get_metrics(),
+                       admission=make_admission_control(), router=make_router(get_openrouter_client(), get_metrics()),
+                       semantic=get_semantic_cache())
+
+# Backend cache jawaban: CHAT_CACHE_BACKEND=memory (default) atau sqlite (CHAT_CACHE_PATH).
+@st.cache_resource
+def get_response_cache():
+    return make_response_cache()
+
+# Cache semantik bersama (opt-in per sesi lewat toggle di sidebar).
+@st.cache_resource
+def get_semantic_cache():
+    return make_semantic_cache()
+
+def _cancel_pending_job():
+    job_id = st.session_state.get("pending_job_id")
+    if job_id:
+        get_generation_engine().cancel(job_id)
+        st.session_state.pending_job_id = None
+    _cancel_compare_jobs()
+
+def _cancel_compare_jobs():
+    for job_id in (st.session_state.get("compare_jobs") or {}).values():
+        get_generation_engine().cancel(job_id)
+    st.session_state.compare_jobs = None
+    st.session_state.compare_results = {}
+
+def _submit_job(chat, model_name: str, kind: str, payload=None):
+    return chat.submit(
+        get_generation_engine(),
+        kind,
+        model_name,
+        st.session_state.api_key,
+        st.session_state.max_tokens,
+        st.session_state.temperature,
+        stream=st.session_state.get("stream", True),
+        cache_mode=CACHE_MODES[st.session_state.get("cache_mode", "Otomatis (temperature 0)")],
+        payload=payload,
+        context_budget=_context_budget(),
+        summarize=st.session_state.get("summarize_context", False),
+        # Compare mode sengaja membandingkan model tertentu, jadi tidak di-hedge.
+        route=kind != "compare" and st.session_state.get("routing", False),
+        # Regenerasi meminta jawaban baru, jadi tidak diambil dari cache semantik.
+        semantic=kind == "reply" and st.session_state.get("semantic_cache", False),
+    )
+
+def _context_budget():
+    # None = tanpa batas tambahan (build_payload tetap memakai jendela konteks model).
+    if not st.session_state.get("limit_context", False):
+        return None
+    return st.session_state.get("context_budget")
+
+def _submit_generation(kind: str):
+    model_name = MODEL_OPTIONS[st.session_state.model_select]
+    st.session_state.pending_job_id = _submit_job(_chat(), model_name, kind).id
+
+def _submit_compare(labels):
+    # Fan-out: payload yang sama dikirim ke tiap model sekaligus; worker pool menjalankannya paralel.
+    chat = _chat()
+    payload = chat.build_payload(
+        "reply", [MODEL_OPTIONS[l] for l in labels], st.session_state.max_tokens,
+        _context_budget(), st.session_state.get("summarize_context", False),
+    )
+    st.session_state.compare_results = {}
+    st.session_state.compare_jobs = {l: _submit_job(chat, MODEL_OPTIONS[l], "compare", payload).id for l in labels}
 
 # === Callback: trigger regen when model changed ===
 def _on_model_change():
@@ -163,13 +260,35 @@ def _on_model_change():
     prev_model_id = st.session_state.get("active_model")
     conv = _active_conv() if "active_chat_id" in st.session_state else None
     has_assistant_last = bool(conv and conv["messages"] and conv["messages"][-1]["role"] == "assistant")
+    if prev_model_id != new_model_id:
+        # Jawaban yang sedang dibuat model lama dibatalkan; generasi diulang dengan model baru.
+        _cancel_pending_job()
+        # Penanda "via" bergantung pada model aktif.
+        st.session_state.bubble_cache = {}
     if prev_model_id != new_model_id and has_assistant_last:
         st.session_state.regen_due_to_model_change = True
     st.session_state.active_model = new_model_id
 
+# =========================
+# ⌨️ INPUT (st.chat_input: Enter=kirim, Shift+Enter=baris baru)
+# =========================
+_trace.section("input")
+# Widget bawaan, selalu menempel di bawah halaman. Pesan diproses di awal script (sebelum
+# sidebar & riwayat dirender) sehingga satu rerun cukup untuk menampilkan pesan baru,
+# judul otomatis, dan memulai generasi — tanpa iframe/skrip DOM dan tanpa st.rerun() tambahan.
+get_metrics().inc("reruns")
+user_text = st.chat_input("Tanyakan segalanya! (Enter untuk kirim, Shift+Enter baris baru)", key="chat_input")
+if user_text and user_text.strip():
+    get_metrics().inc("messages_sent")
+    _cancel_pending_job()
+    _append_msg("user", user_text.strip())
+    if sum(1 for m in _active_conv()["messages"] if m["role"] == "user") == 1:
+        _chat().auto_title()
+
 # =========================
 # ⚙️ SIDEBAR (API & Model) + HISTORY
 # =========================
+_trace.section("sidebar")
 with st.sidebar:
     st.markdown("<div class='sidebar-card'><h3>Pengaturan Chatbot</h3><p>Pilih model terlebih dahulu.</p></div>", unsafe_allow_html=True)
 
@@ -189,23 +308,82 @@ with st.sidebar:
     api_key = st.text_input("OpenRouter API Key", type="password", placeholder="sk-or-...", value=os.getenv("OPENROUTER_API_KEY", ""), key="api_key")
     max_tokens = st.slider("Max tokens", 128, 4096, 1024, 64, key="max_tokens")
     temperature = st.slider("Temperature", 0.0, 1.2, 0.7, 0.1, key="temperature")
+    st.toggle("Streaming jawaban", value=True, key="stream")
+    st.selectbox("Cache jawaban", list(CACHE_MODES.keys()), index=0, key="cache_mode")
+    cache_stats = get_response_cache().stats()
+    st.caption(f"Cache: {cache_stats['hits']} hit · {cache_stats['misses']} miss · {cache_stats['size']} entri")
+    st.toggle("Cache semantik", value=False, key="semantic_cache",
+              help="Pertanyaan singkat yang hampir sama dengan pertanyaan sebelumnya (beda kata pengisi atau "
+                   "salah ketik) dijawab dari cache, untuk model, prompt system dan parameter yang sama.")
+    if st.session_state.semantic_cache:
+        sem_stats = get_semantic_cache().stats()
+        st.caption(f"Semantik: {sem_stats['hit_rate']:.0%} hit rate · {sem_stats['hits']} hit · "
+                   f"hemat {sem_stats['saved_seconds']:.1f} dtk · {sem_stats['size']} entri")
+    # Default: tanpa batas tambahan, konteks hanya dibatasi jendela model (dikurangi max tokens).
+    st.toggle("Batasi konteks", value=False, key="limit_context",
+              help="Batas token tambahan untuk riwayat yang dikirim, di bawah jendela konteks model.")
+    if st.session_state.limit_context:
+        st.slider("Batas konteks (token)", 1024, 32768, 8192, 512, key="context_budget")
+    st.toggle("Ringkas pesan lama", value=False, key="summarize_context",
+              help="Pesan yang tidak muat di batas konteks diganti ringkasan singkat.")
+    st.toggle("Routing otomatis", value=False, key="routing",
+              help="Bila model lambat atau error, permintaan yang sama dikirim ke model cadangan; yang lebih cepat dipakai.")
+    st.toggle("Mode bandingkan", value=False, key="compare_mode",
+              help="Pesan dikirim ke beberapa model sekaligus; pilih satu jawaban untuk disimpan.")
+    if st.session_state.compare_mode:
+        st.multiselect("Model dibandingkan", list(MODEL_OPTIONS.keys()), default=list(MODEL_OPTIONS.keys())[:2],
+                       key="compare_models")
+
+    with st.expander("Diagnostik"):
+        rows = get_metrics().summary()
+        if rows:
+            st.dataframe(
+                [{**r, "p50": round(r["p50"], 3), "p95": round(r["p95"], 3)} for r in rows],
+                hide_index=True, use_container_width=True,
+            )
+            st.caption("Waktu dalam detik (p50/p95 dari sampel terbaru).")
+        else:
+            st.caption("Belum ada data.")
+        sent = get_metrics().counter("messages_sent")
+        if sent:
+            st.caption(f"Rerun per pesan terkirim: {get_metrics().counter('reruns') / sent:.1f}")
+        registry = get_session_registry()
+        sessions = registry.report()
+        if sessions:
+            st.dataframe(sessions, hide_index=True, use_container_width=True)
+        st.caption(f"Memori percakapan: {registry.total_bytes() / 1024 / 1024:.1f} / "
+                   f"{registry.budget_bytes / 1024 / 1024:.0f} MB · spill: {registry.spills}")
 
     st.markdown("---")
     st.subheader("Riwayat Chat")
 
-    conv_items = [(cid, c["title"]) for cid, c in st.session_state.conversations.items()]
-    conv_items = sorted(conv_items, key=lambda x: st.session_state.conversations[x[0]]["created_at"])
-
-    selected_title = st.radio(
+    query = st.text_input("Cari percakapan", placeholder="🔎 cari isi pesan…", key="chat_search")
+    if query.strip():
+        hits = get_conversation_store().search(query, owner=owner_id())
+        if not hits:
+            st.caption("Tidak ada hasil.")
+        for cid, title, snippet in hits:
+            if st.button(title, key=f"hit_{cid}", use_container_width=True):
+                _set_active(cid)
+                st.rerun()
+            st.caption(snippet)
+
+    # Hanya id & judul N chat terbaru yang dibaca dari store; isi pesan tidak ikut dimuat.
+    conv_titles = dict(get_conversation_store().list_conversations(limit=SIDEBAR_RECENT, owner=owner_id()))
+    if st.session_state.active_chat_id not in conv_titles:
+        # Chat lama yang dibuka dari hasil pencarian tetap tampil di daftar.
+        conv_titles[st.session_state.active_chat_id] = _active_conv()["title"]
+    conv_ids = list(conv_titles)
+
+    selected_id = st.radio(
         "Pilih percakapan",
-        options=[t for _, t in conv_items],
-        index=[t for _, t in conv_items].index(st.session_state.conversations[st.session_state.active_chat_id]["title"]) if conv_items else 0,
+        options=conv_ids,
+        index=conv_ids.index(st.session_state.active_chat_id) if st.session_state.active_chat_id in conv_titles else 0,
+        format_func=lambda cid: conv_titles[cid],
         label_visibility="collapsed",
     )
-    for cid, title in conv_items:
-        if title == selected_title:
-            _set_active(cid)
-            break
+    if selected_id is not None:
+        _set_active(selected_id)
 
     colA, colB = st.columns(2)
     with colA:
@@ -223,25 +401,64 @@ with st.sidebar:
         _rename_active_chat(new_title)
         st.rerun()
 
+    with st.expander("📦 Ekspor / Impor"):
+        scope = st.radio("Ekspor", ["Chat aktif", "Semua chat"], horizontal=True, key="export_scope")
+        # File baru dibuat saat tombol diklik (callable); rerun biasa tidak menyentuh riwayat.
+        # "Semua chat" = semua chat milik owner ini saja.
+        export_ids = [st.session_state.active_chat_id] if scope == "Chat aktif" else None
+        owner = owner_id()
+        st.download_button("⬇️ Unduh .ndjson.gz", data=lambda: export_bytes(get_conversation_store(), export_ids, owner),
+                           file_name="riwayat_chat.ndjson.gz", mime="application/gzip", use_container_width=True)
+        upload = st.file_uploader("Impor (.ndjson.gz)", type=["gz", "ndjson"], key="import_file")
+        if upload is not None and st.button("Impor", use_container_width=True):
+            try:
+                stats = import_ndjson(get_conversation_store(), upload, owner=owner_id())
+            except ValueError as e:
+                st.error(f"Impor gagal: {e}")
+            else:
+                st.success(f"{stats['conversations']} chat, {stats['messages']} pesan diimpor.")
+
     st.markdown("---")
 
 # =========================
-# 🔌 CALL OPENROUTER
+# 💬 BUBBLE HTML
 # =========================
-def call_openrouter(messages_payload, model_name: str, api_key_str: str, max_tokens: int, temperature: float):
-    if not api_key_str:
-        raise RuntimeError("API key belum diisi. Masukkan API key di sidebar.")
-    url = "https://openrouter.ai/api/v1/chat/completions"
-    headers = {"Content-Type":"application/json","Authorization":f"Bearer {api_key_str}"}
-    body = {"model":model_name,"messages":messages_payload,"max_tokens":max_tokens,"temperature":temperature}
-    r = requests.post(url, headers=headers, data=json.dumps(body), timeout=60)
-    if r.status_code != 200:
-        raise RuntimeError(f"Gagal memanggil OpenRouter: {r.status_code} {r.text}")
-    return r.json()["choices"][0]["message"]["content"]
+# Interval polling job generasi; sekaligus batas laju re-render bubble saat streaming (detik).
+JOB_POLL_INTERVAL = 0.1
+
+MODEL_LABELS = {v: k for k, v in MODEL_OPTIONS.items()}
+
+def _bubble_html(role, content, model=None, badge=None):
+    is_user = role == "user"
+    avatar_class = "avatar-user" if is_user else "avatar-ai"
+    avatar_text = "🧑" if is_user else "🤖"
+    bubble_class = "bubble-user" if is_user else "bubble-ai"
+    # Penanda model yang menjawab bila berbeda dari model yang sedang dipilih (mis. hasil fallback).
+    via = ""
+    if model and model != st.session_state.get("active_model"):
+        via = f"<div class='powered'>via <span class='via-badge'>{MODEL_LABELS.get(model, model)}</span></div>"
+    if badge:
+        via += f"<div class='powered'>{badge}</div>"
+    return f"""
+            <div class="row">
+              <div class="avatar {avatar_class}">{avatar_text}</div>
+              <div class="bubble {bubble_class}">{content}{via}</div>
+            </div>
+            """
+
+def _typing_html(label):
+    return f"""
+            <div class="typing">
+              <span>●</span>
+              <span>{label}</span>
+              <div class="dot"></div><div class="dot"></div><div class="dot"></div>
+            </div>
+            """
 
 # =========================
 # 🧠 HEADER
 # =========================
+_trace.section("header")
 active_conv = _active_conv()
 st.markdown(
     f"""
@@ -257,168 +474,240 @@ st.markdown(
 # =========================
 # 💬 RENDER HISTORY (chat aktif)
 # =========================
+_trace.section("history")
+def _history_html(items, cache, fresh):
+    # HTML bubble di-memo per id node pesan; hanya pesan baru/berubah yang dirender ulang.
+    badges = st.session_state.get("cache_badges", {})
+    parts = []
+    for seq, msg in items:
+        key = msg.get("id", seq)
+        hit = cache.get(key)
+        if hit is None or hit[0] is not msg["content"]:
+            hit = (msg["content"], _bubble_html(msg["role"], msg["content"], msg.get("model"), badges.get(key)))
+        fresh[key] = hit
+        parts.append(hit[1])
+    return "".join(parts)
+
+def _switch_branch(node_id):
+    _cancel_pending_job()
+    _chat().switch(node_id)
+
+def _branch_nav(msg, ids):
+    # ◀ i/n ▶ untuk pesan yang punya versi lain (hasil regenerasi/edit).
+    pos = ids.index(msg["id"])
+    cols = st.columns([0.08, 0.12, 0.08, 0.72])
+    cols[0].button("◀", key=f"branch_prev_{msg['id']}", disabled=pos == 0,
+                   on_click=_switch_branch, args=(ids[pos - 1],))
+    cols[1].markdown(f"<div style='text-align:center;opacity:.7'>{pos + 1}/{len(ids)}</div>", unsafe_allow_html=True)
+    cols[2].button("▶", key=f"branch_next_{msg['id']}", disabled=pos == len(ids) - 1,
+                   on_click=_switch_branch, args=(ids[min(pos + 1, len(ids) - 1)],))
+
+def _render_history(items):
+    # Satu elemen markdown per rentang pesan; rentang hanya dipotong di pesan yang bercabang.
+    # Cache hanya berisi pesan yang sedang tampil, jadi ukurannya ikut batas halaman.
+    cache, fresh = st.session_state.setdefault("bubble_cache", {}), {}
+    branches = _chat().siblings()
+    start = 0
+    for k, (_, msg) in enumerate(items):
+        if msg.get("id") in branches:
+            st.markdown(_history_html(items[start:k + 1], cache, fresh), unsafe_allow_html=True)
+            _branch_nav(msg, branches[msg["id"]])
+            start = k + 1
+    if start < len(items):
+        st.markdown(_history_html(items[start:], cache, fresh), unsafe_allow_html=True)
+    st.session_state.bubble_cache = fresh
+
 chat_box = st.container()
+render_started = time.perf_counter()
 with chat_box:
-    for msg in _visible_msgs(active_conv):
-        is_user = msg["role"] == "user"
-        avatar_class = "avatar-user" if is_user else "avatar-ai"
-        avatar_text = "🧑" if is_user else "🤖"
-        bubble_class = "bubble-user" if is_user else "bubble-ai"
-        st.markdown(
-            f"""
-            <div class="row">
-              <div class="avatar {avatar_class}">{avatar_text}</div>
-              <div class="bubble {bubble_class}">{msg['content']}</div>
-            </div>
-            """,
-            unsafe_allow_html=True,
-        )
-
-st.markdown("<div style='height: 10px;'></div>", unsafe_allow_html=True)
+    shown, has_older = _visible_tail(active_conv, st.session_state.get("history_limit", HISTORY_PAGE))
+    if has_older and st.button("⬆️ Muat pesan sebelumnya", key="load_older"):
+        st.session_state.history_limit = st.session_state.get("history_limit", HISTORY_PAGE) + HISTORY_PAGE
+        st.rerun()
+    if shown:
+        _render_history(shown)
+get_metrics().observe("render", time.perf_counter() - render_started)
 
 # =========================
-# ⌨️ INPUT (ChatGPT-like: Enter=send, Shift+Enter=newline)
+# 🌿 BRANCH: edit pesan / fork dari titik tertentu
 # =========================
-st.markdown("<div class='chat-input-wrap send-row'>", unsafe_allow_html=True)
-with st.form("chat-input", clear_on_submit=True):
-    cols = st.columns([1, 0.0001])
-    with cols[0]:
-        user_text = st.text_area(
-            "Tanyakan segalanya!",
-            placeholder="pro tips: klik tombol ➤ atau tekan Enter untuk kirim",
-            height=120,
-            key="chat_textarea"
+_trace.section("branch")
+def _edit_message(index: int, key: str):
+    text = (st.session_state.get(key) or "").strip()
+    if text:
+        _cancel_pending_job()
+        _chat().edit(index, text)
+
+def _fork_from(index: int):
+    _cancel_pending_job()
+    _chat().fork(index)
+
+if shown:
+    with st.expander("🌿 Cabang & edit", expanded=False):
+        index = st.selectbox(
+            "Pesan", [i for i, _ in shown][::-1], key="branch_index",
+            format_func=lambda i: f"{'🧑' if active_conv['messages'][i]['role'] == 'user' else '🤖'} "
+                                  f"{title_from(active_conv['messages'][i]['content'])}",
         )
-    with cols[1]:
-        st.markdown("<div class='send-btn'>", unsafe_allow_html=True)
-        send_clicked = st.form_submit_button("➤", use_container_width=False)
-        st.markdown("</div>", unsafe_allow_html=True)
-st.markdown("</div>", unsafe_allow_html=True)
-
-# JS: Enter to send (tanpa Shift)
-st.components.v1.html(
-    """
-    <script>
-    (function() {
-      function findTA() {
-        const tas = window.parent.document.querySelectorAll('textarea');
-        for (const ta of tas) {
-          if (ta.placeholder && ta.placeholder.includes('Enter untuk kirim')) return ta;
-        }
-        return null;
-      }
-      function findSendBtn() {
-        const btns = window.parent.document.querySelectorAll('button');
-        for (const b of btns) { if (b.innerText.trim() === '➤') return b; }
-        return null;
-      }
-      function init() {
-        const ta = findTA();
-        const send = findSendBtn();
-        if (!ta || !send) { setTimeout(init, 300); return; }
-        if (ta._bound) return;
-        ta._bound = true;
-        ta.addEventListener('keydown', function(e) {
-          if (e.key === 'Enter' && !e.shiftKey) {
-            e.preventDefault();
-            send.click();
-          }
-        });
-      }
-      init();
-    })();
-    </script>
-    """,
-    height=0
-)
+        msg = active_conv["messages"][index]
+        if msg["role"] == "user":
+            edit_key = f"branch_edit_text_{msg.get('id', index)}"
+            st.text_area("Edit pesan", value=msg["content"], key=edit_key)
+            st.button("✏️ Kirim sebagai cabang baru", key="branch_edit", on_click=_edit_message, args=(index, edit_key),
+                      use_container_width=True)
+        st.button("🍴 Fork dari sini", key="branch_fork", on_click=_fork_from, args=(index,),
+                  use_container_width=True, help="Lanjutkan percakapan dari pesan ini; pesan setelahnya tetap tersimpan di cabang lama.")
 
-if send_clicked and user_text and user_text.strip():
-    _append_msg("user", user_text.strip())
-    if len([m for m in active_conv["messages"] if m["role"] == "user"]) == 1:
-        _auto_title_from_first_user(active_conv)
-    st.rerun()
+st.markdown("<div style='height: 10px;'></div>", unsafe_allow_html=True)
 
 # =========================
 # 🔁 REGENERATE LAST ANSWER WHEN MODEL CHANGES
 # =========================
+_trace.section("generation")
 def regenerate_last_answer_for_new_model():
     conv = _active_conv()
     if not conv["messages"]:
         return False
     if conv["messages"][-1]["role"] != "assistant":
         return False
-
-    payload = conv["messages"][:-1]
-    with chat_box:
-        typing_holder = st.empty()
-        typing_holder.markdown(
-            """
-            <div class="typing">
-              <span>●</span><span>Mengganti jawaban sesuai model…</span>
-              <div class="dot"></div><div class="dot"></div><div class="dot"></div>
-            </div>
-            """,
-            unsafe_allow_html=True,
-        )
-        try:
-            new_reply = call_openrouter(payload, MODEL_OPTIONS[st.session_state.model_select],
-                                        st.session_state.api_key, st.session_state.max_tokens, st.session_state.temperature)
-        except Exception as e:
-            new_reply = f"Maaf, terjadi kesalahan: {e}"
-        finally:
-            typing_holder.empty()
-
-        conv["messages"][-1]["content"] = new_reply
+    _cancel_pending_job()
+    _submit_generation("regen")
     return True
 
 if st.session_state.get("regen_due_to_model_change"):
     st.session_state.regen_due_to_model_change = False
-    if regenerate_last_answer_for_new_model():
-        st.rerun()
+    regenerate_last_answer_for_new_model()
 
 # =========================
 # ▶️ NORMAL GENERATION (kalau terakhir adalah user di chat aktif)
 # =========================
 active_conv = _active_conv()
-if len(active_conv["messages"]) >= 2 and active_conv["messages"][-1]["role"] == "user":
+if (len(active_conv["messages"]) >= 2 and active_conv["messages"][-1]["role"] == "user"
+        and not st.session_state.get("pending_job_id") and not st.session_state.get("compare_jobs")):
+    compare_labels = st.session_state.get("compare_models") or []
+    if st.session_state.get("compare_mode") and len(compare_labels) >= 2:
+        _submit_compare(compare_labels)
+    else:
+        _submit_generation("reply")
+
+# =========================
+# ⏳ PENDING JOB (di-poll lewat fragment, thread script tidak ikut menunggu)
+# =========================
+@st.fragment(run_every=JOB_POLL_INTERVAL)
+def _render_pending_job():
+    engine = get_generation_engine()
+    job_id = st.session_state.get("pending_job_id")
+    job = engine.get(job_id) if job_id else None
+    if job is None:
+        st.session_state.pending_job_id = None
+        st.rerun()
+    if not job.done:
+        text = job.text
+        if text:
+            st.markdown(_bubble_html("assistant", text), unsafe_allow_html=True)
+        else:
+            position = engine.queue_position(job)
+            if position:
+                label = f"Menunggu giliran (antrean ke-{position})…"
+            else:
+                label = "Mengganti jawaban sesuai model…" if job.kind == "regen" else "Mengetik…"
+            st.markdown(_typing_html(label), unsafe_allow_html=True)
+        return
+
+    engine.pop(job.id)
+    st.session_state.pending_job_id = None
+    if _chat().commit(job) and job.cache_hit:
+        # Penanda cache hanya untuk sesi ini (tidak disimpan ke store).
+        badge = f"⚡ cache semantik ({job.semantic_hit:.0%} mirip)" if job.semantic_hit is not None else "⚡ cache"
+        st.session_state.setdefault("cache_badges", {})[_chat().messages[-1]["id"]] = badge
+    st.rerun()
+
+if st.session_state.get("pending_job_id"):
     with chat_box:
-        typing_holder = st.empty()
-        typing_holder.markdown(
-            """
-            <div class="typing">
-              <span>●</span>
-              <span>Mengetik…</span>
-              <div class="dot"></div><div class="dot"></div><div class="dot"></div>
-            </div>
-            """,
-            unsafe_allow_html=True,
-        )
-        try:
-            assistant_reply = call_openrouter(active_conv["messages"],
-                                              MODEL_OPTIONS[st.session_state.model_select],
-                                              st.session_state.api_key,
-                                              st.session_state.max_tokens,
-                                              st.session_state.temperature)
-        except Exception as e:
-            assistant_reply = f"Maaf, terjadi kesalahan: {e}"
-        finally:
-            typing_holder.empty()
-
-        placeholder = st.empty()
-        shown = ""
-        for ch in list(assistant_reply):
-            shown += ch
-            placeholder.markdown(
-                f"""
-                <div class="row">
-                  <div class="avatar avatar-ai">🤖</div>
-                  <div class="bubble bubble-ai">{shown}</div>
-                </div>
-                """,
-                unsafe_allow_html=True,
-            )
-            time.sleep(0.008)
+        _render_pending_job()
 
-        _append_msg("assistant", assistant_reply)
-        time.sleep(0.02)
+# =========================
+# ⚖️ COMPARE MODE (beberapa model, jawaban berdampingan)
+# =========================
+_trace.section("compare")
+def _usage_text(job):
+    u = job.usage or {}
+    if not u:
+        return "cache" if job.cache_hit else "token: -"
+    return f"token: {u.get('prompt_tokens', '-')} in · {u.get('completion_tokens', '-')} out"
+
+def _compare_jobs():
+    # Job yang sudah selesai dipindah dari engine ke sesi: engine membuang job selesai setelah
+    # FINISHED_JOB_TTL, padahal pengguna bisa kembali ke tab jauh setelahnya.
+    engine = get_generation_engine()
+    results = st.session_state.setdefault("compare_results", {})
+    jobs = {}
+    for label, job_id in (st.session_state.get("compare_jobs") or {}).items():
+        job = results.get(label)
+        if job is None:
+            job = engine.get(job_id)
+            if job is not None and job.done:
+                engine.pop(job_id)
+                results[label] = job
+        jobs[label] = job
+    return jobs
+
+def _keep_compare_answer(label):
+    job = _compare_jobs().get(label)
+    if job is not None and job.conv_id == st.session_state.active_chat_id:
+        # Simpan model yang menjawab, bukan model aktif di sidebar.
+        _chat().append("assistant", job.reply(), model=job.answered_by)
+    for job_id in st.session_state.compare_jobs.values():
+        get_generation_engine().pop(job_id)
+    st.session_state.compare_jobs = None
+    st.session_state.compare_results = {}
+
+def _rerun_compare():
+    labels = list(st.session_state.compare_jobs or {})
+    _cancel_compare_jobs()
+    _submit_compare(labels)
+
+def _render_compare_columns(jobs, final: bool):
+    cols = st.columns(len(jobs))
+    for col, (label, job) in zip(cols, jobs.items()):
+        with col:
+            st.markdown(f"**{label}**")
+            if job is None:
+                st.caption("Job tidak ditemukan.")
+                continue
+            if job.done:
+                st.caption(f"⏱️ {job.latency:.2f} dtk · {_usage_text(job)}")
+                st.markdown(_bubble_html("assistant", job.reply()), unsafe_allow_html=True)
+                if final:
+                    st.button("✅ Pakai jawaban ini", key=f"keep_{label}", use_container_width=True,
+                              on_click=_keep_compare_answer, args=(label,))
+            elif job.text:
+                st.markdown(_bubble_html("assistant", job.text), unsafe_allow_html=True)
+            else:
+                position = get_generation_engine().queue_position(job)
+                status = f"Menunggu giliran (antrean ke-{position})…" if position else "Mengetik…"
+                st.markdown(_typing_html(status), unsafe_allow_html=True)
+
+@st.fragment(run_every=JOB_POLL_INTERVAL)
+def _render_compare_pending():
+    jobs = _compare_jobs()
+    if all(j is None or j.done for j in jobs.values()):
+        # Semua selesai: rerun penuh sekali, lalu hasil ditampilkan tanpa polling.
         st.rerun()
+    _render_compare_columns(jobs, final=False)
+
+if st.session_state.get("compare_jobs"):
+    with chat_box:
+        jobs = _compare_jobs()
+        if all(j is None for j in jobs.values()):
+            # Hasil sudah hilang (mis. sesi lama dibuka lagi setelah job dibuang engine). Tidak
+            # dikirim ulang otomatis: tiap model akan ditagih lagi, jadi pengguna yang memutuskan.
+            st.warning("Hasil perbandingan sudah tidak tersedia.")
+            st.button("🔁 Bandingkan ulang", key="compare_rerun", on_click=_rerun_compare)
+        elif all(j is None or j.done for j in jobs.values()):
+            _render_compare_columns(jobs, final=True)
+        else:
+            _render_compare_pending()
+
+_trace.finish()
+render_panel(_trace)
@@ -0,0 +1,21 @@
+import pytest
+
+from mock_openrouter import MockConfig, start_mock
+from openrouter_client import OpenRouterClient
+
+# Fixture bersama untuk test_*.py: server mock OpenRouter lokal (tanpa jaringan).
+@pytest.fixture
+def mock():
+    srv = start_mock(MockConfig(latency=0.0, token_delay=0.0, tokens=5))
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+
+@pytest.fixture
+def client_for():
+    # OpenRouterClient ke server mock, tanpa jeda backoff antar retry.
+    def make(srv, **kw):
+        client = OpenRouterClient(url=srv.url, **kw)
+        client._backoff = lambda attempt, retry_after=None: 0.0
+        return client
+    return make
@@ -0,0 +1,137 @@
+import math
+
+# =========================
+# 📏 CONTEXT WINDOW (token budget)
+# =========================
+# Perkiraan kasar karakter per token per keluarga model (tanpa tokenizer asli).
+CHARS_PER_TOKEN = {
+    "deepseek/": 3.6,
+    "mistralai/": 3.3,
+    "x-ai/": 3.8,
+    "meta-llama/": 3.8,
+}
+DEFAULT_CHARS_PER_TOKEN = 3.5
+
+CONTEXT_LIMITS = {
+    "deepseek/deepseek-chat-v3-0324": 163840,
+    "mistralai/mistral-7b-instruct:free": 32768,
+    "x-ai/grok-3-mini": 131072,
+    "meta-llama/llama-3.3-70b-instruct": 131072,
+}
+DEFAULT_CONTEXT_LIMIT = 8192
+
+MESSAGE_OVERHEAD = 4      # token untuk role & pemisah per pesan
+SAFETY_MARGIN = 256
+SUMMARY_BUDGET = 512      # token yang disisihkan untuk ringkasan pesan lama
+SUMMARY_SNIPPET = 160     # karakter per pesan di ringkasan
+SUMMARY_HEADER = "Ringkasan percakapan sebelumnya:"
+
+def chars_per_token(model_id: str) -> float:
+    for prefix, ratio in CHARS_PER_TOKEN.items():
+        if model_id.startswith(prefix):
+            return ratio
+    return DEFAULT_CHARS_PER_TOKEN
+
+def estimate_tokens(text: str, model_id: str) -> int:
+    return MESSAGE_OVERHEAD + math.ceil(len(text) / chars_per_token(model_id))
+
+def prompt_budget(model_id: str, max_tokens: int, cap=None) -> int:
+    # Sisa konteks setelah dicadangkan untuk jawaban (max_tokens), opsional dibatasi `cap`.
+    budget = CONTEXT_LIMITS.get(model_id, DEFAULT_CONTEXT_LIMIT) - int(max_tokens) - SAFETY_MARGIN
+    if cap is not None:
+        budget = min(budget, int(cap))
+    return max(budget, 0)
+
+def _snippet(msg) -> str:
+    who = "Pengguna" if msg["role"] == "user" else "Asisten"
+    text = " ".join(msg["content"].split())
+    if len(text) > SUMMARY_SNIPPET:
+        text = text[:SUMMARY_SNIPPET] + "…"
+    return f"- {who}: {text}"
+
+class ContextWindow:
+    # Menyimpan perkiraan token per pesan satu percakapan; diperbarui saat pesan ditambah,
+    # jadi tiap giliran hanya menghitung pesan baru.
+    def __init__(self, model_id: str):
+        self.model_id = model_id
+        self.counts = []
+        self.total = 0
+        self._summary_lines = []
+        self._summary_upto = 0
+
+    def set_model(self, model_id: str):
+        if model_id != self.model_id:
+            # Rasio karakter/token berbeda: hitung ulang sekali saat sync berikutnya.
+            self.model_id = model_id
+            self.counts = []
+            self.total = 0
+
+    def append(self, content: str):
+        c = estimate_tokens(content, self.model_id)
+        self.counts.append(c)
+        self.total += c
+
+    def replace_last(self, content: str):
+        if self.counts:
+            self.total -= self.counts.pop()
+        self.append(content)
+
+    def truncate(self, n: int):
+        # Percakapan dipotong ke n pesan pertama (edit/fork ke cabang lain).
+        self.counts = self.counts[:n]
+        self.total = sum(self.counts)
+        if self._summary_upto > n:
+            self._summary_lines = []
+            self._summary_upto = 0
+
+    def reset(self):
+        self.counts = []
+        self.total = 0
+        self._summary_lines = []
+        self._summary_upto = 0
+
+    def sync(self, messages):
+        # Menghitung pesan yang belum punya hitungan (counts[i] selalu milik messages[i]).
+        if len(self.counts) > len(messages):
+            self.reset()
+        for m in messages[len(self.counts):]:
+            self.append(m["content"])
+
+    def _summary(self, messages, start: int, end: int) -> str:
+        if end < self._summary_upto or self._summary_upto < start:
+            self._summary_lines = []
+            self._summary_upto = start
+        for m in messages[self._summary_upto:end]:
+            self._summary_lines.append(_snippet(m))
+        self._summary_upto = end
+        # Ringkasan bergulir: simpan potongan terbaru yang muat di SUMMARY_BUDGET.
+        limit = int(SUMMARY_BUDGET * chars_per_token(self.model_id)) - len(SUMMARY_HEADER)
+        lines, used = [], 0
+        for line in reversed(self._summary_lines):
+            if used + len(line) + 1 > limit:
+                break
+            lines.append(line)
+            used += len(line) + 1
+        self._summary_lines = self._summary_lines[len(self._summary_lines) - len(lines):]
+        return "\n".join([SUMMARY_HEADER] + lines[::-1])
+
+    def build(self, messages, max_tokens: int, budget_cap=None, summarize: bool = False, upto=None):
+        self.sync(messages)
+        n = len(messages) if upto is None else upto
+        budget = prompt_budget(self.model_id, max_tokens, budget_cap)
+        used = sum(self.counts[:n]) if upto is not None else self.total
+        if used <= budget:
+            return list(messages[:n])
+
+        head, start, used = [], 0, 0
+        if n and messages[0]["role"] == "system":
+            head, start, used = [messages[0]], 1, self.counts[0]
+        window_budget = budget - SUMMARY_BUDGET if summarize else budget
+        # Sliding window dari pesan terbaru; pesan terakhir selalu ikut.
+        i = n
+        while i > start and (i == n or used + self.counts[i - 1] <= window_budget):
+            used += self.counts[i - 1]
+            i -= 1
+        if summarize and i > start:
+            head = head + [{"role": "system", "content": self._summary(messages, start, i)}]
+        return head + list(messages[i:n])
@@ -0,0 +1,524 @@
+import sys
+import uuid
+import sqlite3
+import threading
+from datetime import datetime
+
+# =========================
+# 💾 CONVERSATION STORE
+# =========================
+# Percakapan disimpan di luar st.session_state. Sidebar hanya membaca id/judul;
+# isi pesan dimuat saat sebuah chat dibuka, dan pesan baru ditulis satu per satu.
+#
+# Pesan disimpan sebagai pohon: tiap node menunjuk ke parent-nya dan percakapan menyimpan
+# `head` (node terakhir cabang aktif). Regenerasi, edit, dan fork membuat node baru di
+# bawah parent yang sama, jadi riwayat bersama tidak pernah disalin.
+#
+# Tiap percakapan punya `owner` (id per browser, lihat chatbot.owner_id). Method yang
+# menerima `owner` hanya melihat/mengubah percakapan milik owner itu; owner=None (CLI,
+# alat admin) berarti semua percakapan. Percakapan lama tanpa owner memakai owner "".
+DEFAULT_SYSTEM_PROMPT = "Kamu adalah asisten yang membantu dan sopan. Jawab dalam Bahasa Indonesia baku kecuali diminta lain."
+
+SEARCH_LIMIT = 20
+SNIPPET_CONTEXT = 40  # karakter di sekitar kata yang cocok (MemoryStore)
+SNIPPET_TOKENS = 12   # token per snippet (FTS5)
+NODE_BATCH = 500      # baris per halaman saat ekspor/impor
+
+def _now_iso():
+    return datetime.now().isoformat(timespec="seconds")
+
+def fts_query(query: str) -> str:
+    # Tiap kata jadi frasa ber-kutip (karakter khusus FTS5 aman); kata terakhir boleh prefiks
+    # agar hasil muncul sambil mengetik.
+    words = [w.replace('"', '""') for w in query.split()]
+    if not words:
+        return ""
+    terms = [f'"{w}"' for w in words]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+class Message:
+    # Record pesan ringkas (__slots__, tanpa __dict__ per pesan). Role di-intern, begitu juga
+    # isi pesan system, jadi prompt system yang sama dipakai bersama oleh semua percakapan.
+    # Mendukung akses gaya dict (msg["role"], msg.get("model"), "id" in msg).
+    __slots__ = ("id", "role", "content", "model")
+
+    def __init__(self, role: str, content: str, model=None, node_id=None):
+        self.role = sys.intern(role)
+        self.content = sys.intern(content) if role == "system" else content
+        self.model = sys.intern(model) if model else None
+        self.id = node_id
+
+    def __getitem__(self, key):
+        value = getattr(self, key, None) if key in self.__slots__ else None
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def get(self, key, default=None):
+        value = getattr(self, key, None) if key in self.__slots__ else None
+        return default if value is None else value
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def __repr__(self):
+        return f"Message({self.role!r}, {self.content[:30]!r}, id={self.id!r})"
+
+    def nbytes(self) -> int:
+        # Perkiraan memori yang dimiliki pesan ini (string yang di-intern tidak dihitung).
+        own = sys.getsizeof(self)
+        return own if self.role == "system" else own + sys.getsizeof(self.content)
+
+def new_message(role: str, content: str, model=None, node_id=None):
+    # "id": node di store; "model": model yang menjawab (pesan assistant). Keduanya metadata
+    # lokal dan tidak dikirim ke upstream.
+    return Message(role, content, model, node_id)
+
+class MemoryStore:
+    # Backend tanpa persistensi (hilang saat proses berhenti); berguna untuk pengujian.
+    def __init__(self):
+        self._convs = {}
+        self._nodes = {}      # id -> (conv_id, parent_id, role, content, model, created_at)
+        self._children = {}   # parent_id -> [id, ...] (urut dibuat)
+        self._next_id = 1
+        self._lock = threading.Lock()
+
+    def _get(self, conv_id: str, owner):
+        conv = self._convs.get(conv_id)
+        return conv if conv is not None and (owner is None or conv["owner"] == owner) else None
+
+    def list_conversations(self, limit=None, owner=None):
+        with self._lock:
+            items = sorted((c for c in self._convs.values() if owner is None or c["owner"] == owner),
+                           key=lambda c: c["created_at"])
+            if limit is not None:
+                items = items[-limit:]
+            return [(c["id"], c["title"]) for c in items]
+
+    def count(self, owner=None) -> int:
+        with self._lock:
+            return sum(1 for c in self._convs.values() if owner is None or c["owner"] == owner)
+
+    def title(self, conv_id: str, owner=None):
+        with self._lock:
+            conv = self._get(conv_id, owner)
+            return conv["title"] if conv else None
+
+    def create(self, title: str, system_prompt: str = DEFAULT_SYSTEM_PROMPT, owner: str = ""):
+        conv = {"id": str(uuid.uuid4()), "title": title, "created_at": _now_iso(), "head": None, "owner": owner}
+        with self._lock:
+            self._convs[conv["id"]] = conv
+        if system_prompt:
+            self.append_message(conv["id"], None, "system", system_prompt)
+        return conv["id"]
+
+    def _path(self, node_id):
+        path = []
+        while node_id is not None:
+            _, parent, role, content, model, _ = self._nodes[node_id]
+            path.append(new_message(role, content, model, node_id))
+            node_id = parent
+        return path[::-1]
+
+    def load(self, conv_id: str, owner=None):
+        with self._lock:
+            conv = self._get(conv_id, owner)
+            if conv is None:
+                return None
+            return {"id": conv["id"], "title": conv["title"], "created_at": conv["created_at"],
+                    "messages": self._path(conv["head"])}
+
+    def rename(self, conv_id: str, title: str, owner=None):
+        with self._lock:
+            conv = self._get(conv_id, owner)
+            if conv is not None:
+                conv["title"] = title
+
+    def delete(self, conv_id: str, owner=None):
+        with self._lock:
+            if self._get(conv_id, owner) is None:
+                return
+            self._convs.pop(conv_id)
+            for nid in [n for n, v in self._nodes.items() if v[0] == conv_id]:
+                parent = self._nodes.pop(nid)[1]
+                self._children.pop(nid, None)
+                if nid in self._children.get(parent, ()):
+                    self._children[parent].remove(nid)
+
+    def append_message(self, conv_id: str, parent_id, role: str, content: str, model=None) -> int:
+        # Node baru sebagai anak `parent_id` sekaligus head percakapan.
+        with self._lock:
+            nid = self._next_id
+            self._next_id += 1
+            self._nodes[nid] = (conv_id, parent_id, role, content, model, _now_iso())
+            self._children.setdefault(parent_id, []).append(nid)
+            if conv_id in self._convs:
+                self._convs[conv_id]["head"] = nid
+            return nid
+
+    def set_head(self, conv_id: str, node_id):
+        with self._lock:
+            if conv_id in self._convs:
+                self._convs[conv_id]["head"] = node_id
+
+    def leaf_of(self, node_id):
+        # Ujung cabang terbaru di bawah `node_id` (ikuti anak yang paling akhir dibuat).
+        with self._lock:
+            while self._children.get(node_id):
+                node_id = self._children[node_id][-1]
+            return node_id
+
+    def siblings(self, node_ids):
+        # {node_id: [id saudara termasuk dirinya, urut dibuat]}
+        with self._lock:
+            return {nid: list(self._children.get(self._nodes[nid][1], [nid])) for nid in node_ids if nid in self._nodes}
+
+    def info(self, conv_id: str, owner=None):
+        with self._lock:
+            conv = self._get(conv_id, owner)
+            if conv is None:
+                return None
+            return {"id": conv["id"], "title": conv["title"], "created_at": conv["created_at"], "head_id": conv["head"]}
+
+    def iter_nodes(self, conv_id: str, batch: int = NODE_BATCH):
+        # (id, parent_id, role, content, created_at, model) urut id; parent selalu lebih dulu.
+        with self._lock:
+            rows = [(nid, v[1], v[2], v[3], v[5], v[4]) for nid, v in sorted(self._nodes.items()) if v[0] == conv_id]
+        yield from rows
+
+    def import_conversation(self, conv_id: str, title: str, created_at: str, owner: str = "") -> str:
+        # Id yang sudah dipakai diganti id baru agar impor tidak menimpa chat yang ada.
+        with self._lock:
+            if conv_id in self._convs:
+                conv_id = str(uuid.uuid4())
+            self._convs[conv_id] = {"id": conv_id, "title": title, "created_at": created_at, "head": None,
+                                    "owner": owner}
+            return conv_id
+
+    def import_nodes(self, conv_id: str, rows, id_map):
+        # rows: [(id lama, parent lama, role, content, created_at, model)]; `id_map` (id lama -> baru)
+        # diperbarui, dan parent harus sudah ada di dalamnya.
+        with self._lock:
+            for old, parent, role, content, created_at, model in rows:
+                nid = self._next_id
+                self._next_id += 1
+                parent = id_map[parent] if parent is not None else None
+                self._nodes[nid] = (conv_id, parent, role, content, model, created_at)
+                self._children.setdefault(parent, []).append(nid)
+                id_map[old] = nid
+
+    def search(self, query: str, limit: int = SEARCH_LIMIT, owner=None):
+        # Pencarian substring sederhana (tanpa indeks); satu hasil per percakapan.
+        needle = query.strip().lower()
+        hits, seen = [], set()
+        if not needle:
+            return hits
+        with self._lock:
+            for cid, _, role, content, _, _ in self._nodes.values():
+                if cid in seen or role == "system" or self._get(cid, owner) is None:
+                    continue
+                pos = content.lower().find(needle)
+                if pos >= 0:
+                    start = max(0, pos - SNIPPET_CONTEXT)
+                    snippet = content[start:pos] + "**" + content[pos:pos + len(needle)] + "**" \
+                        + content[pos + len(needle):pos + len(needle) + SNIPPET_CONTEXT]
+                    seen.add(cid)
+                    hits.append((cid, self._convs[cid]["title"], snippet))
+                    if len(hits) >= limit:
+                        break
+        return hits
+
+def _owner_where(owner, column: str = "owner"):
+    # Potongan WHERE + argumen; owner=None = tanpa filter.
+    return ("1", ()) if owner is None else (f"{column} = ?", (owner,))
+
+_MESSAGES_DDL = (
+    "CREATE TABLE IF NOT EXISTS messages ("
+    " id INTEGER PRIMARY KEY,"
+    " conv_id TEXT NOT NULL REFERENCES conversations(id) ON DELETE CASCADE,"
+    " parent_id INTEGER, role TEXT NOT NULL, content TEXT NOT NULL,"
+    " created_at TEXT NOT NULL, model TEXT)"
+)
+
+class SQLiteStore:
+    def __init__(self, path: str = "conversations.sqlite3"):
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA foreign_keys=ON")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS conversations ("
+            " id TEXT PRIMARY KEY, title TEXT NOT NULL, created_at TEXT NOT NULL, head_id INTEGER,"
+            " owner TEXT NOT NULL DEFAULT '')"
+        )
+        if "owner" not in [r[1] for r in self._db.execute("PRAGMA table_info(conversations)")]:
+            self._db.execute("ALTER TABLE conversations ADD COLUMN owner TEXT NOT NULL DEFAULT ''")
+        columns = [r[1] for r in self._db.execute("PRAGMA table_info(messages)")]
+        if "seq" in columns:
+            self._migrate_linear(columns)
+        self._db.execute(_MESSAGES_DDL)
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_conversations_created_at ON conversations(created_at)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_conversations_owner ON conversations(owner, created_at)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_messages_conv ON messages(conv_id)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_messages_parent ON messages(parent_id)")
+        self._init_fts()
+        self._db.commit()
+
+    def _migrate_linear(self, columns):
+        # Skema lama: messages(conv_id, seq, ...) berurutan. Tiap pesan jadi node dengan
+        # parent = pesan sebelumnya; head = pesan terakhir.
+        self._db.executescript("""
+            DROP TRIGGER IF EXISTS messages_fts_ai;
+            DROP TRIGGER IF EXISTS messages_fts_ad;
+            DROP TRIGGER IF EXISTS messages_fts_au;
+            DROP TABLE IF EXISTS messages_fts;
+            ALTER TABLE messages RENAME TO messages_linear;
+        """)
+        if "head_id" not in [r[1] for r in self._db.execute("PRAGMA table_info(conversations)")]:
+            self._db.execute("ALTER TABLE conversations ADD COLUMN head_id INTEGER")
+        self._db.execute(_MESSAGES_DDL)
+        model_col = "model" if "model" in columns else "NULL"
+        rows = self._db.execute(
+            f"SELECT conv_id, role, content, created_at, {model_col} FROM messages_linear ORDER BY conv_id, seq"
+        ).fetchall()
+        conv, parent = None, None
+        for conv_id, role, content, created_at, model in rows:
+            if conv_id != conv:
+                conv, parent = conv_id, None
+            parent = self._db.execute(
+                "INSERT INTO messages (conv_id, parent_id, role, content, created_at, model) VALUES (?, ?, ?, ?, ?, ?)",
+                (conv_id, parent, role, content, created_at, model),
+            ).lastrowid
+            self._db.execute("UPDATE conversations SET head_id = ? WHERE id = ?", (parent, conv_id))
+        self._db.execute("DROP TABLE messages_linear")
+        self._db.commit()
+
+    def _init_fts(self):
+        # Indeks full-text (FTS5, external content) atas pesan user/assistant. Trigger menjaga
+        # indeks tetap sinkron per INSERT/DELETE, termasuk cascade saat chat dihapus.
+        try:
+            exists = self._db.execute("SELECT 1 FROM sqlite_master WHERE name = 'messages_fts'").fetchone()
+            self._db.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5("
+                " content, content='messages', content_rowid='id', tokenize='unicode61 remove_diacritics 2')"
+            )
+        except sqlite3.OperationalError:
+            self.fts = False  # SQLite tanpa FTS5: search() memakai LIKE
+            return
+        self.fts = True
+        self._db.executescript("""
+            CREATE TRIGGER IF NOT EXISTS messages_fts_ai AFTER INSERT ON messages WHEN new.role != 'system' BEGIN
+                INSERT INTO messages_fts(rowid, content) VALUES (new.id, new.content);
+            END;
+            CREATE TRIGGER IF NOT EXISTS messages_fts_ad AFTER DELETE ON messages WHEN old.role != 'system' BEGIN
+                INSERT INTO messages_fts(messages_fts, rowid, content) VALUES ('delete', old.id, old.content);
+            END;
+            CREATE TRIGGER IF NOT EXISTS messages_fts_au AFTER UPDATE OF content ON messages WHEN old.role != 'system' BEGIN
+                INSERT INTO messages_fts(messages_fts, rowid, content) VALUES ('delete', old.id, old.content);
+                INSERT INTO messages_fts(rowid, content) VALUES (new.id, new.content);
+            END;
+        """)
+        if not exists:
+            # Database lama: indeks pesan yang sudah ada sekali saja.
+            self._db.execute("INSERT INTO messages_fts(rowid, content) SELECT id, content FROM messages WHERE role != 'system'")
+
+    def list_conversations(self, limit=None, owner=None):
+        # Dengan `limit`: hanya N chat terbaru, dibaca lewat indeks (owner, created_at) tanpa scan penuh.
+        where, args = _owner_where(owner)
+        with self._lock:
+            if limit is None:
+                return self._db.execute(
+                    f"SELECT id, title FROM conversations WHERE {where} ORDER BY created_at, rowid", args
+                ).fetchall()
+            rows = self._db.execute(
+                f"SELECT id, title FROM conversations WHERE {where} ORDER BY created_at DESC, rowid DESC LIMIT ?",
+                (*args, limit),
+            ).fetchall()
+            return rows[::-1]
+
+    def count(self, owner=None) -> int:
+        where, args = _owner_where(owner)
+        with self._lock:
+            return self._db.execute(f"SELECT COUNT(*) FROM conversations WHERE {where}", args).fetchone()[0]
+
+    def title(self, conv_id: str, owner=None):
+        where, args = _owner_where(owner)
+        with self._lock:
+            row = self._db.execute(f"SELECT title FROM conversations WHERE id = ? AND {where}", (conv_id, *args)).fetchone()
+            return row[0] if row else None
+
+    def create(self, title: str, system_prompt: str = DEFAULT_SYSTEM_PROMPT, owner: str = ""):
+        conv_id = str(uuid.uuid4())
+        with self._lock:
+            self._db.execute("INSERT INTO conversations (id, title, created_at, owner) VALUES (?, ?, ?, ?)",
+                             (conv_id, title, _now_iso(), owner))
+            self._db.commit()
+        if system_prompt:
+            self.append_message(conv_id, None, "system", system_prompt)
+        return conv_id
+
+    def load(self, conv_id: str, owner=None):
+        # Hanya cabang aktif: telusuri parent dari head (lookup primary key per node).
+        where, args = _owner_where(owner)
+        with self._lock:
+            row = self._db.execute(f"SELECT id, title, created_at, head_id FROM conversations WHERE id = ? AND {where}",
+                                   (conv_id, *args)).fetchone()
+            if row is None:
+                return None
+            msgs = self._db.execute(
+                "WITH RECURSIVE path(id, parent_id, role, content, model, depth) AS ("
+                " SELECT id, parent_id, role, content, model, 0 FROM messages WHERE id = ?"
+                " UNION ALL"
+                " SELECT m.id, m.parent_id, m.role, m.content, m.model, p.depth + 1"
+                " FROM messages m JOIN path p ON m.id = p.parent_id)"
+                " SELECT id, role, content, model FROM path ORDER BY depth DESC",
+                (row[3],),
+            ).fetchall()
+        return {
+            "id": row[0],
+            "title": row[1],
+            "created_at": row[2],
+            "messages": [new_message(r, c, m, i) for i, r, c, m in msgs],
+        }
+
+    def rename(self, conv_id: str, title: str, owner=None):
+        where, args = _owner_where(owner)
+        with self._lock:
+            self._db.execute(f"UPDATE conversations SET title = ? WHERE id = ? AND {where}", (title, conv_id, *args))
+            self._db.commit()
+
+    def delete(self, conv_id: str, owner=None):
+        where, args = _owner_where(owner)
+        with self._lock:
+            self._db.execute(f"DELETE FROM conversations WHERE id = ? AND {where}", (conv_id, *args))
+            self._db.commit()
+
+    def append_message(self, conv_id: str, parent_id, role: str, content: str, model=None) -> int:
+        # Satu INSERT + update head; riwayat sebelumnya tidak ditulis ulang.
+        with self._lock:
+            nid = self._db.execute(
+                "INSERT INTO messages (conv_id, parent_id, role, content, created_at, model) VALUES (?, ?, ?, ?, ?, ?)",
+                (conv_id, parent_id, role, content, _now_iso(), model),
+            ).lastrowid
+            self._db.execute("UPDATE conversations SET head_id = ? WHERE id = ?", (nid, conv_id))
+            self._db.commit()
+            return nid
+
+    def set_head(self, conv_id: str, node_id):
+        with self._lock:
+            self._db.execute("UPDATE conversations SET head_id = ? WHERE id = ?", (node_id, conv_id))
+            self._db.commit()
+
+    def leaf_of(self, node_id):
+        # Ujung cabang terbaru di bawah `node_id` (ikuti anak yang paling akhir dibuat).
+        with self._lock:
+            while True:
+                row = self._db.execute("SELECT MAX(id) FROM messages WHERE parent_id = ?", (node_id,)).fetchone()
+                if row[0] is None:
+                    return node_id
+                node_id = row[0]
+
+    def siblings(self, node_ids):
+        # {node_id: [id saudara termasuk dirinya, urut dibuat]} untuk node di cabang aktif.
+        node_ids = list(node_ids)
+        if not node_ids:
+            return {}
+        marks = ",".join("?" * len(node_ids))
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT n.id, s.id FROM messages n JOIN messages s"
+                f" ON s.conv_id = n.conv_id AND s.parent_id IS n.parent_id"
+                f" WHERE n.id IN ({marks}) ORDER BY n.id, s.id",
+                node_ids,
+            ).fetchall()
+        out = {}
+        for nid, sid in rows:
+            out.setdefault(nid, []).append(sid)
+        return out
+
+    def info(self, conv_id: str, owner=None):
+        where, args = _owner_where(owner)
+        with self._lock:
+            row = self._db.execute(f"SELECT id, title, created_at, head_id FROM conversations WHERE id = ? AND {where}",
+                                   (conv_id, *args)).fetchone()
+        return dict(zip(("id", "title", "created_at", "head_id"), row)) if row else None
+
+    def iter_nodes(self, conv_id: str, batch: int = NODE_BATCH):
+        # (id, parent_id, role, content, created_at, model) urut id; parent selalu lebih dulu.
+        # Dibaca per halaman (keyset) sehingga lock tidak ditahan selama generator berjalan.
+        last = 0
+        while True:
+            with self._lock:
+                rows = self._db.execute(
+                    "SELECT id, parent_id, role, content, created_at, model FROM messages"
+                    " WHERE conv_id = ? AND id > ? ORDER BY id LIMIT ?",
+                    (conv_id, last, batch),
+                ).fetchall()
+            if not rows:
+                return
+            yield from rows
+            last = rows[-1][0]
+
+    def import_conversation(self, conv_id: str, title: str, created_at: str, owner: str = "") -> str:
+        # Id yang sudah dipakai diganti id baru agar impor tidak menimpa chat yang ada.
+        with self._lock:
+            if self._db.execute("SELECT 1 FROM conversations WHERE id = ?", (conv_id,)).fetchone():
+                conv_id = str(uuid.uuid4())
+            self._db.execute("INSERT INTO conversations (id, title, created_at, owner) VALUES (?, ?, ?, ?)",
+                             (conv_id, title, created_at, owner))
+            self._db.commit()
+            return conv_id
+
+    def import_nodes(self, conv_id: str, rows, id_map):
+        # rows: [(id lama, parent lama, role, content, created_at, model)]; `id_map` (id lama -> baru)
+        # diperbarui, dan parent harus sudah ada di dalamnya. Satu executemany per batch.
+        with self._lock:
+            base = self._db.execute("SELECT COALESCE(MAX(id), 0) FROM messages").fetchone()[0]
+            values = []
+            for k, (old, parent, role, content, created_at, model) in enumerate(rows, 1):
+                values.append((base + k, conv_id, id_map[parent] if parent is not None else None,
+                               role, content, created_at, model))
+                id_map[old] = base + k
+            self._db.executemany(
+                "INSERT INTO messages (id, conv_id, parent_id, role, content, created_at, model) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                values,
+            )
+            self._db.commit()
+
+    def search(self, query: str, limit: int = SEARCH_LIMIT, owner=None):
+        # [(conv_id, judul, snippet)] diurutkan bm25; satu hasil (pesan terbaik) per percakapan.
+        # Hanya percakapan milik `owner` (filter di join, sebelum LIMIT).
+        if not query.strip():
+            return []
+        where, args = _owner_where(owner, "c.owner")
+        with self._lock:
+            if self.fts:
+                rows = self._db.execute(
+                    "SELECT m.conv_id, c.title, snippet(messages_fts, 0, '**', '**', '…', ?) AS snip,"
+                    " bm25(messages_fts) AS score"
+                    " FROM messages_fts JOIN messages m ON m.id = messages_fts.rowid"
+                    " JOIN conversations c ON c.id = m.conv_id"
+                    f" WHERE messages_fts MATCH ? AND {where} ORDER BY score LIMIT ?",
+                    (SNIPPET_TOKENS, fts_query(query), *args, limit * 5),
+                ).fetchall()
+            else:
+                rows = self._db.execute(
+                    "SELECT m.conv_id, c.title, substr(m.content, 1, 120), 0 FROM messages m"
+                    " JOIN conversations c ON c.id = m.conv_id"
+                    f" WHERE m.role != 'system' AND m.content LIKE ? AND {where} ORDER BY c.created_at DESC LIMIT ?",
+                    (f"%{query.strip()}%", *args, limit * 5),
+                ).fetchall()
+        hits, seen = [], set()
+        for cid, title, snip, _ in rows:
+            if cid not in seen:
+                seen.add(cid)
+                hits.append((cid, title, snip))
+        return hits[:limit]
+
+def make_store(backend: str = "sqlite", path: str = "conversations.sqlite3"):
+    if backend == "sqlite":
+        return SQLiteStore(path)
+    if backend == "memory":
+        return MemoryStore()
+    raise ValueError(f"Backend penyimpanan percakapan tidak dikenal: {backend}")
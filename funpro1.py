@@ -1,17 +1,22 @@
 import streamlit as st
-import pandas as pd
 import random
-from datetime import datetime
-from zoneinfo import ZoneInfo   # Python 3.9+ sudah ada built-in
+from rerun_profiler import start_rerun, render_panel
+from quiz_engine import QuizEngine, QUESTIONS, CATEGORIES, TIPS, QUOTES, BADGE_SOLO, render_distribution_panel
+from quiz_bulk import render_bulk_panel
+from quiz_history import make_history_store, respondent_id, render_history_panel
 
 # ==============================
 # Konfigurasi
 # ==============================
 st.set_page_config(page_title="Mini Quiz Karier v17", page_icon="🎯", layout="centered")
 
+# Profil per bagian script: APP_PROFILE=1 atau ?profile=1 (lihat rerun_profiler).
+_trace = start_rerun("funpro1")
+
 # ------------------------------
 # CSS
 # ------------------------------
+_trace.section("styles")
 st.markdown("""
 <style>
 .block-container { padding-top: 1.5rem; padding-bottom: 2.5rem; }
@@ -30,6 +35,7 @@ st.markdown("""
 # ------------------------------
 # Header
 # ------------------------------
+_trace.section("header")
 st.markdown("""
 <div class="banner">
   <h1>🎉 Quiz ala horoscope tapi versi karier 🚀</h1>
@@ -38,90 +44,32 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # ------------------------------
-# Pertanyaan berbobot
-# ------------------------------
-QUESTIONS = [
-    {
-        "q": "Aktivitas yang paling bikin kamu puas:",
-        "options": {
-            "Menyelesaikan masalah logika/algoritma": {"Programmer": 5, "Data Scientist": 4, "Designer": 2},
-            "Membuat desain visual": {"Designer": 5, "Programmer": 2, "Data Scientist": 2},
-            "Menginterpretasi data/statistik": {"Data Scientist": 5, "Programmer": 4, "Designer": 2},
-            "Berkoordinasi & memimpin tim": {"Programmer": 3, "Designer": 3, "Data Scientist": 3},
-        },
-    },
-    {
-        "q": "Tools yang paling ingin kamu kuasai:",
-        "options": {
-            "VS Code, GitHub": {"Programmer": 5, "Data Scientist": 3, "Designer": 1},
-            "Figma, Adobe, Canva": {"Designer": 5, "Programmer": 2, "Data Scientist": 1},
-            "Python, R, Pandas": {"Data Scientist": 5, "Programmer": 4, "Designer": 1},
-            "Trello, Miro, Notion": {"Programmer": 3, "Designer": 3, "Data Scientist": 3},
-        },
-    },
-    {
-        "q": "Cara menghadapi masalah kompleks:",
-        "options": {
-            "Debugging step-by-step": {"Programmer": 5, "Data Scientist": 3, "Designer": 1},
-            "Riset data & uji hipotesis": {"Data Scientist": 5, "Programmer": 3, "Designer": 1},
-            "User testing & iterasi desain": {"Designer": 5, "Programmer": 2, "Data Scientist": 1},
-            "Brainstorm bareng tim": {"Programmer": 3, "Designer": 3, "Data Scientist": 3},
-        },
-    },
-    {
-        "q": "Hasil kerja yang bikin kamu bangga:",
-        "options": {
-            "Aplikasi berjalan stabil": {"Programmer": 5, "Designer": 2, "Data Scientist": 2},
-            "UI/UX cantik & ramah pengguna": {"Designer": 5, "Programmer": 2, "Data Scientist": 2},
-            "Model statistik akurat": {"Data Scientist": 5, "Programmer": 3, "Designer": 2},
-            "Dokumentasi jelas & bisa dipahami": {"Programmer": 3, "Designer": 3, "Data Scientist": 3},
-        },
-    },
-    {
-        "q": "Jika diberi 1 minggu belajar sesuatu:",
-        "options": {
-            "Algoritma & struktur data": {"Programmer": 5, "Data Scientist": 3, "Designer": 1},
-            "Prinsip warna & tipografi": {"Designer": 5, "Programmer": 2, "Data Scientist": 1},
-            "Machine learning dasar": {"Data Scientist": 5, "Programmer": 3, "Designer": 1},
-            "Manajemen proyek & komunikasi": {"Programmer": 3, "Designer": 3, "Data Scientist": 3},
-        },
-    },
-]
-CATEGORIES = ["Programmer", "Designer", "Data Scientist"]
-
-TIPS = {
-    "Programmer": "💡 Coba belajar Git, Python, atau ikutan competitive programming.",
-    "Designer": "💡 Explore Figma, dan baca buku 'Don't Make Me Think'.",
-    "Data Scientist": "💡 Mulai dari Pandas, Kaggle dataset, dan dasar Machine Learning.",
-}
-
-QUOTES = {
-    "Programmer": [
-        "“Talk is cheap. Show me the code.” 💻",
-        "“Programmer: a machine that turns coffee into code.” ☕💻",
-        "“Code never lies, comments sometimes do.” 🔍",
-    ],
-    "Designer": [
-        "“Design is intelligence made visible.” 🎨",
-        "“Good design is obvious. Great design is transparent.” ✨",
-        "“People ignore design that ignores people.” 👥",
-    ],
-    "Data Scientist": [
-        "“Without data, you’re just another person with an opinion.” 📊",
-        "“Data is the new oil.” ⛽📊",
-        "“The goal is to turn data into information, and information into insight.” 🔎",
-    ],
-}
+# Pertanyaan berbobot (bank soal & engine skor bersama, lihat quiz_engine.py)
+# ------------------------------
+_trace.section("engine")
+@st.cache_resource
+def get_quiz_engine():
+    # Dikompilasi sekali per proses menjadi tensor bobot soal × opsi × kategori.
+    return QuizEngine(QUESTIONS, CATEGORIES)
+
+engine = get_quiz_engine()
 
 # ------------------------------
 # State
 # ------------------------------
-if "history" not in st.session_state:
-    st.session_state.history = []
+_trace.section("state")
+@st.cache_resource
+def get_history_store():
+    # Riwayat permanen (append-only) dibagi semua sesi; lihat quiz_history.py.
+    return make_history_store(CATEGORIES)
+
+history = get_history_store()
+respondent = respondent_id()
 
 # ------------------------------
 # Form
 # ------------------------------
+_trace.section("form")
 with st.form("quiz", clear_on_submit=False):
     answered = 0
     for idx, item in enumerate(QUESTIONS):
@@ -143,31 +91,23 @@ with st.form("quiz", clear_on_submit=False):
 def all_answered():
     return all(st.session_state.get(f"q{i}") is not None for i in range(len(QUESTIONS)))
 
-def calc_scores():
-    tally = {c: 0 for c in CATEGORIES}
-    for i, item in enumerate(QUESTIONS):
-        ans = st.session_state.get(f"q{i}")
-        if ans:
-            for cat, pts in item["options"][ans].items():
-                tally[cat] += pts
-    return pd.DataFrame([tally])
+def current_answers():
+    return [st.session_state.get(f"q{i}") for i in range(len(QUESTIONS))]
 
-def join_atau(names):
-    if len(names) == 1: return names[0]
-    if len(names) == 2: return f"{names[0]} atau {names[1]}"
-    return ", ".join(names[:-1]) + f" atau {names[-1]}"
+def calc_scores():
+    return engine.result(current_answers())
 
 # ------------------------------
 # Hasil
 # ------------------------------
+_trace.section("result")
 if submitted:
     if not all_answered():
         st.warning("Masih ada pertanyaan yang belum dijawab.")
     else:
-        df = calc_scores()
-        max_score = df.iloc[0].max()
-        top_cats = [c for c in CATEGORIES if df.iloc[0][c] == max_score]
-        rekom = join_atau(top_cats)
+        res = calc_scores()
+        top_cats = res["top"]
+        rekom = res["label"]
 
         st.markdown('<div class="card">', unsafe_allow_html=True)
         st.markdown('<div class="result-title">✅ Rekomendasi Karier Kamu</div>', unsafe_allow_html=True)
@@ -181,12 +121,7 @@ if submitted:
             if len(top_cats) == 2:
                 funny_badge = "🤹 Wah, kamu hibrida! Cocok di dua dunia sekaligus."
             else:
-                funny_badge_map = {
-                    "Programmer": "Siap siap ngopi jam 2 pagi sambil debug bug misterius 😆",
-                    "Designer": "Debat warna #FFFFFF vs #FAFAFA itu serius banget loh 🤯",
-                    "Data Scientist": "Anggap dataset sebagai sahabat sejati 🤭",
-                }
-                funny_badge = funny_badge_map[top_cats[0]]
+                funny_badge = BADGE_SOLO[top_cats[0]]
             st.markdown(f"<span class='badge'>{funny_badge}</span>", unsafe_allow_html=True)
             for cat in top_cats:
                 st.info(TIPS[cat])
@@ -194,27 +129,30 @@ if submitted:
 
         st.markdown("</div>", unsafe_allow_html=True)
 
-        # Simpan riwayat dengan Asia/Jakarta & format 24 jam
-        now = datetime.now(ZoneInfo("Asia/Jakarta"))
-        row = {
-            "tanggal": now.strftime("%d/%m/%Y"),
-            "jam": now.strftime("%H:%M:%S"),   # 24 jam
-            **df.iloc[0].to_dict(),
-            "hasil": rekom,
-        }
-        st.session_state.history.append(row)
+        # Simpan riwayat (waktu disimpan epoch, ditampilkan Asia/Jakarta 24 jam)
+        history.append(respondent, "funpro1", res["tally"], rekom,
+                       answers="".join(map(str, engine.encode(current_answers()))))
 
 # ------------------------------
 # Riwayat
 # ------------------------------
-if st.session_state.history:
-    with st.expander("📒 Riwayat Kuis (klik untuk lihat/sembunyikan)", expanded=False):
-        hist_df = pd.DataFrame(st.session_state.history)
-        st.dataframe(hist_df, use_container_width=True)
-        csv_bytes = hist_df.to_csv(index=False, sep=';').encode('utf-8-sig')
-        st.download_button("💾 Unduh Riwayat (.csv)", data=csv_bytes, file_name="riwayat_quiz_v17.csv", mime="text/csv")
-else:
-    st.caption("Belum ada riwayat kuis.")
+_trace.section("history")
+render_history_panel(history, engine, respondent)
+
+# ------------------------------
+# Sebaran hasil
+# ------------------------------
+_trace.section("distribution")
+render_distribution_panel(engine)
+
+# ------------------------------
+# Skor massal
+# ------------------------------
+_trace.section("bulk")
+render_bulk_panel(engine)
 
 st.markdown("---")
 st.caption("Made with ❤️ — Fawwaz")
+
+_trace.finish()
+render_panel(_trace)
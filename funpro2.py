@@ -1,14 +1,19 @@
 #Fun Project 1st with Fawwaz!
 
 import streamlit as st
-import pandas as pd
 import random
-from datetime import datetime
-from zoneinfo import ZoneInfo
+from rerun_profiler import start_rerun, render_panel
+from quiz_engine import QuizEngine, QUESTIONS, CATEGORIES, TIPS, QUOTES, BADGE_SOLO, render_distribution_panel
+from quiz_bulk import render_bulk_panel
+from quiz_history import make_history_store, respondent_id, render_history_panel
 
 # ========== CONFIG ==========
 st.set_page_config(page_title="Quiz Sederhana!", page_icon="🎯", layout="centered")
 
+# Profil per bagian script: APP_PROFILE=1 atau ?profile=1 (lihat rerun_profiler).
+_trace = start_rerun("funpro2")
+_trace.section("styles")
+
 CSS = """
 <style>
 .block-container{padding-top:1.5rem;padding-bottom:2.5rem}
@@ -31,101 +36,35 @@ st.markdown(
 )
 
 # ========== DATA ==========
-CATS = ["Programmer", "Designer", "Data Scientist"]
-
-QUESTIONS = [
-    {"q": "Aktivitas yang paling bikin kamu puas:",
-     "options": {
-         "Menyelesaikan masalah logika/algoritma": {"Programmer": 5, "Data Scientist": 4, "Designer": 2},
-         "Membuat desain visual": {"Designer": 5, "Programmer": 2, "Data Scientist": 2},
-         "Menginterpretasi data/statistik": {"Data Scientist": 5, "Programmer": 4, "Designer": 2},
-         "Berkoordinasi & memimpin tim": {"Programmer": 3, "Designer": 3, "Data Scientist": 3},
-     }},
-    {"q": "Tools yang paling ingin kamu kuasai:",
-     "options": {
-         "VS Code, GitHub": {"Programmer": 5, "Data Scientist": 3, "Designer": 1},
-         "Figma, Adobe, Canva": {"Designer": 5, "Programmer": 2, "Data Scientist": 1},
-         "Python, R, Pandas": {"Data Scientist": 5, "Programmer": 4, "Designer": 1},
-         "Trello, Miro, Notion": {"Programmer": 3, "Designer": 3, "Data Scientist": 3},
-     }},
-    {"q": "Cara menghadapi masalah kompleks:",
-     "options": {
-         "Debugging step-by-step": {"Programmer": 5, "Data Scientist": 3, "Designer": 1},
-         "Riset data & uji hipotesis": {"Data Scientist": 5, "Programmer": 3, "Designer": 1},
-         "User testing & iterasi desain": {"Designer": 5, "Programmer": 2, "Data Scientist": 1},
-         "Brainstorm bareng tim": {"Programmer": 3, "Designer": 3, "Data Scientist": 3},
-     }},
-    {"q": "Hasil kerja yang bikin kamu bangga:",
-     "options": {
-         "Aplikasi berjalan stabil": {"Programmer": 5, "Designer": 2, "Data Scientist": 2},
-         "UI/UX cantik & ramah pengguna": {"Designer": 5, "Programmer": 2, "Data Scientist": 2},
-         "Model statistik akurat": {"Data Scientist": 5, "Programmer": 3, "Designer": 2},
-         "Dokumentasi jelas & bisa dipahami": {"Programmer": 3, "Designer": 3, "Data Scientist": 3},
-     }},
-    {"q": "Jika diberi 1 minggu belajar sesuatu:",
-     "options": {
-         "Algoritma & struktur data": {"Programmer": 5, "Data Scientist": 3, "Designer": 1},
-         "Prinsip warna & tipografi": {"Designer": 5, "Programmer": 2, "Data Scientist": 1},
-         "Machine learning dasar": {"Data Scientist": 5, "Programmer": 3, "Designer": 1},
-         "Manajemen proyek & komunikasi": {"Programmer": 3, "Designer": 3, "Data Scientist": 3},
-     }},
-]
-
-TIPS = {
-    "Programmer": "💡 Coba belajar Git, Python, atau ikutan competitive programming.",
-    "Designer": "💡 Explore Figma, dan baca buku 'Don't Make Me Think'.",
-    "Data Scientist": "💡 Mulai dari Pandas, Kaggle dataset, dan dasar Machine Learning.",
-}
-
-QUOTES = {
-    "Programmer": [
-        "“Talk is cheap. Show me the code.” 💻",
-        "“Programmer: a machine that turns coffee into code.” ☕💻",
-        "“Code never lies, comments sometimes do.” 🔍",
-    ],
-    "Designer": [
-        "“Design is intelligence made visible.” 🎨",
-        "“Good design is obvious. Great design is transparent.” ✨",
-        "“People ignore design that ignores people.” 👥",
-    ],
-    "Data Scientist": [
-        "“Without data, you’re just another person with an opinion.” 📊",
-        "“Data is the new oil.” ⛽📊",
-        "“The goal is to turn data into information, and information into insight.” 🔎",
-    ],
-}
-
-BADGE_SOLO = {
-    "Programmer": "Siap siap ngopi jam 2 pagi sambil debug bug misterius 😆",
-    "Designer": "Debat warna #FFFFFF vs #FAFAFA itu serius banget loh 🤯",
-    "Data Scientist": "Anggap dataset sebagai sahabat sejati 🤭",
-}
+# Bank soal, teks hasil, dan engine skor dibagi dengan funpro1.py (quiz_engine.py).
+_trace.section("engine")
+@st.cache_resource
+def get_quiz_engine():
+    return QuizEngine(QUESTIONS, CATEGORIES)
+
+engine = get_quiz_engine()
 
 # ========== STATE ==========
-st.session_state.setdefault("history", [])
+_trace.section("state")
+@st.cache_resource
+def get_history_store():
+    return make_history_store(CATEGORIES)
+
+history = get_history_store()
+respondent = respondent_id()
 
 # ========== UTIL ==========
 def all_answered() -> bool:
     return all(st.session_state.get(f"q{i}") is not None for i in range(len(QUESTIONS)))
 
-def calc_scores() -> pd.DataFrame:
-    tally = {c: 0 for c in CATS}
-    for i, item in enumerate(QUESTIONS):
-        ans = st.session_state.get(f"q{i}")
-        if ans:
-            for cat, pts in item["options"][ans].items():
-                tally[cat] += pts
-    return pd.DataFrame([tally])
-
-def join_atau(names):
-    return names[0] if len(names) == 1 else (f"{names[0]} atau {names[1]}" if len(names) == 2
-                                             else ", ".join(names[:-1]) + f" atau {names[-1]}")
+def current_answers() -> list:
+    return [st.session_state.get(f"q{i}") for i in range(len(QUESTIONS))]
 
-def now_jakarta():
-    n = datetime.now(ZoneInfo("Asia/Jakarta"))
-    return n.strftime("%d/%m/%Y"), n.strftime("%H:%M:%S")
+def calc_scores() -> dict:
+    return engine.result(current_answers())
 
 # ========== FORM ==========
+_trace.section("form")
 with st.form("quiz", clear_on_submit=False):
     answered = 0
     for i, item in enumerate(QUESTIONS):
@@ -138,14 +77,13 @@ with st.form("quiz", clear_on_submit=False):
     submitted = st.form_submit_button("🔎 Lihat Hasil")
 
 # ========== RESULT ==========
+_trace.section("result")
 if submitted:
     if not all_answered():
         st.warning("Masih ada pertanyaan yang belum dijawab.")
     else:
-        df = calc_scores()
-        max_score = df.iloc[0].max()
-        top = [c for c in CATS if df.iloc[0][c] == max_score]
-        rekom = join_atau(top)
+        res = calc_scores()
+        top, rekom = res["top"], res["label"]
 
         st.markdown('<div class="card">', unsafe_allow_html=True)
         st.markdown('<div class="result-title">✅ Rekomendasi Karier Kamu</div>', unsafe_allow_html=True)
@@ -164,16 +102,24 @@ if submitted:
 
         st.markdown("</div>", unsafe_allow_html=True)
 
-        # history (WIB 24 jam)
-        tgl, jam = now_jakarta()
-        st.session_state.history.append({"tanggal": tgl, "jam": jam, **df.iloc[0].to_dict(), "hasil": rekom})
+        # history (permanen, ditampilkan WIB 24 jam)
+        history.append(respondent, "funpro2", res["tally"], rekom,
+                       answers="".join(map(str, engine.encode(current_answers()))))
 
 # ========== HISTORY ==========
-if st.session_state.history:
-    with st.expander("📒 Riwayat Kuis (klik untuk lihat/sembunyikan)", expanded=False):
-        hist_df = pd.DataFrame(st.session_state.history)
-        st.dataframe(hist_df, use_container_width=True)
-        csv = hist_df.to_csv(index=False, sep=';').encode('utf-8-sig')
+_trace.section("history")
+render_history_panel(history, engine, respondent)
+
+# ========== DISTRIBUTION ==========
+_trace.section("distribution")
+render_distribution_panel(engine)
+
+# ========== BULK ==========
+_trace.section("bulk")
+render_bulk_panel(engine)
 
 st.markdown("---")
 st.caption("Made with ❤️ — Fawwaz")
+
+_trace.finish()
+render_panel(_trace)
@@ -0,0 +1,228 @@
+import time
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from response_cache import cache_key, should_cache
+from admission import bucket_key
+from semantic_cache import SemanticCache, prompt_of
+
+# =========================
+# 🧵 BACKGROUND GENERATION ENGINE
+# =========================
+# Job generasi dijalankan di worker pool bersama (bukan di thread script Streamlit).
+# Jumlah worker = batas permintaan upstream yang berjalan bersamaan untuk seluruh proses;
+# job lain menunggu di antrean executor.
+MAX_INFLIGHT = 8
+# Job selesai yang tidak pernah diambil (mis. tab ditutup) dibuang setelah sekian detik.
+FINISHED_JOB_TTL = 300.0
+
+class GenerationJob:
+    def __init__(self, conv_id, kind: str, model_name: str):
+        self.id = str(uuid.uuid4())
+        self.conv_id = conv_id
+        self.kind = kind
+        self.model_name = model_name
+        # Model yang benar-benar menjawab (bisa model cadangan bila routing aktif).
+        self.answered_by = model_name
+        self.route = False
+        self.error = None
+        self.cache_hit = False
+        # Kemiripan cosine bila dijawab dari cache semantik (None = bukan hit semantik).
+        self.semantic_hit = None
+        self.usage = None
+        self.created_at = time.monotonic()
+        self.started_at = None
+        self.first_token_at = None
+        self.finished_at = None
+        self._chunks = []
+        self._lock = threading.Lock()
+        self._cancel = threading.Event()
+        self._done = threading.Event()
+
+    @property
+    def text(self) -> str:
+        with self._lock:
+            return "".join(self._chunks)
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def latency(self):
+        # Waktu dari submit sampai selesai (termasuk antre di worker pool), detik.
+        if self.finished_at is None:
+            return None
+        return self.finished_at - self.created_at
+
+    def wait(self, timeout=None) -> bool:
+        return self._done.wait(timeout)
+
+    def reply(self) -> str:
+        # Teks final untuk disimpan ke percakapan (termasuk pesan error bila gagal).
+        text = self.text
+        if self.error is None:
+            return text
+        err = f"Maaf, terjadi kesalahan: {self.error}"
+        return f"{text}\n\n{err}" if text else err
+
+    def _push(self, delta: str):
+        with self._lock:
+            if self.first_token_at is None:
+                self.first_token_at = time.monotonic()
+            self._chunks.append(delta)
+
+    def _finish(self, error=None):
+        self.error = error
+        self.finished_at = time.monotonic()
+        self._done.set()
+
+    def timings(self):
+        # Fase job (detik): antre di worker pool, sampai token pertama, total generasi.
+        out = {}
+        if self.started_at is not None:
+            out["queue"] = self.started_at - self.created_at
+            if self.first_token_at is not None:
+                out["first_token"] = self.first_token_at - self.started_at
+            if self.finished_at is not None:
+                out["generation"] = self.finished_at - self.started_at
+        return out
+
+class GenerationEngine:
+    def __init__(self, client, max_workers: int = MAX_INFLIGHT, cache=None, metrics=None, admission=None,
+                 router=None, semantic=None):
+        self.client = client
+        self.cache = cache
+        # Opsional: semantic_cache.SemanticCache untuk pertanyaan mirip (job dengan semantic=True).
+        self.semantic = semantic
+        self.metrics = metrics
+        # Opsional: admission.AdmissionController; job menunggu token rate limit sebelum masuk pool.
+        self.admission = admission
+        # Opsional: router.ModelRouter untuk hedged request ke model cadangan (job dengan route=True).
+        self.router = router
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="gen")
+        self.jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, messages_payload, model_name: str, api_key_str: str, max_tokens: int, temperature: float,
+               stream: bool = True, conv_id=None, kind: str = "reply", cache_mode: str = "auto",
+               route: bool = False, semantic: bool = False) -> GenerationJob:
+        job = GenerationJob(conv_id, kind, model_name)
+        job.route = route and self.router is not None
+        # Salin list agar perubahan percakapan di thread script tidak terlihat oleh worker.
+        args = (list(messages_payload), model_name, api_key_str, max_tokens, temperature)
+        with self._lock:
+            self._prune()
+            self.jobs[job.id] = job
+        key = None
+        if self.cache is not None and should_cache(temperature, cache_mode):
+            key = cache_key(messages_payload, model_name, max_tokens, temperature)
+            cached = self.cache.get(key)
+            if cached is not None:
+                # Cache hit dijawab langsung tanpa mengantre di worker pool.
+                job.cache_hit = True
+                job._push(cached)
+                job._finish()
+                if self.metrics is not None:
+                    self.metrics.inc("cache_hits", model_name)
+                return job
+        sem = None
+        if semantic and self.semantic is not None:
+            prompt = prompt_of(messages_payload)
+            if prompt is not None:
+                sem = (SemanticCache.namespace(prompt[0], model_name, max_tokens, temperature), prompt[1])
+                found = self.semantic.lookup(*sem)
+                if found is not None:
+                    job.cache_hit = True
+                    job.semantic_hit = found[1]
+                    job._push(found[0])
+                    job._finish()
+                    if self.metrics is not None:
+                        self.metrics.inc("semantic_hits", model_name)
+                        self.metrics.inc("semantic_saved_seconds", model_name, found[2])
+                    return job
+        if self.admission is not None:
+            self.admission.submit(bucket_key(api_key_str, model_name), model_name, job,
+                                  lambda: self.executor.submit(self._run, job, args, stream, key, sem))
+        else:
+            self.executor.submit(self._run, job, args, stream, key, sem)
+        return job
+
+    def queue_position(self, job) -> int:
+        # Posisi job di antrean rate limit (0 = sudah diproses / tanpa admission control).
+        if self.admission is None or job.done or job.started_at is not None:
+            return 0
+        return self.admission.position(job)
+
+    def get(self, job_id):
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def pop(self, job_id):
+        with self._lock:
+            return self.jobs.pop(job_id, None)
+
+    def cancel(self, job_id):
+        job = self.pop(job_id)
+        if job is not None:
+            job.cancel()
+        return job
+
+    def _prune(self):
+        now = time.monotonic()
+        stale = [jid for jid, j in self.jobs.items() if j.done and now - j.finished_at > FINISHED_JOB_TTL]
+        for jid in stale:
+            del self.jobs[jid]
+
+    def _run(self, job: GenerationJob, args, stream: bool, key=None, sem=None):
+        try:
+            self._generate(job, args, stream, key, sem)
+        finally:
+            if self.metrics is not None and not job.cancelled:
+                for phase, seconds in job.timings().items():
+                    self.metrics.observe(phase, seconds, job.model_name)
+
+    def _generate(self, job: GenerationJob, args, stream: bool, key=None, sem=None):
+        job.started_at = time.monotonic()
+        if job.cancelled:
+            job._finish()
+            return
+        meta = {}
+        try:
+            if job.route:
+                admit = None
+                if self.admission is not None:
+                    admit = lambda m: self.admission.try_acquire(bucket_key(args[2], m), m)
+                job.answered_by, meta = self.router.run(job, args, stream, self.executor, admit)
+            elif stream:
+                gen = self.client.stream(*args, meta=meta)
+                try:
+                    for delta in gen:
+                        if job.cancelled:
+                            break
+                        job._push(delta)
+                finally:
+                    # Menutup generator juga menutup koneksi streaming yang sedang berjalan.
+                    gen.close()
+            else:
+                job._push(self.client.chat(*args, meta=meta))
+        except Exception as e:
+            job.usage = meta.get("usage")
+            job._finish(e)
+            return
+        job.usage = meta.get("usage")
+        # Jawaban model cadangan tidak disimpan di bawah key model utama.
+        if not job.cancelled and job.answered_by == job.model_name:
+            if key is not None:
+                self.cache.set(key, job.text)
+            if sem is not None:
+                self.semantic.add(*sem, job.text, time.monotonic() - job.created_at)
+        job._finish()
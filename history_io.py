@@ -0,0 +1,184 @@
+import io
+import gzip
+import json
+import zlib
+import argparse
+
+from conversation_store import NODE_BATCH
+from chat_core import make_conversation_store
+
+# =========================
+# 📦 EXPORT / IMPORT RIWAYAT (NDJSON + gzip, streaming)
+# =========================
+# Satu baris JSON per pesan (node), dikelompokkan per percakapan dan urut id sehingga
+# parent selalu muncul sebelum anaknya:
+#   {"v": 1, "conv": ..., "title": ..., "conv_created_at": ..., "id": 12, "parent": 11,
+#    "role": "user", "content": ..., "model": null, "created_at": ..., "head": false}
+# Ekspor berupa generator potongan bytes gzip; impor membaca file baris per baris dan
+# menulis per batch, jadi keduanya tidak pernah memuat seluruh riwayat di memori.
+FORMAT_VERSION = 1
+CHUNK_BYTES = 64 * 1024
+ROLES = ("system", "user", "assistant")
+
+_FIELDS = {
+    "conv": str, "title": str, "conv_created_at": str, "id": int, "role": str, "content": str,
+    "created_at": str,
+}
+
+def export_records(store, conv_ids=None, owner=None):
+    # Semua percakapan milik `owner` (urut dibuat) bila `conv_ids` None; id milik owner lain
+    # dilewati. owner=None = semua owner (CLI).
+    if conv_ids is None:
+        conv_ids = [cid for cid, _ in store.list_conversations(owner=owner)]
+    for cid in conv_ids:
+        info = store.info(cid, owner=owner)
+        if info is None:
+            continue
+        for nid, parent, role, content, created_at, model in store.iter_nodes(cid):
+            yield {
+                "v": FORMAT_VERSION, "conv": cid, "title": info["title"], "conv_created_at": info["created_at"],
+                "id": nid, "parent": parent, "role": role, "content": content, "model": model,
+                "created_at": created_at, "head": nid == info["head_id"],
+            }
+
+def export_ndjson_gz(store, conv_ids=None, level: int = 6, owner=None):
+    # Generator potongan bytes (format gzip, ~CHUNK_BYTES sebelum kompresi per potongan).
+    comp = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    buf, size = [], 0
+    for rec in export_records(store, conv_ids, owner):
+        line = (json.dumps(rec, ensure_ascii=False) + "\n").encode("utf-8")
+        buf.append(line)
+        size += len(line)
+        if size >= CHUNK_BYTES:
+            out = comp.compress(b"".join(buf))
+            buf, size = [], 0
+            if out:
+                yield out
+    out = comp.compress(b"".join(buf)) + comp.flush()
+    if out:
+        yield out
+
+def export_bytes(store, conv_ids=None, owner=None) -> bytes:
+    # Untuk st.download_button: media manager Streamlit tetap menyimpan seluruh file di
+    # memori, jadi cukup gabungkan potongan gzip (hanya versi terkompresi yang utuh).
+    return b"".join(export_ndjson_gz(store, conv_ids, owner=owner))
+
+def _validate(rec, lineno: int):
+    if not isinstance(rec, dict):
+        raise ValueError(f"Baris {lineno}: bukan objek JSON.")
+    if rec.get("v", FORMAT_VERSION) != FORMAT_VERSION:
+        raise ValueError(f"Baris {lineno}: versi format {rec.get('v')} tidak didukung.")
+    for key, typ in _FIELDS.items():
+        if not isinstance(rec.get(key), typ) or isinstance(rec.get(key), bool):
+            raise ValueError(f"Baris {lineno}: field '{key}' hilang atau bertipe salah.")
+    if rec["role"] not in ROLES:
+        raise ValueError(f"Baris {lineno}: role '{rec['role']}' tidak dikenal.")
+    parent = rec.get("parent")
+    if parent is not None and (not isinstance(parent, int) or isinstance(parent, bool)):
+        raise ValueError(f"Baris {lineno}: field 'parent' harus integer atau null.")
+    if rec.get("model") is not None and not isinstance(rec["model"], str):
+        raise ValueError(f"Baris {lineno}: field 'model' harus string atau null.")
+    return rec
+
+def read_records(fileobj):
+    # Record tervalidasi dari file biner NDJSON (gzip atau teks biasa), satu baris per iterasi.
+    magic = fileobj.read(2)
+    fileobj.seek(0)
+    stream = gzip.GzipFile(fileobj=fileobj) if magic == b"\x1f\x8b" else fileobj
+    text = io.TextIOWrapper(stream, encoding="utf-8")
+    try:
+        for lineno, line in enumerate(text, 1):
+            if not line.strip():
+                continue
+            try:
+                rec = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Baris {lineno}: JSON tidak valid ({e.msg}).") from None
+            yield lineno, _validate(rec, lineno)
+    finally:
+        # Lepas wrapper tanpa menutup file pemanggil (import membaca file dua kali).
+        text.detach()
+
+def check_ndjson(fileobj):
+    # Validasi seluruh file (format tiap baris, urutan percakapan, parent, id duplikat) tanpa
+    # menulis apa pun. Mengembalikan {"conversations": n, "messages": n} atau ValueError.
+    stats = {"conversations": 0, "messages": 0}
+    current, known, seen = None, set(), set()
+    for lineno, rec in read_records(fileobj):
+        if rec["conv"] != current:
+            if rec["conv"] in seen:
+                raise ValueError(f"Baris {lineno}: pesan percakapan {rec['conv']} tidak berurutan.")
+            seen.add(rec["conv"])
+            current, known = rec["conv"], set()
+            stats["conversations"] += 1
+        parent = rec.get("parent")
+        if parent is not None and parent not in known:
+            raise ValueError(f"Baris {lineno}: parent {parent} belum muncul sebelumnya.")
+        if rec["id"] in known:
+            raise ValueError(f"Baris {lineno}: id {rec['id']} duplikat.")
+        known.add(rec["id"])
+        stats["messages"] += 1
+    return stats
+
+def import_ndjson(store, fileobj, batch: int = NODE_BATCH, owner: str = ""):
+    # Impor streaming; tiap percakapan dibuat baru (id lama dipakai bila belum ada) sebagai
+    # milik `owner`.
+    # File divalidasi utuh dulu (dua kali baca, memori tetap per baris), jadi file rusak
+    # tidak meninggalkan percakapan setengah jadi. Head = node bertanda "head", atau node
+    # terakhir percakapan bila tidak ada. Mengembalikan {"conversations": n, "messages": n}.
+    check_ndjson(fileobj)
+    fileobj.seek(0)
+    stats = {"conversations": 0, "messages": 0}
+    conv_id, id_map, head, last, rows = None, {}, None, None, []
+
+    def flush():
+        if rows:
+            store.import_nodes(conv_id, rows, id_map)
+            stats["messages"] += len(rows)
+            rows.clear()
+
+    def finish():
+        flush()
+        if conv_id is not None and (head if head is not None else last) is not None:
+            store.set_head(conv_id, id_map[head if head is not None else last])
+
+    current = None
+    for _, rec in read_records(fileobj):
+        if rec["conv"] != current:
+            finish()
+            current, id_map, head, last = rec["conv"], {}, None, None
+            conv_id = store.import_conversation(rec["conv"], rec["title"], rec["conv_created_at"], owner)
+            stats["conversations"] += 1
+        rows.append((rec["id"], rec.get("parent"), rec["role"], rec["content"], rec["created_at"], rec.get("model")))
+        last = rec["id"]
+        if rec.get("head"):
+            head = rec["id"]
+        if len(rows) >= batch:
+            flush()
+    finish()
+    return stats
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ekspor/impor riwayat percakapan (NDJSON gzip).")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    exp = sub.add_parser("export")
+    exp.add_argument("output")
+    exp.add_argument("--conv", action="append", help="Id percakapan (boleh berulang); default semua.")
+    exp.add_argument("--owner", default=None, help="Hanya percakapan milik owner (uid) ini; default semua.")
+    imp = sub.add_parser("import")
+    imp.add_argument("input")
+    imp.add_argument("--owner", default="", help="Owner (uid) percakapan hasil impor.")
+    args = parser.parse_args(argv)
+
+    # Store mengikuti CHAT_STORE_BACKEND / CHAT_STORE_PATH seperti chatbot.py.
+    store = make_conversation_store()
+    if args.cmd == "export":
+        with open(args.output, "wb") as f:
+            for chunk in export_ndjson_gz(store, args.conv, owner=args.owner):
+                f.write(chunk)
+    else:
+        with open(args.input, "rb") as f:
+            print(json.dumps(import_ndjson(store, f, owner=args.owner)))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+import json
+import time
+import threading
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# =========================
+# 📊 METRICS (latency & throughput)
+# =========================
+# Sampel terbaru per (metrik, model) untuk p50/p95 bergulir, plus counter kumulatif.
+# Ekspor opsional: file JSONL (satu baris per permintaan upstream) dan endpoint teks Prometheus.
+DEFAULT_WINDOW = 500
+QUANTILES = (0.5, 0.95)
+
+def percentile(values, q: float):
+    if not values:
+        return None
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, round(q * (len(ordered) - 1))))
+    return ordered[idx]
+
+def _error_class(e) -> str:
+    # RuntimeError dari client membungkus error asli (ConnectionError, Timeout, ...).
+    return type(e.__cause__ or e).__name__
+
+class Metrics:
+    def __init__(self, window: int = DEFAULT_WINDOW, jsonl_path=None):
+        self.window = window
+        self._samples = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+        self._jsonl = open(jsonl_path, "a", encoding="utf-8") if jsonl_path else None
+
+    def observe(self, metric: str, seconds: float, model: str = ""):
+        with self._lock:
+            key = (metric, model)
+            if key not in self._samples:
+                self._samples[key] = deque(maxlen=self.window)
+            self._samples[key].append(seconds)
+
+    def inc(self, metric: str, model: str = "", value: float = 1, error: str = ""):
+        with self._lock:
+            key = (metric, model, error)
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def counter(self, metric: str, model=None) -> float:
+        # Total counter (semua model bila `model` None).
+        with self._lock:
+            return sum(v for (m, mdl, _), v in self._counters.items() if m == metric and (model is None or mdl == model))
+
+    def record_request(self, model: str, ttfb, latency: float, bytes_sent: int, bytes_received: int,
+                       usage=None, error=None):
+        # Satu permintaan upstream (chat atau stream) yang sudah selesai/gagal.
+        usage = usage or {}
+        err = _error_class(error) if error is not None else None
+        if ttfb is not None:
+            self.observe("ttfb", ttfb, model)
+        self.observe("latency", latency, model)
+        self.inc("requests", model)
+        self.inc("bytes_sent", model, bytes_sent)
+        self.inc("bytes_received", model, bytes_received)
+        self.inc("prompt_tokens", model, usage.get("prompt_tokens") or 0)
+        self.inc("completion_tokens", model, usage.get("completion_tokens") or 0)
+        if err:
+            self.inc("errors", model, error=err)
+        if self._jsonl is not None:
+            line = json.dumps({
+                "ts": time.time(), "model": model, "ttfb": ttfb, "latency": latency,
+                "bytes_sent": bytes_sent, "bytes_received": bytes_received,
+                "prompt_tokens": usage.get("prompt_tokens"), "completion_tokens": usage.get("completion_tokens"),
+                "error": err,
+            })
+            with self._lock:
+                self._jsonl.write(line + "\n")
+                self._jsonl.flush()
+
+    def summary(self):
+        # Baris untuk panel diagnostik: p50/p95 per metrik per model (detik).
+        with self._lock:
+            samples = {k: list(v) for k, v in self._samples.items()}
+            counters = dict(self._counters)
+        rows = []
+        for (metric, model), values in sorted(samples.items()):
+            errors = sum(v for (m, mdl, e), v in counters.items() if m == "errors" and mdl == model) if metric == "latency" else None
+            rows.append({
+                "metric": metric,
+                "model": model or "-",
+                "n": len(values),
+                "p50": percentile(values, 0.5),
+                "p95": percentile(values, 0.95),
+                "errors": errors,
+            })
+        return rows
+
+    def prometheus_text(self) -> str:
+        with self._lock:
+            samples = {k: list(v) for k, v in self._samples.items()}
+            counters = dict(self._counters)
+        out = []
+        for metric in sorted({m for m, _ in samples}):
+            name = f"chatbot_{metric}_seconds"
+            out.append(f"# TYPE {name} summary")
+            for (m, model), values in sorted(samples.items()):
+                if m != metric:
+                    continue
+                for q in QUANTILES:
+                    out.append(f'{name}{{model="{model}",quantile="{q}"}} {percentile(values, q)}')
+                out.append(f'{name}_count{{model="{model}"}} {len(values)}')
+        for metric in sorted({m for m, _, _ in counters}):
+            name = f"chatbot_{metric}_total"
+            out.append(f"# TYPE {name} counter")
+            for (m, model, error), value in sorted(counters.items()):
+                if m != metric:
+                    continue
+                labels = f'model="{model}"' + (f',error="{error}"' if error else "")
+                out.append(f"{name}{{{labels}}} {value}")
+        return "\n".join(out) + "\n"
+
+def serve_prometheus(metrics: Metrics, port: int, host: str = "0.0.0.0"):
+    # Endpoint /metrics di thread daemon terpisah dari server Streamlit.
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = metrics.prometheus_text().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
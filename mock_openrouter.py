@@ -0,0 +1,125 @@
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# =========================
+# 🧪 MOCK OPENROUTER (lokal, tanpa jaringan)
+# =========================
+# Meniru POST /api/v1/chat/completions: JSON biasa atau SSE (stream=true), dengan
+# latensi, error 5xx dan 429 (+ Retry-After) yang bisa diatur. Untuk benchmark & uji lokal.
+class MockConfig:
+    def __init__(self, latency: float = 0.2, token_delay: float = 0.01, tokens: int = 40,
+                 error_rate: float = 0.0, rate_429: float = 0.0, retry_after: float = 0.0, seed=None):
+        self.latency = latency          # detik sebelum header respons
+        self.token_delay = token_delay  # jeda antar chunk SSE
+        self.tokens = tokens            # jumlah potongan teks per jawaban
+        self.error_rate = error_rate    # peluang HTTP 500
+        self.rate_429 = rate_429        # peluang HTTP 429
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def roll(self) -> str:
+        with self._lock:
+            self.requests += 1
+            x = self.random.random()
+        if x < self.rate_429:
+            return "429"
+        if x < self.rate_429 + self.error_rate:
+            return "500"
+        return "ok"
+
+def _handler(cfg: MockConfig):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _json(self, status: int, obj, headers=()):
+            body = json.dumps(obj).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for k, v in headers:
+                self.send_header(k, v)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            req = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            time.sleep(cfg.latency)
+            outcome = cfg.roll()
+            if outcome == "429":
+                self._json(429, {"error": {"message": "rate limited"}}, [("Retry-After", str(cfg.retry_after))])
+                return
+            if outcome == "500":
+                self._json(500, {"error": {"message": "mock upstream error"}})
+                return
+            words = [f"kata{i} " for i in range(cfg.tokens)]
+            prompt_tokens = sum(len(m.get("content", "")) for m in req.get("messages", [])) // 4
+            usage = {"prompt_tokens": prompt_tokens, "completion_tokens": cfg.tokens,
+                     "total_tokens": prompt_tokens + cfg.tokens}
+            if not req.get("stream"):
+                self._json(200, {"choices": [{"message": {"role": "assistant", "content": "".join(words)}}], "usage": usage})
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            self._chunk(": OPENROUTER PROCESSING\n\n")
+            for w in words:
+                self._chunk(f"data: {json.dumps({'choices': [{'delta': {'content': w}}]})}\n\n")
+                if cfg.token_delay:
+                    time.sleep(cfg.token_delay)
+            self._chunk(f"data: {json.dumps({'choices': [], 'usage': usage})}\n\n")
+            self._chunk("data: [DONE]\n\n")
+            self.wfile.write(b"0\r\n\r\n")
+
+        def _chunk(self, text: str):
+            data = text.encode("utf-8")
+            self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+            self.wfile.flush()
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Client menutup koneksi keep-alive (mis. setelah error/cancel): bukan kegagalan mock.
+        if not isinstance(sys.exc_info()[1], (ConnectionResetError, BrokenPipeError)):
+            super().handle_error(request, client_address)
+
+def start_mock(cfg: MockConfig = None, host: str = "127.0.0.1", port: int = 0):
+    # Jalan di thread daemon; port 0 = pilih port bebas. URL: server.url
+    cfg = cfg or MockConfig()
+    server = _Server((host, port), _handler(cfg))
+    server.config = cfg
+    server.url = f"http://{host}:{server.server_port}/api/v1/chat/completions"
+    threading.Thread(target=server.serve_forever, name="mock-openrouter", daemon=True).start()
+    return server
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Mock lokal OpenRouter chat/completions.")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8089)
+    ap.add_argument("--latency", type=float, default=0.2)
+    ap.add_argument("--token-delay", type=float, default=0.01)
+    ap.add_argument("--tokens", type=int, default=40)
+    ap.add_argument("--error-rate", type=float, default=0.0)
+    ap.add_argument("--rate-429", type=float, default=0.0)
+    ap.add_argument("--retry-after", type=float, default=0.0)
+    args = ap.parse_args()
+    srv = start_mock(MockConfig(args.latency, args.token_delay, args.tokens, args.error_rate, args.rate_429, args.retry_after),
+                     args.host, args.port)
+    print(f"Mock OpenRouter di {srv.url} (set OPENROUTER_URL ke alamat ini)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        srv.shutdown()
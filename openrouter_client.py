@@ -0,0 +1,291 @@
+import os
+import json
+import time
+import random
+import socket
+import threading
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# =========================
+# 🔌 OPENROUTER CLIENT
+# =========================
+# URL bisa dioverride lewat env, misalnya untuk mengarah ke server SSE palsu lokal saat pengujian.
+OPENROUTER_URL = os.getenv("OPENROUTER_URL", "https://openrouter.ai/api/v1/chat/completions")
+
+CONNECT_TIMEOUT = 5.0
+READ_TIMEOUT = 60.0
+MAX_RETRIES = 3
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 8.0
+MAX_RETRY_AFTER = 30.0
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+BREAKER_THRESHOLD = 5
+BREAKER_COOLDOWN = 30.0
+
+def _request_parts(messages_payload, model_name: str, api_key_str: str, max_tokens: int, temperature: float, stream: bool = False):
+    if not api_key_str:
+        raise RuntimeError("API key belum diisi. Masukkan API key di sidebar.")
+    headers = {"Content-Type":"application/json","Authorization":f"Bearer {api_key_str}"}
+    # Hanya role/content yang dikirim; metadata lokal pesan (mis. "model") tidak ikut.
+    messages_payload = [{"role": m["role"], "content": m["content"]} for m in messages_payload]
+    body = {"model":model_name,"messages":messages_payload,"max_tokens":max_tokens,"temperature":temperature,
+            "usage":{"include":True}}
+    if stream:
+        body["stream"] = True
+    return headers, body
+
+def _retry_after_seconds(r):
+    value = r.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+# =========================
+# 🧯 CIRCUIT BREAKER (per model)
+# =========================
+class CircuitBreaker:
+    # closed → open setelah `threshold` kegagalan beruntun; setelah `cooldown` detik
+    # satu permintaan percobaan (half-open) diizinkan lewat.
+    def __init__(self, threshold: int = BREAKER_THRESHOLD, cooldown: float = BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.cooldown:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+
+class OpenRouterClient:
+    # Satu Session ber-pool (keep-alive) dipakai bersama oleh semua sesi Streamlit.
+    def __init__(self, model_ids=(), pool_maxsize: int = 32, connect_timeout: float = CONNECT_TIMEOUT,
+                 read_timeout: float = READ_TIMEOUT, max_retries: int = MAX_RETRIES, metrics=None,
+                 url: str = OPENROUTER_URL):
+        self.url = url
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.breakers = {m: CircuitBreaker() for m in model_ids}
+        # Opsional: metrics.Metrics untuk TTFB, latency, byte & token per model.
+        self.metrics = metrics
+        self._lock = threading.Lock()
+
+    def breaker(self, model_name: str) -> CircuitBreaker:
+        with self._lock:
+            if model_name not in self.breakers:
+                self.breakers[model_name] = CircuitBreaker()
+            return self.breakers[model_name]
+
+    def _backoff(self, attempt: int, retry_after=None):
+        if retry_after is not None:
+            return retry_after + random.uniform(0, BACKOFF_BASE)
+        return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * (2 ** attempt)))
+
+    def _post(self, model_name: str, headers, body, stream: bool = False):
+        breaker = self.breaker(model_name)
+        if not breaker.allow():
+            raise RuntimeError(f"Model {model_name} sementara tidak tersedia (terlalu banyak kegagalan). Coba lagi nanti atau ganti model.")
+        data = json.dumps(body)
+        attempt = 0
+        # Tiap jalan keluar harus mencatat hasil ke breaker; bila tidak, probe half-open
+        # (_probing) tidak pernah dilepas dan model terblokir permanen.
+        settled = False
+        try:
+            while True:
+                try:
+                    r = self.session.post(self.url, headers=headers, data=data, timeout=self.timeout, stream=stream)
+                except (requests.ConnectionError, requests.Timeout) as e:
+                    if attempt >= self.max_retries:
+                        breaker.record_failure()
+                        settled = True
+                        raise RuntimeError(f"Gagal memanggil OpenRouter: {e.__class__.__name__}: {e}") from e
+                    time.sleep(self._backoff(attempt))
+                    attempt += 1
+                    continue
+                if r.status_code == 200:
+                    breaker.record_success()
+                    settled = True
+                    return r
+                retry_after = _retry_after_seconds(r)
+                retryable = r.status_code in RETRY_STATUS and (retry_after is None or retry_after <= MAX_RETRY_AFTER)
+                if not retryable or attempt >= self.max_retries:
+                    if r.status_code >= 500:
+                        breaker.record_failure()
+                    else:
+                        # 4xx (termasuk 429) bukan tanda model bermasalah.
+                        breaker.record_success()
+                    settled = True
+                    text = r.text
+                    r.close()
+                    raise RuntimeError(f"Gagal memanggil OpenRouter: {r.status_code} {text}")
+                r.close()
+                time.sleep(self._backoff(attempt, retry_after))
+                attempt += 1
+        except Exception:
+            # Mis. InvalidURL, ChunkedEncodingError, atau error lain di luar kasus di atas.
+            if not settled:
+                breaker.record_failure()
+            raise
+
+    def _record(self, model_name: str, started: float, ttfb, r, bytes_received: int, usage, error=None):
+        if self.metrics is None:
+            return
+        sent = len(r.request.body or b"") if r is not None else 0
+        self.metrics.record_request(model_name, ttfb, time.perf_counter() - started, sent, bytes_received, usage, error)
+
+    def chat(self, messages_payload, model_name: str, api_key_str: str, max_tokens: int, temperature: float, meta=None):
+        # `meta` (dict, opsional) diisi "usage" (prompt/completion tokens) dari respons.
+        headers, body = _request_parts(messages_payload, model_name, api_key_str, max_tokens, temperature)
+        started, r, ttfb, usage = time.perf_counter(), None, None, None
+        try:
+            r = self._post(model_name, headers, body)
+            # TTFB = sampai header respons diterima (termasuk retry sebelumnya).
+            ttfb = time.perf_counter() - started
+            data = r.json()
+            usage = data.get("usage")
+            if meta is not None and usage:
+                meta["usage"] = usage
+            content = data["choices"][0]["message"]["content"]
+        except Exception as e:
+            self._record(model_name, started, ttfb, r, len(r.content) if r is not None else 0, usage, e)
+            raise
+        self._record(model_name, started, ttfb, r, len(r.content), usage)
+        return content
+
+    def stream(self, messages_payload, model_name: str, api_key_str: str, max_tokens: int, temperature: float, meta=None):
+        # Generator: menghasilkan potongan teks (delta) begitu diterima dari upstream.
+        # Retry hanya terjadi sebelum byte pertama; setelah itu error diteruskan ke pemanggil.
+        # Usage token dikirim upstream di event terakhir dan disalin ke `meta` bila diberikan.
+        headers, body = _request_parts(messages_payload, model_name, api_key_str, max_tokens, temperature, stream=True)
+        started, r, ttfb, usage, received, error = time.perf_counter(), None, None, None, 0, None
+        try:
+            with self._post(model_name, headers, body, stream=True) as r:
+                ttfb = time.perf_counter() - started
+                if meta is not None:
+                    # Pemegang meta bisa menghentikan stream dari thread lain (abort_response).
+                    meta["response"] = r
+
+                def lines():
+                    nonlocal received
+                    # chunk_size=None: baca per chunk HTTP yang tiba, bukan menunggu buffer penuh.
+                    for line in r.iter_lines(chunk_size=None):
+                        received += len(line) + 1
+                        yield line
+
+                for data in iter_sse_data(lines()):
+                    if data == "[DONE]":
+                        break
+                    event = json.loads(data)
+                    if "error" in event:
+                        err = event["error"]
+                        raise RuntimeError(f"Gagal memanggil OpenRouter: {err.get('message', err) if isinstance(err, dict) else err}")
+                    if event.get("usage"):
+                        usage = event["usage"]
+                        if meta is not None:
+                            meta["usage"] = usage
+                    choices = event.get("choices") or []
+                    if not choices:
+                        continue
+                    delta = (choices[0].get("delta") or {}).get("content")
+                    if delta:
+                        yield delta
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            # Juga tercatat bila pemanggil menutup generator lebih awal (cancel).
+            self._record(model_name, started, ttfb, r, received, usage, error)
+
+def abort_response(r):
+    # Hentikan respons streaming dari thread lain. r.close() saja tidak membangunkan thread
+    # yang sedang menunggu chunk berikutnya; shutdown socket membuat read itu langsung gagal.
+    try:
+        sock = getattr(getattr(r.raw, "connection", None), "sock", None)
+        if sock is not None:
+            sock.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass
+    r.close()
+
+_default_client = None
+_default_lock = threading.Lock()
+
+def default_client() -> OpenRouterClient:
+    global _default_client
+    with _default_lock:
+        if _default_client is None:
+            _default_client = OpenRouterClient()
+        return _default_client
+
+def call_openrouter(messages_payload, model_name: str, api_key_str: str, max_tokens: int, temperature: float, client=None):
+    return (client or default_client()).chat(messages_payload, model_name, api_key_str, max_tokens, temperature)
+
+def stream_openrouter(messages_payload, model_name: str, api_key_str: str, max_tokens: int, temperature: float, client=None):
+    return (client or default_client()).stream(messages_payload, model_name, api_key_str, max_tokens, temperature)
+
+# =========================
+# 📡 STREAMING (server-sent events)
+# =========================
+def iter_sse_data(lines):
+    # Gabungkan baris "data:" per event (dipisah baris kosong); komentar ":" seperti
+    # ": OPENROUTER PROCESSING" diabaikan.
+    data = []
+    for raw in lines:
+        line = raw.decode("utf-8") if isinstance(raw, bytes) else raw
+        if not line:
+            if data:
+                yield "\n".join(data)
+                data = []
+            continue
+        if line.startswith(":"):
+            continue
+        field, _, value = line.partition(":")
+        if value.startswith(" "):
+            value = value[1:]
+        if field == "data":
+            data.append(value)
+    if data:
+        yield "\n".join(data)
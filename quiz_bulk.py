@@ -0,0 +1,229 @@
+import os
+import sys
+import time
+import atexit
+import shutil
+import argparse
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from quiz_engine import QuizEngine
+
+# =========================
+# 📂 BULK SCORING (CSV / Parquet, per chunk)
+# =========================
+# Satu baris per responden, satu kolom per soal (q0, q1, ...) berisi label opsi atau
+# nomor opsi (0-based). File dibaca per chunk, tiap chunk diskor sekaligus lewat
+# QuizEngine, lalu ditulis lagi per chunk, jadi memori tetap terbatas berapa pun
+# jumlah barisnya. Kolom lain (mis. id responden) ikut disalin ke output.
+CHUNK_ROWS = 200_000
+LABEL_COLUMN = "hasil"
+COMPLETE_COLUMN = "lengkap"
+
+_result_dir = None
+
+def _is_parquet(name: str) -> bool:
+    return str(name).lower().endswith((".parquet", ".pq"))
+
+def _detect_sep(fileobj) -> str:
+    # Riwayat kuis diekspor dengan ';'; file lain biasanya ','.
+    pos = fileobj.tell()
+    head = fileobj.readline()
+    fileobj.seek(pos)
+    if isinstance(head, bytes):
+        head = head.decode("utf-8-sig", errors="ignore")
+    return ";" if head.count(";") > head.count(",") else ","
+
+def read_chunks(source, name=None, chunk_rows: int = CHUNK_ROWS, sep=None):
+    # DataFrame per chunk dari path atau file-like (nama dipakai untuk mengenali format).
+    name = name or getattr(source, "name", source)
+    if _is_parquet(name):
+        import pyarrow.parquet as pq  # opsional: hanya untuk Parquet
+
+        for batch in pq.ParquetFile(source).iter_batches(batch_size=chunk_rows):
+            yield batch.to_pandas()
+        return
+    if sep is None:
+        if isinstance(source, (str, os.PathLike)):
+            with open(source, "rb") as f:
+                sep = _detect_sep(f)
+        else:
+            sep = _detect_sep(source)
+    yield from pd.read_csv(source, sep=sep, chunksize=chunk_rows, dtype=str, keep_default_na=True,
+                           encoding="utf-8-sig")
+
+def encode_column(engine: QuizEngine, q: int, values: pd.Series) -> np.ndarray:
+    # Label opsi -> indeks (kategorikal, tanpa loop Python); angka 0..n-1 juga diterima.
+    options = engine.options[q]
+    # Nilai di luar opsi dibuang dulu (pandas tidak lagi menerimanya di Categorical).
+    codes = pd.Categorical(values.where(values.isin(options)), categories=options).codes.astype(np.int64)
+    unknown = codes < 0
+    if unknown.any():
+        numeric = pd.to_numeric(values[unknown], errors="coerce").to_numpy()
+        ok = ~np.isnan(numeric) & (numeric >= 0) & (numeric < len(options)) & (numeric == np.floor(numeric))
+        fixed = np.full(len(numeric), -1, dtype=np.int64)
+        fixed[ok] = numeric[ok].astype(np.int64)
+        codes[unknown] = fixed
+    codes[codes < 0] = engine.missing
+    return codes
+
+def score_frame(engine: QuizEngine, df: pd.DataFrame) -> pd.DataFrame:
+    cols = [f"q{i}" for i in range(engine.n_questions)]
+    missing = [c for c in cols if c not in df.columns]
+    if missing:
+        raise ValueError(f"Kolom jawaban tidak ada: {', '.join(missing)}")
+    idx = np.column_stack([encode_column(engine, i, df[c]) for i, c in enumerate(cols)])
+    tally, bits = engine.outcome(idx)
+    out = df.copy()
+    for k, cat in enumerate(engine.categories):
+        out[cat] = tally[:, k]
+    out[LABEL_COLUMN] = engine.bit_labels(bits)
+    out[COMPLETE_COLUMN] = (idx != engine.missing).all(axis=1)
+    return out
+
+class ChunkWriter:
+    # Target: path atau file biner. CSV ditulis lewat pyarrow.csv bila tersedia (jauh lebih
+    # cepat daripada DataFrame.to_csv untuk kolom teks), selain itu lewat pandas.
+    def __init__(self, target, parquet: bool, sep: str = ";"):
+        self.parquet = parquet
+        self.sep = sep
+        self._owned = isinstance(target, (str, os.PathLike))
+        self._sink = open(target, "wb") if self._owned else target
+        self._writer = None
+        self._schema = None
+        self._first = True
+
+    def _table(self, df: pd.DataFrame):
+        # Kolom yang kosong semua di satu chunk bisa tertebak bertipe lain; samakan ke chunk pertama.
+        import pyarrow as pa
+
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        if self._schema is None:
+            self._schema = table.schema
+        elif not table.schema.equals(self._schema):
+            table = table.cast(self._schema)
+        return table
+
+    def write(self, df: pd.DataFrame):
+        if self.parquet:
+            import pyarrow.parquet as pq
+
+            table = self._table(df)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self._sink, table.schema)
+            self._writer.write_table(table)
+            return
+        if self._first:
+            self._sink.write("\ufeff".encode("utf-8"))  # BOM agar Excel membaca UTF-8
+        try:
+            import pyarrow.csv as pacsv
+        except ImportError:
+            self._sink.write(df.to_csv(sep=self.sep, index=False, header=self._first).encode("utf-8"))
+        else:
+            table = self._table(df)
+            if self._writer is None:
+                self._writer = pacsv.CSVWriter(self._sink, table.schema,
+                                               write_options=pacsv.WriteOptions(delimiter=self.sep))
+            self._writer.write_table(table)
+        self._first = False
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+        if self._owned:
+            self._sink.close()
+
+def score_file(engine: QuizEngine, source, target, name=None, target_name=None, chunk_rows: int = CHUNK_ROWS,
+               progress=None):
+    # Mengembalikan {"rows", "seconds", "rows_per_sec"}; `progress(rows)` dipanggil per chunk.
+    started = time.perf_counter()
+    writer = ChunkWriter(target, _is_parquet(target_name or target))
+    rows = 0
+    try:
+        for chunk in read_chunks(source, name, chunk_rows):
+            writer.write(score_frame(engine, chunk))
+            rows += len(chunk)
+            if progress is not None:
+                progress(rows)
+    finally:
+        writer.close()
+    seconds = time.perf_counter() - started
+    return {"rows": rows, "seconds": seconds, "rows_per_sec": rows / seconds if seconds else 0.0}
+
+def _run_bulk(engine: QuizEngine, upload, fmt: str):
+    import streamlit as st
+
+    out_name = "hasil_quiz." + ("parquet" if fmt == "Parquet" else "csv")
+    # Hasil ditulis per chunk ke file sementara, bukan ke BytesIO: memori tetap sebesar satu chunk.
+    fd, path = tempfile.mkstemp(suffix="_" + out_name, dir=_results_dir())
+    status = st.empty()
+    try:
+        with os.fdopen(fd, "wb") as out:
+            stats = score_file(engine, upload, out, name=upload.name, target_name=out_name,
+                               progress=lambda n: status.caption(f"{n:,} baris diproses…"))
+    except (ValueError, ImportError) as e:
+        os.remove(path)
+        st.error(f"Gagal memproses file: {e}")
+        return
+    status.empty()
+    _drop_result(st.session_state.pop("bulk_result", None))
+    st.session_state.bulk_result = {
+        "path": path, "name": out_name,
+        "mime": "application/octet-stream" if fmt == "Parquet" else "text/csv",
+        "caption": f"{stats['rows']:,} baris · {stats['seconds']:.2f} dtk · {stats['rows_per_sec']:,.0f} baris/dtk",
+    }
+
+def render_bulk_panel(engine: QuizEngine):
+    # Expander "skor massal" untuk funpro1.py / funpro2.py.
+    import streamlit as st
+
+    with st.expander("📂 Skor massal (CSV / Parquet)", expanded=False):
+        st.caption("Satu baris per responden, kolom " + ", ".join(f"q{i}" for i in range(engine.n_questions))
+                   + " berisi label opsi atau nomor opsi (0-based).")
+        upload = st.file_uploader("File jawaban", type=["csv", "parquet", "pq"], key="bulk_file")
+        fmt = st.radio("Format hasil", ["CSV", "Parquet"], horizontal=True, key="bulk_format")
+        if upload is not None and st.button("🚀 Skor semua baris", key="bulk_run"):
+            _run_bulk(engine, upload, fmt)
+        result = st.session_state.get("bulk_result")
+        if result is not None and os.path.exists(result["path"]):
+            st.caption(result["caption"])
+            # File dibaca baru saat tombol unduh diklik, lalu langsung ditutup.
+            st.download_button("💾 Unduh hasil", data=lambda: _read_result(result["path"]),
+                               file_name=result["name"], mime=result["mime"], key="bulk_download")
+
+def _results_dir() -> str:
+    # Satu folder sementara per proses untuk hasil skor massal; dihapus saat proses selesai.
+    global _result_dir
+    if _result_dir is None:
+        _result_dir = tempfile.mkdtemp(prefix="quiz_bulk_")
+        atexit.register(shutil.rmtree, _result_dir, True)
+    return _result_dir
+
+def _read_result(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+def _drop_result(result):
+    # Hasil sebelumnya milik sesi ini tidak dipakai lagi begitu ada hasil baru.
+    if result is not None:
+        try:
+            os.remove(result["path"])
+        except FileNotFoundError:
+            pass
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Skor massal file jawaban quiz karier (CSV/Parquet).")
+    parser.add_argument("input")
+    parser.add_argument("output", help="Akhiran .parquet/.pq = Parquet, selain itu CSV (';').")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    args = parser.parse_args(argv)
+
+    stats = score_file(QuizEngine(), args.input, args.output, chunk_rows=args.chunk_rows,
+                       progress=lambda n: print(f"\r{n:,} baris", end="", file=sys.stderr))
+    print(file=sys.stderr)
+    print(f"{stats['rows']:,} baris dalam {stats['seconds']:.2f} dtk ({stats['rows_per_sec']:,.0f} baris/dtk)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+import numpy as np
+
+# =========================
+# 🎯 QUIZ ENGINE (dipakai funpro1.py & funpro2.py)
+# =========================
+# Bank soal dikompilasi sekali menjadi tensor bobot padat (soal × opsi × kategori).
+# Semua kombinasi jawaban (encoding mixed-radix) dienumerasi di awal ke tabel skor +
+# bitmask pemenang, jadi satu submit = satu lookup array; bank yang terlalu besar dipecah
+# ke beberapa tabel jumlah parsial. Satu jawaban maupun sejuta baris memakai jalur yang sama.
+CATEGORIES = ["Programmer", "Designer", "Data Scientist"]
+
+QUESTIONS = [
+    {
+        "q": "Aktivitas yang paling bikin kamu puas:",
+        "options": {
+            "Menyelesaikan masalah logika/algoritma": {"Programmer": 5, "Data Scientist": 4, "Designer": 2},
+            "Membuat desain visual": {"Designer": 5, "Programmer": 2, "Data Scientist": 2},
+            "Menginterpretasi data/statistik": {"Data Scientist": 5, "Programmer": 4, "Designer": 2},
+            "Berkoordinasi & memimpin tim": {"Programmer": 3, "Designer": 3, "Data Scientist": 3},
+        },
+    },
+    {
+        "q": "Tools yang paling ingin kamu kuasai:",
+        "options": {
+            "VS Code, GitHub": {"Programmer": 5, "Data Scientist": 3, "Designer": 1},
+            "Figma, Adobe, Canva": {"Designer": 5, "Programmer": 2, "Data Scientist": 1},
+            "Python, R, Pandas": {"Data Scientist": 5, "Programmer": 4, "Designer": 1},
+            "Trello, Miro, Notion": {"Programmer": 3, "Designer": 3, "Data Scientist": 3},
+        },
+    },
+    {
+        "q": "Cara menghadapi masalah kompleks:",
+        "options": {
+            "Debugging step-by-step": {"Programmer": 5, "Data Scientist": 3, "Designer": 1},
+            "Riset data & uji hipotesis": {"Data Scientist": 5, "Programmer": 3, "Designer": 1},
+            "User testing & iterasi desain": {"Designer": 5, "Programmer": 2, "Data Scientist": 1},
+            "Brainstorm bareng tim": {"Programmer": 3, "Designer": 3, "Data Scientist": 3},
+        },
+    },
+    {
+        "q": "Hasil kerja yang bikin kamu bangga:",
+        "options": {
+            "Aplikasi berjalan stabil": {"Programmer": 5, "Designer": 2, "Data Scientist": 2},
+            "UI/UX cantik & ramah pengguna": {"Designer": 5, "Programmer": 2, "Data Scientist": 2},
+            "Model statistik akurat": {"Data Scientist": 5, "Programmer": 3, "Designer": 2},
+            "Dokumentasi jelas & bisa dipahami": {"Programmer": 3, "Designer": 3, "Data Scientist": 3},
+        },
+    },
+    {
+        "q": "Jika diberi 1 minggu belajar sesuatu:",
+        "options": {
+            "Algoritma & struktur data": {"Programmer": 5, "Data Scientist": 3, "Designer": 1},
+            "Prinsip warna & tipografi": {"Designer": 5, "Programmer": 2, "Data Scientist": 1},
+            "Machine learning dasar": {"Data Scientist": 5, "Programmer": 3, "Designer": 1},
+            "Manajemen proyek & komunikasi": {"Programmer": 3, "Designer": 3, "Data Scientist": 3},
+        },
+    },
+]
+
+TIPS = {
+    "Programmer": "💡 Coba belajar Git, Python, atau ikutan competitive programming.",
+    "Designer": "💡 Explore Figma, dan baca buku 'Don't Make Me Think'.",
+    "Data Scientist": "💡 Mulai dari Pandas, Kaggle dataset, dan dasar Machine Learning.",
+}
+
+QUOTES = {
+    "Programmer": [
+        "“Talk is cheap. Show me the code.” 💻",
+        "“Programmer: a machine that turns coffee into code.” ☕💻",
+        "“Code never lies, comments sometimes do.” 🔍",
+    ],
+    "Designer": [
+        "“Design is intelligence made visible.” 🎨",
+        "“Good design is obvious. Great design is transparent.” ✨",
+        "“People ignore design that ignores people.” 👥",
+    ],
+    "Data Scientist": [
+        "“Without data, you’re just another person with an opinion.” 📊",
+        "“Data is the new oil.” ⛽📊",
+        "“The goal is to turn data into information, and information into insight.” 🔎",
+    ],
+}
+
+BADGE_SOLO = {
+    "Programmer": "Siap siap ngopi jam 2 pagi sambil debug bug misterius 😆",
+    "Designer": "Debat warna #FFFFFF vs #FAFAFA itu serius banget loh 🤯",
+    "Data Scientist": "Anggap dataset sebagai sahabat sejati 🤭",
+}
+
+def join_atau(names):
+    if len(names) == 1: return names[0]
+    if len(names) == 2: return f"{names[0]} atau {names[1]}"
+    return ", ".join(names[:-1]) + f" atau {names[-1]}"
+
+# Kombinasi jawaban (termasuk "belum dijawab") yang masih dienumerasi penuh ke satu tabel.
+TABLE_LIMIT = 1 << 18
+DISTRIBUTION_SAMPLES = 200_000
+
+class QuizEngine:
+    def __init__(self, questions=QUESTIONS, categories=CATEGORIES, table_limit: int = TABLE_LIMIT):
+        self.categories = list(categories)
+        self.options = [list(item["options"]) for item in questions]
+        self._option_index = [{opt: j for j, opt in enumerate(opts)} for opts in self.options]
+        n_q, n_c = len(questions), len(self.categories)
+        self.width = max(len(opts) for opts in self.options) + 1
+        # Slot terakhir tiap soal = "belum dijawab" (bobot 0), jadi jawaban kosong tidak perlu cabang.
+        weights = np.zeros((n_q, self.width, n_c), dtype=np.int32)
+        cat_index = {c: k for k, c in enumerate(self.categories)}
+        for i, item in enumerate(questions):
+            for j, pts in enumerate(item["options"].values()):
+                for cat, p in pts.items():
+                    weights[i, j, cat_index[cat]] = p
+        self.weights = weights
+        # Label untuk tiap kombinasi pemenang (bitmask kategori): 2^kategori entri.
+        self._labels = np.array(["" if not m else join_atau(self._names(m)) for m in range(1 << n_c)], dtype=object)
+        self._bits = 1 << np.arange(n_c, dtype=np.int64)
+
+        # Encoding mixed-radix: soal i punya radix n_opsi_i + 1 (digit terakhir = belum dijawab).
+        self._n_opts = np.array([len(opts) for opts in self.options], dtype=np.int64)
+        self._digits = np.minimum(np.arange(self.width)[None, :], self._n_opts[:, None])
+        self._rows = np.arange(n_q)
+        # Soal dikelompokkan berurutan ke blok yang kombinasinya <= table_limit; tiap blok
+        # dienumerasi menjadi tabel jumlah parsial (kode blok -> skor). Bank kecil = satu blok,
+        # jadi satu submission cukup satu lookup (skor + bitmask pemenang); bank besar
+        # menjumlahkan satu lookup per blok.
+        self._blocks = []
+        start = 0
+        while start < n_q:
+            stop, size = start + 1, int(self._n_opts[start]) + 1
+            while stop < n_q and size * (int(self._n_opts[stop]) + 1) <= table_limit:
+                size *= int(self._n_opts[stop]) + 1
+                stop += 1
+            self._blocks.append((start, stop, self._strides(start, stop), self._enumerate(start, stop)))
+            start = stop
+        self.full_table = len(self._blocks) == 1
+        self._outcome_bits = (self.winner_bits(self.winners(self._blocks[0][3])).astype(np.uint8 if n_c <= 8 else np.int64)
+                              if self.full_table else None)
+        self._distribution = None
+
+    def _strides(self, start: int, stop: int):
+        radix = self._n_opts[start:stop] + 1
+        return np.concatenate([np.cumprod(radix[::-1])[::-1][1:], [1]]).astype(np.int64)
+
+    def _enumerate(self, start: int, stop: int):
+        # Skor (kombinasi, C) untuk semua digit soal start..stop-1, soal pertama paling signifikan.
+        table = np.zeros((1, len(self.categories)), dtype=np.int32)
+        for q in range(start, stop):
+            w = self.weights[q, :int(self._n_opts[q]) + 1]  # slot ke-n = belum dijawab (0)
+            table = (table[:, None, :] + w[None, :, :]).reshape(-1, table.shape[1])
+        return table
+
+    @property
+    def n_questions(self) -> int:
+        return len(self.options)
+
+    @property
+    def missing(self) -> int:
+        return self.width - 1
+
+    @property
+    def n_combinations(self) -> int:
+        return int(np.prod(self._n_opts + 1, dtype=object))
+
+    def _names(self, mask: int):
+        return [c for k, c in enumerate(self.categories) if mask >> k & 1]
+
+    def encode(self, answers):
+        # Label opsi per soal -> indeks opsi (None / tidak dikenal = slot kosong).
+        return np.array([self._option_index[i].get(a, self.missing) for i, a in enumerate(answers)], dtype=np.int64)
+
+    def _codes(self, idx):
+        # Kode mixed-radix per blok untuk idx (Q,) atau (N, Q).
+        digits = self._digits[self._rows, np.asarray(idx, dtype=np.int64)]
+        return [digits[..., a:b] @ strides for a, b, strides, _ in self._blocks]
+
+    def tally(self, idx):
+        # idx: (Q,) atau (N, Q) indeks opsi -> skor (C,) atau (N, C).
+        codes = self._codes(idx)
+        total = self._blocks[0][3][codes[0]]
+        for code, block in zip(codes[1:], self._blocks[1:]):
+            total = total + block[3][code]
+        return total
+
+    def outcome(self, idx):
+        # (skor, bitmask pemenang); dengan tabel penuh keduanya satu lookup.
+        if self.full_table:
+            code = self._codes(idx)[0]
+            return self._blocks[0][3][code], self._outcome_bits[code].astype(np.int64)
+        tally = self.tally(idx)
+        return tally, self.winner_bits(self.winners(tally))
+
+    def winners(self, tally):
+        # Mask (…, C) kategori dengan skor tertinggi (semua yang seri ikut).
+        tally = np.asarray(tally)
+        return tally == tally.max(axis=-1, keepdims=True)
+
+    def winner_bits(self, mask):
+        return np.asarray(mask) @ self._bits
+
+    def labels(self, mask):
+        # Label "A", "A atau B", ... untuk tiap baris mask.
+        return self.bit_labels(self.winner_bits(mask))
+
+    def bit_labels(self, bits):
+        return self._labels[bits]
+
+    def result(self, answers):
+        # Satu submission: {"tally": {kategori: skor}, "top": [kategori], "label": str}.
+        tally, bits = self.outcome(self.encode(answers))
+        bits = int(bits)
+        return {
+            "tally": {c: int(v) for c, v in zip(self.categories, tally)},
+            "top": self._names(bits),
+            "label": self._labels[bits],
+        }
+
+    def outcome_distribution(self, samples: int = DISTRIBUTION_SAMPLES, seed: int = 0):
+        # Sebaran hasil atas semua kombinasi jawaban lengkap (bobot sekarang). Bila terlalu
+        # banyak untuk dienumerasi, diambil `samples` kombinasi acak seragam ("exact": False).
+        # {"exact", "total", "rows": [{label, count, share}], "categories": {kategori: share}}
+        if self._distribution is not None:
+            return self._distribution
+        complete = int(np.prod(self._n_opts, dtype=object))
+        if complete <= max(samples, TABLE_LIMIT):
+            grids = np.meshgrid(*[np.arange(n) for n in self._n_opts], indexing="ij")
+            idx = np.stack([g.ravel() for g in grids], axis=-1)
+            exact = True
+        else:
+            idx = np.random.default_rng(seed).integers(0, self._n_opts, size=(samples, self.n_questions))
+            exact = False
+        bits = np.asarray(self.outcome(idx)[1], dtype=np.int64)
+        counts = np.bincount(bits, minlength=len(self._labels))
+        total = int(counts.sum())
+        rows = [{"label": self._labels[m], "count": int(counts[m]), "share": float(counts[m] / total)}
+                for m in np.argsort(-counts, kind="stable") if counts[m]]
+        cats = {c: float(counts[(np.arange(len(counts)) >> k & 1).astype(bool)].sum() / total)
+                for k, c in enumerate(self.categories)}
+        self._distribution = {"exact": exact, "total": complete if exact else total, "rows": rows, "categories": cats}
+        return self._distribution
+
+def render_distribution_panel(engine: QuizEngine):
+    # Expander "sebaran hasil" untuk funpro1.py / funpro2.py.
+    import pandas as pd
+    import streamlit as st
+
+    with st.expander("📊 Sebaran hasil (semua kombinasi jawaban)", expanded=False):
+        dist = engine.outcome_distribution()
+        st.dataframe(pd.DataFrame(dist["rows"]).assign(share=lambda d: (d["share"] * 100).round(1)).rename(
+            columns={"label": "hasil", "count": "jumlah", "share": "%"}), hide_index=True, use_container_width=True)
+        st.caption(("Dari" if dist["exact"] else "Sampel acak dari") + f" {dist['total']:,} kombinasi jawaban lengkap · "
+                   + " · ".join(f"{c} menang {v:.0%}" for c, v in dist["categories"].items()))
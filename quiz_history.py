@@ -0,0 +1,408 @@
+import io
+import hashlib
+import os
+import time
+import uuid
+import sqlite3
+import atexit
+import shutil
+import argparse
+import tempfile
+import threading
+import weakref
+from collections import OrderedDict
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+# =========================
+# 📒 RIWAYAT KUIS (append-only, dibagi funpro1.py & funpro2.py)
+# =========================
+# Tiap submission = satu baris (responden, waktu, skor per kategori, hasil, jawaban) yang
+# tidak pernah diubah/dihapus. Tampilan riwayat membaca satu halaman saja lewat keyset
+# pagination ((kolom urut, id) > kursor) di atas indeks, jadi biaya rerun tetap konstan
+# berapa pun jumlah barisnya. Total baris = MAX(id) karena tabel hanya ditambah.
+#
+# QUIZ_HISTORY_BACKEND=sqlite (default, QUIZ_HISTORY_PATH) atau memory (per proses).
+PAGE_SIZE = 25
+EXPORT_BATCH = 50_000
+EXPORT_CACHE_FILES = 8
+TIMEZONE = ZoneInfo("Asia/Jakarta")
+RESPONDENT_PARAM = "rid"
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+def format_ts(ts: float):
+    # (tanggal, jam) WIB 24 jam, sama seperti riwayat lama di session_state.
+    n = datetime.fromtimestamp(ts, TIMEZONE)
+    return n.strftime("%d/%m/%Y"), n.strftime("%H:%M:%S")
+
+_CLOCK = None
+
+def format_ts_many(ts):
+    # Versi vektor format_ts untuk banyak baris: konversi zona waktu lewat pandas, tanggal
+    # diformat sekali per hari unik dan jam diambil dari tabel 86.400 string "HH:MM:SS".
+    global _CLOCK
+    import numpy as np
+    import pandas as pd
+
+    if _CLOCK is None:
+        _CLOCK = np.array([f"{s // 3600:02d}:{s // 60 % 60:02d}:{s % 60:02d}" for s in range(86400)], dtype=object)
+    local = pd.to_datetime(np.asarray(ts, dtype=float), unit="s", utc=True).tz_convert(TIMEZONE).tz_localize(None)
+    secs = local.to_numpy().astype("datetime64[s]").astype(np.int64)
+    days, clock = np.divmod(secs, 86400)
+    uniq, inverse = np.unique(days, return_inverse=True)
+    dates = np.array([d.strftime("%d/%m/%Y") for d in uniq.astype("datetime64[D]").astype(object)], dtype=object)
+    return dates[inverse], _CLOCK[clock]
+
+class MemoryHistory:
+    def __init__(self, categories):
+        self.categories = list(categories)
+        self.sort_columns = ["ts", "hasil", *self.categories]
+        self._rows = []  # dict per submission, urut id
+        self._lock = threading.Lock()
+
+    def append(self, respondent: str, app: str, tally: dict, label: str, answers: str = "", ts=None) -> int:
+        with self._lock:
+            row = {"id": len(self._rows) + 1, "ts": time.time() if ts is None else ts, "responden": respondent,
+                   "app": app, **{c: int(tally.get(c, 0)) for c in self.categories}, "hasil": label,
+                   "jawaban": answers}
+            self._rows.append(row)
+            return row["id"]
+
+    def total(self) -> int:
+        with self._lock:
+            return len(self._rows)
+
+    version = total
+
+    def page(self, sort: str = "ts", descending: bool = True, respondent=None, label=None, cursor=None,
+             limit: int = PAGE_SIZE):
+        if sort not in self.sort_columns:
+            raise ValueError(f"Kolom urut tidak dikenal: {sort}")
+        with self._lock:
+            rows = [r for r in self._rows
+                    if (respondent is None or r["responden"] == respondent) and (label is None or r["hasil"] == label)]
+        rows.sort(key=lambda r: (r[sort], r["id"]), reverse=descending)
+        if cursor is not None:
+            cursor = tuple(cursor)
+            rows = [r for r in rows if ((r[sort], r["id"]) < cursor if descending else (r[sort], r["id"]) > cursor)]
+        page = [dict(r) for r in rows[:limit]]
+        more = len(rows) > limit
+        return page, ((page[-1][sort], page[-1]["id"]) if more else None)
+
+class SQLiteHistory:
+    def __init__(self, categories, path: str = "quiz_history.sqlite3"):
+        self.categories = list(categories)
+        self.sort_columns = ["ts", "hasil", *self.categories]
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS quiz_history ("
+            " id INTEGER PRIMARY KEY, ts REAL NOT NULL, responden TEXT NOT NULL, app TEXT NOT NULL,"
+            " hasil TEXT NOT NULL, jawaban TEXT NOT NULL DEFAULT '')"
+        )
+        # Kategori baru di bank soal = kolom baru (baris lama bernilai 0).
+        existing = {r[1] for r in self._db.execute("PRAGMA table_info(quiz_history)")}
+        for cat in self.categories:
+            if cat not in existing:
+                self._db.execute(f"ALTER TABLE quiz_history ADD COLUMN {_quote(cat)} INTEGER NOT NULL DEFAULT 0")
+        # Indeks (kolom urut, id) untuk tiap kolom urut, versi berawalan hasil untuk filter hasil,
+        # dan (responden, ts, id) untuk "riwayat saya": tiap halaman = satu range scan indeks.
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_quiz_history_ts ON quiz_history(ts, id)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_quiz_history_resp ON quiz_history(responden, ts, id)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_quiz_history_hasil_id ON quiz_history(hasil, id)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_quiz_history_hasil_ts ON quiz_history(hasil, ts, id)")
+        for k, cat in enumerate(self.categories):
+            self._db.execute(f"CREATE INDEX IF NOT EXISTS idx_quiz_history_score_{k} ON quiz_history({_quote(cat)}, id)")
+            self._db.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_quiz_history_hasil_score_{k} ON quiz_history(hasil, {_quote(cat)}, id)"
+            )
+        self._db.commit()
+        self._select = ", ".join(["id", "ts", "responden", "app", *map(_quote, self.categories), "hasil", "jawaban"])
+        self._names = ["id", "ts", "responden", "app", *self.categories, "hasil", "jawaban"]
+
+    def append(self, respondent: str, app: str, tally: dict, label: str, answers: str = "", ts=None) -> int:
+        cols = ", ".join(["ts", "responden", "app", "hasil", "jawaban", *map(_quote, self.categories)])
+        values = [time.time() if ts is None else ts, respondent, app, label, answers,
+                  *(int(tally.get(c, 0)) for c in self.categories)]
+        with self._lock:
+            row_id = self._db.execute(
+                f"INSERT INTO quiz_history ({cols}) VALUES ({', '.join('?' * len(values))})", values
+            ).lastrowid
+            self._db.commit()
+            return row_id
+
+    def total(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT MAX(id) FROM quiz_history").fetchone()[0] or 0
+
+    # Append-only: id terbesar sekaligus penghitung versi (berubah hanya saat ada baris baru).
+    version = total
+
+    def page(self, sort: str = "ts", descending: bool = True, respondent=None, label=None, cursor=None,
+             limit: int = PAGE_SIZE):
+        # (baris, kursor halaman berikutnya atau None). Kursor = (nilai kolom urut, id) baris terakhir.
+        if sort not in self.sort_columns:
+            raise ValueError(f"Kolom urut tidak dikenal: {sort}")
+        col, op, direction = _quote(sort), "<" if descending else ">", "DESC" if descending else "ASC"
+        where, params = [], []
+        if respondent is not None:
+            where.append("responden = ?")
+            params.append(respondent)
+        if label is not None:
+            where.append("hasil = ?")
+            params.append(label)
+        if cursor is not None:
+            where.append(f"({col}, id) {op} (?, ?)")
+            params.extend(cursor)
+        sql = (f"SELECT {self._select} FROM quiz_history" + (" WHERE " + " AND ".join(where) if where else "")
+               + f" ORDER BY {col} {direction}, id {direction} LIMIT ?")
+        with self._lock:
+            rows = self._db.execute(sql, params + [limit + 1]).fetchall()
+        page = [dict(zip(self._names, r)) for r in rows[:limit]]
+        return page, ((page[-1][sort], page[-1]["id"]) if len(rows) > limit else None)
+
+def make_history(backend: str = "sqlite", categories=(), path: str = "quiz_history.sqlite3"):
+    if backend == "sqlite":
+        return SQLiteHistory(categories, path)
+    if backend == "memory":
+        return MemoryHistory(categories)
+    raise ValueError(f"Backend riwayat kuis tidak dikenal: {backend}")
+
+def make_history_store(categories):
+    return make_history(os.getenv("QUIZ_HISTORY_BACKEND", "sqlite"), categories,
+                        os.getenv("QUIZ_HISTORY_PATH", "quiz_history.sqlite3"))
+
+# =========================
+# 📤 EKSPOR (CSV / Parquet, streaming)
+# =========================
+# Ekspor dibaca per batch EXPORT_BATCH baris (urut waktu, keyset seperti page()) dan
+# di-encode per batch lewat ChunkWriter milik quiz_bulk, jadi riwayat tidak pernah dimuat
+# utuh. Baris dengan id > versi saat ekspor dimulai diabaikan, sehingga isi file selalu
+# cocok dengan versinya. ExportCache menyimpan hasilnya sebagai file sementara per
+# (format, responden) dan hanya membuat ulang bila versi riwayat berubah.
+EXPORT_FORMATS = {"csv": "text/csv", "parquet": "application/vnd.apache.parquet"}
+
+def export_frame(rows, categories):
+    import pandas as pd
+
+    dates, clock = format_ts_many([r["ts"] for r in rows])
+    return pd.DataFrame({
+        "tanggal": dates, "jam": clock,
+        "responden": [r["responden"] for r in rows], "app": [r["app"] for r in rows],
+        **{c: [r[c] for r in rows] for c in categories},
+        "hasil": [r["hasil"] for r in rows], "jawaban": [r["jawaban"] for r in rows],
+    })
+
+class _DrainSink(io.RawIOBase):
+    # Sink biner yang dikosongkan per potongan; tell() tetap menghitung total (dipakai Parquet
+    # untuk offset footer).
+    def __init__(self):
+        self._parts, self._pos = [], 0
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self._parts.append(bytes(b))
+        self._pos += len(b)
+        return len(b)
+
+    def tell(self):
+        return self._pos
+
+    def drain(self) -> bytes:
+        out = b"".join(self._parts)
+        self._parts.clear()
+        return out
+
+def export_chunks(store, fmt: str = "csv", respondent=None, version=None, batch: int = EXPORT_BATCH):
+    # Generator potongan bytes file CSV (';', BOM) atau Parquet (satu row group per batch).
+    from quiz_bulk import ChunkWriter
+
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Format ekspor tidak dikenal: {fmt}")
+    version = store.version() if version is None else version
+    sink = _DrainSink()
+    writer = ChunkWriter(sink, parquet=fmt == "parquet")
+    cursor = None
+    while True:
+        rows, cursor = store.page("ts", False, respondent, cursor=cursor, limit=batch)
+        rows = [r for r in rows if r["id"] <= version]
+        if rows:
+            writer.write(export_frame(rows, store.categories))
+            out = sink.drain()
+            if out:
+                yield out
+        if cursor is None:
+            break
+    writer.close()
+    out = sink.drain()
+    if out:
+        yield out
+
+class ExportCache:
+    # Tiap (format, responden) punya lock sendiri: ekspor besar hanya menahan permintaan
+    # ekspor yang sama, bukan format/responden lain. File dibangun di path sementara lalu
+    # dipublikasikan dengan os.replace, jadi pembaca tidak pernah melihat file setengah jadi.
+    def __init__(self, store, max_files: int = EXPORT_CACHE_FILES):
+        self.store = store
+        self.max_files = max_files
+        self.builds = 0
+        self._dir = tempfile.mkdtemp(prefix="quiz_export_")
+        atexit.register(shutil.rmtree, self._dir, True)
+        self._files = OrderedDict()  # (format, responden) -> (versi, path)
+        self._key_locks = {}         # (format, responden) -> Lock pembangunan file
+        self._lock = threading.Lock()
+
+    def _cached(self, key, version):
+        with self._lock:
+            cached = self._files.get(key)
+            if cached is not None and cached[0] >= version:
+                self._files.move_to_end(key)
+                return cached[1]
+            return None
+
+    def path(self, fmt: str, respondent=None) -> str:
+        # File ekspor untuk versi riwayat sekarang (dibuat ulang hanya bila versinya berubah).
+        version = self.store.version()
+        key = (fmt, respondent)
+        path = self._cached(key, version)
+        if path is not None:
+            return path
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            # Sesi lain mungkin baru saja membangun versi ini selagi kita menunggu.
+            path = self._cached(key, version)
+            if path is not None:
+                return path
+            name = hashlib.sha256(repr(key).encode("utf-8")).hexdigest()[:16]
+            path = os.path.join(self._dir, f"{name}.{fmt}")
+            fd, tmp = tempfile.mkstemp(suffix=".tmp", dir=self._dir)
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    for chunk in export_chunks(self.store, fmt, respondent, version):
+                        f.write(chunk)
+                os.replace(tmp, path)
+            except BaseException:
+                os.remove(tmp)
+                raise
+            with self._lock:
+                self.builds += 1
+                self._files[key] = (version, path)
+                self._files.move_to_end(key)
+                while len(self._files) > self.max_files:
+                    old_key, (_, old) = self._files.popitem(last=False)
+                    self._key_locks.pop(old_key, None)
+                    os.remove(old)
+            return path
+
+    def read(self, fmt: str, respondent=None) -> bytes:
+        # Isi file dibaca lalu file langsung ditutup. Media manager Streamlit tetap menyimpan
+        # seluruh isi di memori, jadi memberi file terbuka tidak menghemat apa pun.
+        try:
+            with open(self.path(fmt, respondent), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            # Terbuang dari cache (max_files) di antara path() dan open(): bangun ulang sekali.
+            with open(self.path(fmt, respondent), "rb") as f:
+                return f.read()
+
+_export_caches = weakref.WeakKeyDictionary()
+_export_caches_lock = threading.Lock()
+
+def get_export_cache(store) -> ExportCache:
+    # Satu cache per store (dibagi semua sesi dan kedua app dalam proses ini).
+    with _export_caches_lock:
+        if store not in _export_caches:
+            _export_caches[store] = ExportCache(store)
+        return _export_caches[store]
+
+# =========================
+# 🔌 STREAMLIT GLUE
+# =========================
+def respondent_id() -> str:
+    # Id responden disimpan di URL (?rid=...), jadi tetap sama setelah reload/bookmark.
+    import streamlit as st
+
+    rid = st.query_params.get(RESPONDENT_PARAM)
+    if not rid:
+        rid = uuid.uuid4().hex[:12]
+        st.query_params[RESPONDENT_PARAM] = rid
+    return rid
+
+def render_history_panel(store, engine, respondent: str):
+    import streamlit as st
+    import pandas as pd
+
+    @st.fragment
+    def panel():
+        # Fragment: ganti halaman/urutan/filter hanya merender ulang panel ini.
+        sort_labels = {"ts": "Waktu", "hasil": "Hasil", **{c: f"Skor {c}" for c in store.categories}}
+        c1, c2, c3, c4 = st.columns([2, 2, 2, 3])
+        scope = c1.radio("Tampilkan", ["Riwayat saya", "Semua responden"], key="hist_scope")
+        sort = c2.selectbox("Urutkan", list(sort_labels), format_func=sort_labels.get, key="hist_sort")
+        descending = c3.radio("Arah", ["Turun", "Naik"], horizontal=True, key="hist_dir") == "Turun"
+        labels = list(engine.bit_labels(range(1, 1 << len(engine.categories))))
+        label = c4.selectbox("Filter hasil", ["(semua)", *labels], key="hist_label")
+        query = (scope, sort, descending, label)
+        if st.session_state.get("hist_query") != query:
+            st.session_state.hist_query = query
+            st.session_state.hist_cursors = [None]  # kursor awal tiap halaman yang sudah dibuka
+
+        cursors = st.session_state.hist_cursors
+        rows, next_cursor = store.page(sort, descending, respondent if scope == "Riwayat saya" else None,
+                                       None if label == "(semua)" else label, cursor=cursors[-1])
+        if not rows:
+            st.caption("Belum ada riwayat kuis.")
+        else:
+            df = pd.DataFrame(rows)
+            df.insert(0, "jam", [format_ts(t)[1] for t in df["ts"]])
+            df.insert(0, "tanggal", [format_ts(t)[0] for t in df["ts"]])
+            df = df.drop(columns=["id", "ts", "app"])
+            st.dataframe(df, hide_index=True, use_container_width=True)
+        prev_col, info_col, next_col = st.columns([1, 3, 1])
+        # Callback jalan sebelum rerun fragment, jadi halaman baru langsung terbaca.
+        prev_col.button("◀ Sebelumnya", disabled=len(cursors) == 1, key="hist_prev", on_click=cursors.pop)
+        next_col.button("Berikutnya ▶", disabled=next_cursor is None, key="hist_next",
+                        on_click=cursors.append, args=(next_cursor,))
+        info_col.caption(f"Halaman {len(cursors)} · {store.total():,} submission tersimpan · id kamu: {respondent}")
+
+        # Ekspor lengkap (mengikuti pilihan "Tampilkan"): file baru dibuat saat tombol diklik,
+        # di thread terpisah, dan dipakai ulang selama riwayat belum berubah.
+        fmt_col, btn_col = st.columns([2, 3])
+        fmt = fmt_col.radio("Format ekspor", list(EXPORT_FORMATS), format_func=str.upper, horizontal=True,
+                            key="hist_export_fmt")
+        owner = respondent if scope == "Riwayat saya" else None
+        # Tombol aktif hanya bila cakupan ekspor (tanpa filter hasil) punya baris.
+        has_rows = bool(rows) or bool(store.page(respondent=owner, limit=1)[0])
+        exports = get_export_cache(store)
+        btn_col.download_button(f"💾 Unduh riwayat (.{fmt})", data=lambda: exports.read(fmt, owner),
+                                file_name=f"riwayat_quiz.{fmt}", mime=EXPORT_FORMATS[fmt], key="hist_export",
+                                disabled=not has_rows)
+
+    with st.expander("📒 Riwayat Kuis (klik untuk lihat/sembunyikan)", expanded=False):
+        panel()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ekspor riwayat quiz karier (CSV/Parquet, streaming).")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    exp = sub.add_parser("export")
+    exp.add_argument("output", help="Akhiran .parquet = Parquet, selain itu CSV (';').")
+    exp.add_argument("--respondent", help="Hanya riwayat responden ini; default semua.")
+    args = parser.parse_args(argv)
+
+    from quiz_engine import CATEGORIES
+
+    # Store mengikuti QUIZ_HISTORY_BACKEND / QUIZ_HISTORY_PATH seperti funpro1.py / funpro2.py.
+    store = make_history_store(CATEGORIES)
+    fmt = "parquet" if args.output.lower().endswith(".parquet") else "csv"
+    with open(args.output, "wb") as f:
+        for chunk in export_chunks(store, fmt, args.respondent):
+            f.write(chunk)
+
+if __name__ == "__main__":
+    main()
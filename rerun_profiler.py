@@ -0,0 +1,159 @@
+import io
+import os
+import json
+import time
+import pstats
+import cProfile
+import threading
+from collections import deque
+
+from metrics import percentile
+
+# =========================
+# ⏱️ RERUN PROFILER (opt-in, per bagian script)
+# =========================
+# Aktif lewat env APP_PROFILE=1 (semua sesi) atau query param ?profile=1 (satu sesi).
+# Nilai "cprofile" sekalian merekam cProfile tiap rerun dan menyimpan KEEP_SLOWEST rerun
+# paling lambat. Tiap rerun dicatat ke APP_PROFILE_JSONL (bila diisi) dan ringkasan
+# p50/p95 per bagian ditampilkan lewat render_panel().
+#
+#   trace = start_rerun("chatbot")
+#   trace.section("sidebar")   # menutup bagian sebelumnya, memulai "sidebar"
+#   ...
+#   trace.finish(); render_panel(trace)
+DEFAULT_WINDOW = 200
+KEEP_SLOWEST = 5
+PSTATS_LINES = 25
+TOTAL = "(total)"
+
+def profile_mode(query_value=None):
+    # None (mati), "timing", atau "cprofile". Query param mengalahkan env.
+    value = str(query_value or os.getenv("APP_PROFILE") or "").strip().lower()
+    if value in ("", "0", "off", "false", "no"):
+        return None
+    return "cprofile" if value == "cprofile" else "timing"
+
+class RerunProfiler:
+    # Dibagi semua sesi satu app dalam proses ini.
+    def __init__(self, app: str, window: int = DEFAULT_WINDOW, jsonl_path=None, keep_slowest: int = KEEP_SLOWEST):
+        self.app = app
+        self.window = window
+        self.keep_slowest = keep_slowest
+        self.slowest = []  # [(total detik, waktu, teks pstats)] paling lambat dulu
+        self._samples = {}
+        self._lock = threading.Lock()
+        self._jsonl = open(jsonl_path, "a", encoding="utf-8") if jsonl_path else None
+
+    def record(self, sections, total: float, profile_text=None, interrupted: bool = False):
+        with self._lock:
+            for name, seconds in list(sections) + [(TOTAL, total)]:
+                if name not in self._samples:
+                    self._samples[name] = deque(maxlen=self.window)
+                self._samples[name].append(seconds)
+            if profile_text is not None:
+                self.slowest.append((total, time.strftime("%H:%M:%S"), profile_text))
+                self.slowest.sort(key=lambda s: -s[0])
+                del self.slowest[self.keep_slowest:]
+            if self._jsonl is not None:
+                self._jsonl.write(json.dumps({
+                    "ts": time.time(), "app": self.app, "total": total, "interrupted": interrupted,
+                    "sections": dict(sections),
+                }) + "\n")
+                self._jsonl.flush()
+
+    def summary(self):
+        # Baris panel: p50/p95 per bagian (detik), urut sesuai kemunculan pertama; total di akhir.
+        with self._lock:
+            samples = {k: list(v) for k, v in self._samples.items()}
+        names = [n for n in samples if n != TOTAL] + ([TOTAL] if TOTAL in samples else [])
+        return [{"section": n, "n": len(samples[n]), "p50": percentile(samples[n], 0.5),
+                 "p95": percentile(samples[n], 0.95)} for n in names]
+
+class RerunTrace:
+    def __init__(self, profiler: RerunProfiler, cprofile: bool = False):
+        self.profiler = profiler
+        self.enabled = True
+        self.sections = []
+        self.done = False
+        self._name = None
+        self._start = self._mark = time.perf_counter()
+        self._cprof = None
+        if cprofile:
+            prof = cProfile.Profile()
+            try:
+                prof.enable()
+            except ValueError:
+                # Python 3.12+: hanya satu profiler aktif per proses (sesi lain sedang diprofil).
+                prof = None
+            self._cprof = prof
+
+    def section(self, name: str):
+        now = time.perf_counter()
+        if self._name is not None:
+            self.sections.append((self._name, now - self._mark))
+        self._name, self._mark = name, now
+
+    def finish(self, interrupted: bool = False):
+        # interrupted: rerun terpotong (st.rerun/st.stop); bagian yang sedang berjalan dibuang
+        # karena waktu selesainya tidak diketahui.
+        if self.done:
+            return
+        self.done = True
+        if not interrupted:
+            self.section(None)
+        text = None
+        if self._cprof is not None:
+            self._cprof.disable()
+            out = io.StringIO()
+            pstats.Stats(self._cprof, stream=out).sort_stats("cumulative").print_stats(PSTATS_LINES)
+            text = out.getvalue()
+        self.profiler.record(self.sections, self._mark - self._start, text, interrupted)
+
+class _NullTrace:
+    enabled = False
+
+    def section(self, name: str):
+        pass
+
+    def finish(self, interrupted: bool = False):
+        pass
+
+NULL_TRACE = _NullTrace()
+
+_profilers = {}
+_profilers_lock = threading.Lock()
+
+def get_profiler(app: str) -> RerunProfiler:
+    with _profilers_lock:
+        if app not in _profilers:
+            _profilers[app] = RerunProfiler(app, jsonl_path=os.getenv("APP_PROFILE_JSONL") or None)
+        return _profilers[app]
+
+# =========================
+# 🔌 STREAMLIT GLUE
+# =========================
+def start_rerun(app: str):
+    # Dipanggil sekali di awal script (setelah st.set_page_config).
+    import streamlit as st
+
+    prev = st.session_state.get("_rerun_trace")
+    if prev is not None:
+        prev.finish(interrupted=True)
+    mode = profile_mode(st.query_params.get("profile"))
+    trace = RerunTrace(get_profiler(app), cprofile=mode == "cprofile") if mode else NULL_TRACE
+    st.session_state._rerun_trace = trace if mode else None
+    return trace
+
+def render_panel(trace):
+    if not trace.enabled:
+        return
+    import streamlit as st
+
+    with st.expander("⏱️ Profil rerun"):
+        rows = trace.profiler.summary()
+        st.dataframe([{**r, "p50": round(r["p50"] * 1000, 1), "p95": round(r["p95"] * 1000, 1)} for r in rows],
+                     hide_index=True, use_container_width=True)
+        st.caption("Waktu dalam milidetik per bagian script (sampel terbaru semua sesi).")
+        for total, at, text in trace.profiler.slowest:
+            st.markdown(f"**Rerun {total * 1000:.0f} ms** · {at}")
+            st.code(text, language="text")
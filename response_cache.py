@@ -0,0 +1,156 @@
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+
+# =========================
+# 🗃️ RESPONSE CACHE
+# =========================
+# Cache jawaban untuk permintaan identik (model, messages, max_tokens, temperature).
+DEFAULT_MAX_ENTRIES = 1024
+DEFAULT_TTL = 24 * 3600.0
+
+def cache_key(messages_payload, model_name: str, max_tokens: int, temperature: float) -> str:
+    # Hash kanonik: hanya role/content yang dikirim ke upstream, urutan key dinormalkan.
+    canonical = json.dumps(
+        {
+            "model": model_name,
+            "messages": [{"role": m["role"], "content": m["content"]} for m in messages_payload],
+            "max_tokens": int(max_tokens),
+            "temperature": round(float(temperature), 4),
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+def should_cache(temperature: float, mode: str = "auto") -> bool:
+    # "auto": hanya untuk temperature 0 (jawaban deterministik); "always" / "off" memaksa.
+    if mode == "always":
+        return True
+    if mode == "off":
+        return False
+    return float(temperature) == 0.0
+
+class _Stats:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / total if total else 0.0,
+            "size": len(self),
+        }
+
+class MemoryCache(_Stats):
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, ttl: float = DEFAULT_TTL):
+        super().__init__()
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key: str):
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None and time.time() - item[1] > self.ttl:
+                del self._data[key]
+                self.evictions += 1
+                item = None
+            if item is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def set(self, key: str, value: str):
+        with self._lock:
+            self._data[key] = (value, time.time())
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+class SQLiteCache(_Stats):
+    def __init__(self, path: str = "response_cache.sqlite3", max_entries: int = DEFAULT_MAX_ENTRIES, ttl: float = DEFAULT_TTL):
+        super().__init__()
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+            " created_at REAL NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses(last_access)")
+        self._db.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def get(self, key: str):
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT value, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is not None and now - row[1] > self.ttl:
+                self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._db.commit()
+                self.evictions += 1
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self._db.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            self._db.commit()
+            self.hits += 1
+            return row[0]
+
+    def set(self, key: str, value: str):
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, value, created_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, value, now, now),
+            )
+            cur = self._db.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl,))
+            self.evictions += cur.rowcount
+            over = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0] - self.max_entries
+            if over > 0:
+                self._db.execute(
+                    "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY last_access LIMIT ?)",
+                    (over,),
+                )
+                self.evictions += over
+            self._db.commit()
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM responses")
+            self._db.commit()
+
+def make_cache(backend: str = "memory", path: str = "response_cache.sqlite3", **kwargs):
+    if backend == "sqlite":
+        return SQLiteCache(path, **kwargs)
+    if backend == "memory":
+        return MemoryCache(**kwargs)
+    raise ValueError(f"Backend cache tidak dikenal: {backend}")
@@ -0,0 +1,212 @@
+import time
+import threading
+from collections import deque
+
+from metrics import percentile
+from openrouter_client import abort_response
+
+# =========================
+# 🧭 MODEL ROUTER (hedged request + fallback)
+# =========================
+# Melacak waktu-ke-token-pertama dan tingkat error bergulir per model. Bila model utama
+# belum menghasilkan token dalam p95-nya (atau gagal), permintaan yang sama dikirim ke
+# model cadangan; yang lebih dulu menghasilkan token menang, yang kalah dihentikan
+# (socket respons-nya diputus). Model utama jalan di thread worker job itu sendiri dan
+# cadangan lewat executor engine yang sama, jadi hedging tetap di bawah batas MAX_INFLIGHT;
+# cadangan juga harus mendapat token rate limit (admit) atau tidak dikirim.
+STATS_WINDOW = 100
+MIN_SAMPLES = 5
+DEFAULT_HEDGE_DELAY = 8.0   # detik, sebelum ada cukup sampel
+MIN_HEDGE_DELAY = 1.0
+MAX_HEDGE_DELAY = 30.0
+
+class ModelStats:
+    def __init__(self, window: int = STATS_WINDOW):
+        self.first_token = deque(maxlen=window)
+        self.outcomes = deque(maxlen=window)
+
+    @property
+    def error_rate(self) -> float:
+        return self.outcomes.count(False) / len(self.outcomes) if self.outcomes else 0.0
+
+class _AttemptMeta(dict):
+    # meta satu percobaan. Respons yang baru tercatat setelah pemenang ditentukan langsung
+    # diputus, supaya yang kalah tidak menunggu token pertamanya dulu.
+    def __init__(self, race, model: str):
+        super().__init__()
+        self.race = race
+        self.model = model
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        if key == "response" and self.race.winner not in (None, self.model):
+            abort_response(value)
+
+class _Race:
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.started = 0
+        self.failed = []
+        self.winner = None
+        self.result = None
+        self.closed = False    # model utama selesai; hedge tidak boleh dimulai lagi
+        self.future = None     # attempt cadangan di executor
+        self.fallback = None
+        self.metas = {}        # model -> _AttemptMeta; berisi "response" saat streaming
+
+    def claim(self, model: str) -> bool:
+        with self.cond:
+            if self.winner is None:
+                self.winner = model
+                self.cond.notify_all()
+                losers = [meta.get("response") for m, meta in self.metas.items() if m != model]
+            else:
+                return self.winner == model
+        for r in losers:
+            if r is not None:
+                abort_response(r)
+        return True
+
+    def finish(self, model: str, meta, error):
+        with self.cond:
+            if self.winner is None and error is None:
+                self.winner = model  # selesai tanpa token (jawaban kosong) tetap dihitung menang
+            if self.winner == model:
+                self.result = (model, meta, error)
+            else:
+                self.failed.append((model, error))
+            self.cond.notify_all()
+
+class ModelRouter:
+    def __init__(self, client, candidates, metrics=None):
+        self.client = client
+        self.candidates = list(candidates)
+        self.metrics = metrics
+        self.stats = {}
+        self._lock = threading.Lock()
+
+    def _stats(self, model: str) -> ModelStats:
+        with self._lock:
+            if model not in self.stats:
+                self.stats[model] = ModelStats()
+            return self.stats[model]
+
+    def record(self, model: str, first_token, ok: bool):
+        s = self._stats(model)
+        with self._lock:
+            if first_token is not None:
+                s.first_token.append(first_token)
+            s.outcomes.append(ok)
+
+    def hedge_delay(self, model: str) -> float:
+        s = self._stats(model)
+        with self._lock:
+            samples = list(s.first_token)
+        if len(samples) < MIN_SAMPLES:
+            return DEFAULT_HEDGE_DELAY
+        return min(MAX_HEDGE_DELAY, max(MIN_HEDGE_DELAY, percentile(samples, 0.95)))
+
+    def fallback_for(self, model: str):
+        # Cadangan terbaik: breaker tidak terbuka, error rate terendah, lalu p50 tercepat,
+        # lalu urutan `candidates`.
+        ranked = []
+        for i, m in enumerate(self.candidates):
+            if m == model or self.client.breaker(m).state == "open":
+                continue
+            s = self._stats(m)
+            with self._lock:
+                p50 = percentile(list(s.first_token), 0.5)
+                ranked.append((s.error_rate, p50 if p50 is not None else DEFAULT_HEDGE_DELAY, i, m))
+        return min(ranked)[-1] if ranked else None
+
+    def run(self, job, args, stream: bool, executor, admit=None):
+        # Dipanggil dari worker engine; mengisi job lewat job._push. Mengembalikan
+        # (model yang menjawab, meta) atau melempar error bila semua percobaan gagal.
+        # `admit(model)` -> bool: token rate limit untuk permintaan cadangan.
+        payload, primary, api_key_str, max_tokens, temperature = args
+        race = _Race()
+
+        def attempt(model):
+            # Selalu streaming ke upstream (juga untuk job non-stream) agar yang kalah bisa
+            # diputus; job non-stream menerima teksnya sekaligus di akhir.
+            meta, started, first, parts = _AttemptMeta(race, model), time.monotonic(), None, []
+            with race.cond:
+                if race.winner is not None or job.cancelled:
+                    race.failed.append((model, None))
+                    race.cond.notify_all()
+                    return
+                race.metas[model] = meta
+            try:
+                gen = self.client.stream(payload, model, api_key_str, max_tokens, temperature, meta=meta)
+                try:
+                    for delta in gen:
+                        if first is None:
+                            first = time.monotonic() - started
+                        if job.cancelled or not race.claim(model):
+                            break
+                        if stream:
+                            job._push(delta)
+                        else:
+                            parts.append(delta)
+                finally:
+                    gen.close()
+                if not stream and race.claim(model):
+                    job._push("".join(parts))
+            except Exception as e:
+                # Error karena diputus oleh pemenang bukan kegagalan model.
+                if race.winner in (None, model):
+                    self.record(model, first, False)
+                race.finish(model, meta, e)
+                return
+            if race.winner == model:
+                self.record(model, first, True)
+            race.finish(model, meta, None)
+
+        def hedge():
+            with race.cond:
+                if race.closed or race.winner is not None or job.cancelled:
+                    return
+                fallback = self.fallback_for(primary)
+                if fallback is None or (admit is not None and not admit(fallback)):
+                    return
+                race.started += 1
+                race.fallback = fallback
+                race.future = executor.submit(attempt, fallback)
+            if self.metrics is not None:
+                self.metrics.inc("hedged", primary)
+
+        race.started = 1
+        timer = threading.Timer(self.hedge_delay(primary), hedge)
+        timer.daemon = True
+        timer.start()
+        attempt(primary)
+        timer.cancel()
+        with race.cond:
+            race.closed = True
+            future, fallback = race.future, race.fallback
+            primary_failed = race.result is None and race.winner is None
+        if primary_failed and not job.cancelled:
+            # Utama gagal sebelum ada pemenang: jalankan cadangan di thread ini bila belum
+            # sempat dimulai executor (tidak menunggu slot executor dari dalam worker).
+            if future is None:
+                fallback = self.fallback_for(primary)
+                if fallback is not None and (admit is None or admit(fallback)):
+                    with race.cond:
+                        race.started += 1
+                    attempt(fallback)
+            elif future.cancel():
+                attempt(fallback)
+        with race.cond:
+            race.cond.wait_for(lambda: race.result is not None or len(race.failed) == race.started)
+            if race.result is None:
+                errors = [e for _, e in race.failed if e is not None]
+                if errors:
+                    raise errors[-1]
+                return primary, {}  # dibatalkan sebelum ada jawaban
+            model, meta, error = race.result
+        meta = {k: v for k, v in meta.items() if k != "response"}
+        if error is not None:
+            raise error
+        if model != primary and self.metrics is not None:
+            self.metrics.inc("fallback_wins", model)
+        return model, meta
@@ -0,0 +1,232 @@
+import math
+import re
+import time
+import zlib
+import hashlib
+import threading
+import unicodedata
+from collections import OrderedDict
+
+# =========================
+# 🧲 SEMANTIC CACHE (pertanyaan mirip → jawaban tersimpan)
+# =========================
+# Embedding dihitung lokal tanpa jaringan: hashing vectorizer (kata, bigram kata, dan
+# trigram karakter) dengan bobot TF sublinear, dinormalkan L2. Vektor jarang disimpan
+# dalam indeks terbalik (fitur -> entri) sehingga lookup hanya menghitung dot product
+# dengan entri yang berbagi fitur.
+# Embedding ini leksikal, bukan makna: "saya suka kopi" vs "saya tidak suka kopi" sudah
+# ~0.91, "list dan tuple" vs "list dan set" ~0.84. Karena itu cosine >= threshold saja
+# belum hit; kata yang hanya ada di salah satu prompt juga harus berupa kata pengisi
+# ("tolong", "dong", "ya", ...) atau salah ketik satu huruf dari kata di prompt lain.
+# Angka dan kata negasi harus sama persis. Prompt yang sama setelah normalisasi (huruf
+# kecil, tanpa diakritik, spasi dirapikan, tanda baca akhir dibuang) langsung hit.
+# Semua pencocokan hanya di namespace yang sama (prompt system, model, max_tokens, temperature).
+# Hanya prompt pendek (satu giliran / konteks singkat) yang di-cache; percakapan panjang
+# terlalu bergantung pada konteks untuk dianggap "pertanyaan yang sama".
+DIM = 1 << 18
+# Dikalibrasi dengan embedding di atas + guard kata: variasi kata pengisi pada pertanyaan
+# beberapa kata sudah >= 0.80 ("jelaskan perbedaan tcp dan udp dong" 0.93).
+DEFAULT_THRESHOLD = 0.80
+DEFAULT_MAX_ENTRIES = 512
+DEFAULT_TTL = 24 * 3600.0
+MAX_TURN_MESSAGES = 3     # pesan non-system (user, assistant, user)
+MAX_PROMPT_CHARS = 2000
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+# Kata yang tidak mengubah pertanyaan bila ditambah/dihapus.
+FILLER_WORDS = frozenset("""
+    tolong mohon coba bisa bisakah dong deh sih ya yah kah nya lah kak bang min gan sis
+    jelaskan terangkan please pls explain tell me can could you the a an
+""".split())
+# Tidak pernah dianggap salah ketik dari kata lain.
+NEGATION_WORDS = frozenset("tidak tak bukan jangan belum tanpa not no never without".split())
+MIN_TYPO_LEN = 5
+
+def _normalize(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text.lower())
+    return "".join(c for c in text if not unicodedata.combining(c))
+
+def canonical(text: str) -> str:
+    # Kunci pencocokan persis. Tanda baca di tengah dipertahankan ("C++" bukan "C").
+    return " ".join(_normalize(text).split()).rstrip(" .?!")
+
+def _words(text: str):
+    return _WORD.findall(_normalize(text))
+
+def _one_edit(a: str, b: str) -> bool:
+    # Jarak edit <= 1 (sisip, hapus, ganti, atau tukar dua huruf bersebelahan).
+    if a == b:
+        return True
+    if abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) == len(b):
+        diff = [i for i in range(len(a)) if a[i] != b[i]]
+        return len(diff) == 1 or (len(diff) == 2 and diff[1] == diff[0] + 1
+                                  and a[diff[0]] == b[diff[1]] and a[diff[1]] == b[diff[0]])
+    short, long_ = (a, b) if len(a) < len(b) else (b, a)
+    i = 0
+    while i < len(short) and short[i] == long_[i]:
+        i += 1
+    return short[i:] == long_[i + 1:]
+
+def _typo_of(word: str, others) -> bool:
+    if len(word) < MIN_TYPO_LEN or not word.isalpha() or word in NEGATION_WORDS:
+        return False
+    return any(len(o) >= MIN_TYPO_LEN and o.isalpha() and o not in NEGATION_WORDS and _one_edit(word, o)
+               for o in others)
+
+def same_question(a_words, b_words) -> bool:
+    # Guard setelah cosine: kata yang berbeda hanya boleh kata pengisi atau salah ketik.
+    a, b = set(a_words), set(b_words)
+    only_a, only_b = a - b - FILLER_WORDS, b - a - FILLER_WORDS
+    return (all(_typo_of(w, only_b) for w in only_a)
+            and all(_typo_of(w, only_a) for w in only_b))
+
+def _features(text: str):
+    words = _words(text)
+    feats = list(words)
+    feats += [f"{a} {b}" for a, b in zip(words, words[1:])]
+    for w in words:
+        padded = f"#{w}#"
+        feats += [f"~{padded[i:i + 3]}" for i in range(len(padded) - 2)]
+    return feats
+
+def embed(text: str):
+    # {indeks: bobot} ber-norma 1 (hashing trick bertanda agar tabrakan saling meniadakan).
+    tf = {}
+    for f in _features(text):
+        h = zlib.crc32(f.encode("utf-8"))
+        idx, sign = h % DIM, 1.0 if (h >> 31) & 1 else -1.0
+        tf[idx] = tf.get(idx, 0.0) + sign
+    vec = {i: math.copysign(1.0 + math.log(abs(v)), v) for i, v in tf.items() if v}
+    norm = math.sqrt(sum(v * v for v in vec.values()))
+    return {i: v / norm for i, v in vec.items()} if norm else {}
+
+def prompt_of(messages_payload):
+    # (scope, teks) untuk payload yang layak di-cache, atau None. Scope memisahkan prompt
+    # system yang berbeda; teks = pesan non-system yang digabung.
+    system = [m["content"] for m in messages_payload if m["role"] == "system"]
+    turns = [m["content"] for m in messages_payload if m["role"] != "system"]
+    if not turns or len(turns) > MAX_TURN_MESSAGES or messages_payload[-1]["role"] != "user":
+        return None
+    text = "\n".join(turns)
+    if len(text) > MAX_PROMPT_CHARS:
+        return None
+    return hashlib.sha256("\n".join(system).encode("utf-8")).hexdigest()[:16], text
+
+class SemanticCache:
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 ttl: float = DEFAULT_TTL):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.saved_seconds = 0.0
+        self._entries = OrderedDict()  # id -> (namespace, vektor, jawaban, dibuat, latensi asli, kunci)
+        self._postings = {}            # fitur -> {id, ...}
+        self._exact = {}               # (namespace, canonical(teks)) -> id
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def namespace(scope: str, model_name: str, max_tokens: int, temperature: float) -> str:
+        return f"{scope}:{model_name}:{int(max_tokens)}:{round(float(temperature), 4)}"
+
+    def _drop(self, eid, evicted: bool = True):
+        namespace, vec, _, _, _, key = self._entries.pop(eid)
+        if self._exact.get((namespace, key)) == eid:
+            del self._exact[(namespace, key)]
+        for f in vec:
+            ids = self._postings.get(f)
+            if ids is not None:
+                ids.discard(eid)
+                if not ids:
+                    del self._postings[f]
+        if evicted:
+            self.evictions += 1
+
+    def _expire(self, now: float):
+        # Depan OrderedDict = paling lama tidak dipakai. Entri kedaluwarsa yang terselip di
+        # tengah tetap diabaikan oleh lookup dan nantinya terbuang oleh batas ukuran.
+        while self._entries:
+            eid, entry = next(iter(self._entries.items()))
+            if now - entry[3] <= self.ttl:
+                break
+            self._drop(eid)
+
+    def lookup(self, namespace: str, text: str):
+        # (jawaban, kemiripan, latensi yang dihemat) untuk entri paling mirip di namespace yang
+        # sama, atau None. Namespace selalu harus sama persis: prompt system, model dan
+        # parameter yang berbeda tidak pernah berbagi jawaban.
+        now = time.time()
+        with self._lock:
+            best = None
+            eid = self._exact.get((namespace, canonical(text)))
+            if eid is not None and now - self._entries[eid][3] <= self.ttl:
+                best = (eid, 1.0)
+            elif self.threshold < 1.0:
+                best = self._nearest(namespace, text, now)
+            if best is None:
+                self.misses += 1
+                return None
+            eid, score = best
+            self._entries.move_to_end(eid)
+            self.hits += 1
+            self.saved_seconds += self._entries[eid][4]
+            return self._entries[eid][2], min(score, 1.0), self._entries[eid][4]
+
+    def _nearest(self, namespace: str, text: str, now: float):
+        vec, words = embed(text), _words(text)
+        scores = {}
+        for f, w in vec.items():
+            for eid in self._postings.get(f, ()):
+                scores[eid] = scores.get(eid, 0.0) + w * self._entries[eid][1][f]
+        for eid, score in sorted(scores.items(), key=lambda s: -s[1]):
+            if score < self.threshold:
+                break
+            entry = self._entries[eid]
+            if entry[0] == namespace and now - entry[3] <= self.ttl and same_question(words, _words(entry[5])):
+                return eid, score
+        return None
+
+    def add(self, namespace: str, text: str, answer: str, latency: float = 0.0):
+        vec = embed(text)
+        if not vec or not answer:
+            return
+        now = time.time()
+        key = canonical(text)
+        with self._lock:
+            old = self._exact.get((namespace, key))
+            if old is not None:
+                self._drop(old, evicted=False)  # jawaban baru menggantikan yang lama
+            eid = self._next_id
+            self._next_id += 1
+            self._entries[eid] = (namespace, vec, answer, now, latency, key)
+            self._exact[(namespace, key)] = eid
+            for f in vec:
+                self._postings.setdefault(f, set()).add(eid)
+            self._expire(now)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._postings.clear()
+            self._exact.clear()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / total if total else 0.0,
+            "saved_seconds": self.saved_seconds,
+            "size": len(self),
+        }
@@ -0,0 +1,84 @@
+import time
+import weakref
+import threading
+
+# =========================
+# 🧠 SESSION MEMORY (budget per proses + spill sesi idle)
+# =========================
+# Mencatat ChatSession yang sedang dibuka tiap sesi pengguna. Pesan sudah tersimpan di
+# conversation store, jadi "spill" cukup melepas daftar pesan di memori; ChatSession
+# memuatnya lagi dari store saat diakses. Sesi yang idle lebih lama dari `idle_spill`
+# di-spill, dan bila total memori melewati `budget_bytes` sesi paling lama tidak dipakai
+# ikut di-spill. Entri memakai weakref: sesi Streamlit yang berakhir lepas dengan sendirinya.
+DEFAULT_BUDGET_MB = 256
+DEFAULT_IDLE_SPILL = 600.0  # detik
+# Sesi yang baru dipakai tidak di-spill demi budget (script-nya mungkin sedang berjalan).
+MIN_IDLE = 30.0
+SWEEP_INTERVAL = 5.0
+
+class SessionRegistry:
+    def __init__(self, budget_bytes: int = DEFAULT_BUDGET_MB * 1024 * 1024, idle_spill: float = DEFAULT_IDLE_SPILL):
+        self.budget_bytes = budget_bytes
+        self.idle_spill = idle_spill
+        self.spills = 0
+        self._sessions = {}  # session key -> (weakref ChatSession, last used)
+        self._last_sweep = 0.0
+        self._lock = threading.Lock()
+
+    def touch(self, session_key: str, chat):
+        now = time.monotonic()
+        with self._lock:
+            self._sessions[session_key] = (weakref.ref(chat), now)
+            due = now - self._last_sweep >= SWEEP_INTERVAL
+            if due:
+                self._last_sweep = now
+        if due:
+            self.sweep(now)
+
+    def _live(self):
+        # [(key, chat, last used)] untuk sesi yang masih hidup; entri mati dibuang.
+        with self._lock:
+            out = []
+            for key, (ref, used) in list(self._sessions.items()):
+                chat = ref()
+                if chat is None:
+                    del self._sessions[key]
+                else:
+                    out.append((key, chat, used))
+            return out
+
+    def sweep(self, now=None) -> int:
+        # Mengembalikan jumlah byte yang dilepas.
+        now = time.monotonic() if now is None else now
+        live = sorted(self._live(), key=lambda e: e[2])
+        freed = 0
+        for _, chat, used in live:
+            if now - used >= self.idle_spill and not chat.spilled:
+                freed += chat.spill()
+                self.spills += 1
+        total = sum(chat.memory_bytes() for _, chat, _ in live)
+        for _, chat, used in live:
+            if total <= self.budget_bytes:
+                break
+            if now - used >= MIN_IDLE and not chat.spilled:
+                released = chat.spill()
+                freed += released
+                total -= released
+                self.spills += 1
+        return freed
+
+    def total_bytes(self) -> int:
+        return sum(chat.memory_bytes() for _, chat, _ in self._live())
+
+    def report(self):
+        # Baris untuk panel admin: memori per sesi, terbesar dulu.
+        now = time.monotonic()
+        rows = [{
+            "session": key[:8],
+            "chat": chat.conv_title,
+            "messages": chat.message_count(),
+            "kb": round(chat.memory_bytes() / 1024, 1),
+            "idle_s": round(now - used),
+            "spilled": chat.spilled,
+        } for key, chat, used in self._live()]
+        return sorted(rows, key=lambda r: -r["kb"])
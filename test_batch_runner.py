@@ -0,0 +1,32 @@
+import io
+import json
+
+from chat_core import make_engine
+from batch_runner import run_batch, completed_ids
+
+MODEL = "mistralai/mistral-7b-instruct:free"
+
+def _run(tmp_path, engine, lines):
+    src, out = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+    src.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    counts = run_batch(str(src), str(out), MODEL, "k", concurrency=1, engine=engine, log=io.StringIO())
+    recs = {r["id"]: r for r in map(json.loads, out.read_text(encoding="utf-8").splitlines())}
+    return counts, recs, out
+
+def test_worker_survives_bad_item(mock, client_for, tmp_path):
+    engine = make_engine(client_for(mock), max_workers=1)
+    counts, recs, _ = _run(tmp_path, engine, [json.dumps({"id": "rusak", "messages": [{"role": "user"}]}),
+                                              json.dumps({"id": "ok", "prompt": "halo"})])
+    assert counts == {"ok": 1, "error": 1}
+    assert recs["rusak"]["error"] and recs["ok"]["error"] is None
+    assert recs["ok"]["reply"].startswith("kata0")
+
+def test_malformed_lines_are_recorded_and_batch_continues(mock, client_for, tmp_path):
+    engine = make_engine(client_for(mock), max_workers=1)
+    counts, recs, out = _run(tmp_path, engine, [json.dumps({"id": "a", "prompt": "halo"}), json.dumps({"id": "b"}),
+                                                "bukan json", json.dumps({"id": "d", "prompt": "lagi"})])
+    assert counts == {"ok": 2, "error": 2}
+    assert "butuh 'prompt' atau 'messages'" in recs["b"]["error"]
+    assert "JSON tidak valid" in recs["line-3"]["error"]
+    # Dijalankan ulang: hanya item yang sukses yang dilewati.
+    assert completed_ids(str(out)) == {"a", "d"}
@@ -0,0 +1,100 @@
+import time
+
+import pytest
+
+from context_window import estimate_tokens
+from conversation_store import MemoryStore, SQLiteStore
+from chat_core import ChatSession
+from session_memory import MIN_IDLE, SessionRegistry
+
+MODEL = "mistralai/mistral-7b-instruct:free"
+
+def _chat(store, n=4):
+    chat = ChatSession(store, store.create("uji"), MODEL)
+    for i in range(n):
+        chat.append("user" if i % 2 == 0 else "assistant", f"pesan {i} " + "x" * 200)
+    return chat
+
+def test_window_counts_follow_messages():
+    store = MemoryStore()
+    cid = store.create("uji")
+    seeded = ChatSession(store, cid, MODEL)
+    seeded.append("user", "pertanyaan pertama")
+    seeded.append("assistant", "jawaban pertama yang lebih panjang")
+
+    chat = ChatSession(store, cid, MODEL)  # dimuat ulang dari store
+    chat.append("user", "pertanyaan kedua")
+    chat.replace_last("pertanyaan kedua, diedit")
+    chat.spill()
+    chat.append("assistant", "jawaban kedua")
+    assert chat.window.counts == [estimate_tokens(m["content"], MODEL) for m in chat.messages]
+    assert chat.window.total == sum(chat.window.counts)
+
+def test_spill_releases_messages_and_reloads_on_access():
+    chat = _chat(MemoryStore())
+    before = [m["content"] for m in chat.messages]
+    assert chat.spill() > 0 and chat.spilled and chat.memory_bytes() == 0
+    assert [m["content"] for m in chat.messages] == before and not chat.spilled
+
+def test_registry_spills_idle_sessions():
+    store = MemoryStore()
+    idle, busy = _chat(store), _chat(store)
+    registry = SessionRegistry(idle_spill=60.0)
+    registry.touch("idle", idle)
+    registry.touch("busy", busy)
+    now = time.monotonic()
+    registry._sessions["idle"] = (registry._sessions["idle"][0], now - 120)
+    assert registry.sweep(now) > 0
+    assert idle.spilled and not busy.spilled and registry.spills == 1
+
+def test_registry_spills_least_recent_over_budget():
+    store = MemoryStore()
+    chats = [_chat(store) for _ in range(3)]
+    registry = SessionRegistry(budget_bytes=chats[0].memory_bytes() + 1, idle_spill=3600.0)
+    now = time.monotonic()
+    for k, chat in enumerate(chats):
+        registry.touch(str(k), chat)
+        registry._sessions[str(k)] = (registry._sessions[str(k)][0], now - MIN_IDLE - 10 + k)
+    registry.sweep(now)
+    assert [c.spilled for c in chats] == [True, True, False]
+    assert registry.total_bytes() <= registry.budget_bytes
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    return MemoryStore() if request.param == "memory" else SQLiteStore(str(tmp_path / "chat.sqlite3"))
+
+def _contents(chat):
+    return [m["content"] for m in chat.messages if m["role"] != "system"]
+
+def test_regenerate_keeps_old_answer_as_sibling(store):
+    chat = ChatSession(store, store.create("uji"), MODEL)
+    chat.append("user", "tanya")
+    chat.append("assistant", "jawaban lama")
+    old_id = chat.messages[-1]["id"]
+    chat.replace_last("jawaban baru")
+    new_id = chat.messages[-1]["id"]
+    assert chat.siblings()[new_id] == [old_id, new_id]
+    chat.switch(old_id)
+    assert _contents(chat) == ["tanya", "jawaban lama"]
+    assert _contents(ChatSession(store, chat.id, MODEL)) == ["tanya", "jawaban lama"]  # head tersimpan
+
+def test_edit_branches_and_switch_returns_to_latest_leaf(store):
+    chat = ChatSession(store, store.create("uji"), MODEL)
+    for text in ("q1", "a1", "q2", "a2"):
+        chat.append("user" if text[0] == "q" else "assistant", text)
+    q2 = chat.messages[3]["id"]  # messages[0] = prompt system
+    chat.edit(3, "q2 versi baru")
+    chat.append("assistant", "a2 baru")
+    assert _contents(chat) == ["q1", "a1", "q2 versi baru", "a2 baru"]
+    chat.switch(q2)  # cabang lama sampai ujungnya
+    assert _contents(chat) == ["q1", "a1", "q2", "a2"]
+    assert chat.window.counts == [estimate_tokens(m["content"], MODEL) for m in chat.messages]
+
+def test_fork_continues_from_earlier_message(store):
+    chat = ChatSession(store, store.create("uji"), MODEL)
+    for text in ("q1", "a1", "q2", "a2"):
+        chat.append("user" if text[0] == "q" else "assistant", text)
+    chat.fork(2)  # a1
+    chat.append("user", "q2 lain")
+    assert _contents(ChatSession(store, chat.id, MODEL)) == ["q1", "a1", "q2 lain"]
+    assert len(chat.siblings()[chat.messages[-1]["id"]]) == 2
@@ -0,0 +1,32 @@
+from context_window import ContextWindow, SUMMARY_HEADER, estimate_tokens, prompt_budget
+from chat_core import build_payload
+
+MODEL = "mistralai/mistral-7b-instruct:free"  # jendela 32768 token
+
+def _conversation(turns=40, size=1200):
+    msgs = [{"role": "system", "content": "kamu asisten"}]
+    for i in range(turns):
+        msgs.append({"role": "user" if i % 2 == 0 else "assistant", "content": f"{i} " + "x" * size})
+    return msgs
+
+def test_without_cap_whole_model_window_is_used():
+    msgs = _conversation()  # ~15k token: muat di jendela model, melebihi 8192
+    assert sum(estimate_tokens(m["content"], MODEL) for m in msgs) > 8192
+    assert build_payload(ContextWindow(MODEL), msgs, [MODEL], 1024) == msgs
+
+def test_cap_is_opt_in_and_keeps_system_and_latest():
+    msgs = _conversation()
+    payload = build_payload(ContextWindow(MODEL), msgs, [MODEL], 1024, context_budget=4096)
+    assert payload[0] == msgs[0] and payload[-1] == msgs[-1] and len(payload) < len(msgs)
+    assert sum(estimate_tokens(m["content"], MODEL) for m in payload) <= 4096
+
+def test_smallest_model_window_wins():
+    assert prompt_budget("model/tak-dikenal", 1024) < prompt_budget(MODEL, 1024)
+    msgs = _conversation()
+    payload = build_payload(ContextWindow(MODEL), msgs, [MODEL, "model/tak-dikenal"], 1024)
+    assert sum(estimate_tokens(m["content"], MODEL) for m in payload) <= prompt_budget("model/tak-dikenal", 1024)
+
+def test_summarize_replaces_dropped_messages():
+    msgs = _conversation()
+    payload = build_payload(ContextWindow(MODEL), msgs, [MODEL], 1024, context_budget=4096, summarize=True)
+    assert payload[1]["role"] == "system" and payload[1]["content"].startswith(SUMMARY_HEADER)
@@ -0,0 +1,57 @@
+import pytest
+
+from conversation_store import MemoryStore, SQLiteStore
+from chat_core import ChatSession, default_chat_id
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    return MemoryStore() if request.param == "memory" else SQLiteStore(str(tmp_path / "chat.sqlite3"))
+
+def test_conversations_are_scoped_to_owner(store):
+    a = store.create("milik A", owner="A")
+    store.append_message(a, None, "user", "nomor rekening saya 12345")
+    assert store.list_conversations(owner="B") == [] and store.count(owner="B") == 0
+    assert store.load(a, owner="B") is None and store.info(a, owner="B") is None
+    store.rename(a, "diambil B", owner="B")
+    store.delete(a, owner="B")
+    assert store.list_conversations(owner="A") == [(a, "milik A")]
+    with pytest.raises(KeyError):
+        ChatSession(store, a, owner="B")
+
+def test_default_chat_id_creates_chat_for_new_owner(store):
+    a = default_chat_id(store, "A")
+    assert default_chat_id(store, "A") == a
+    b = default_chat_id(store, "B")
+    assert b != a and store.list_conversations(owner="B") == [(b, "Percakapan 1")]
+
+def test_sqlite_adds_owner_column_to_old_database(tmp_path):
+    import sqlite3
+
+    path = str(tmp_path / "lama.sqlite3")
+    db = sqlite3.connect(path)
+    db.execute("CREATE TABLE conversations (id TEXT PRIMARY KEY, title TEXT NOT NULL, created_at TEXT NOT NULL,"
+               " head_id INTEGER)")
+    db.execute("INSERT INTO conversations VALUES ('c1', 'lama', '2024-01-01T00:00:00', NULL)")
+    db.commit()
+    db.close()
+    store = SQLiteStore(path)
+    assert store.list_conversations(owner="") == [("c1", "lama")]
+    assert store.list_conversations(owner="A") == []
+
+def test_search_only_returns_own_conversations(store):
+    a = store.create("A", owner="A")
+    store.append_message(a, None, "user", "nomor rekening saya 12345")
+    b = store.create("B", owner="B")
+    store.append_message(b, None, "user", "rekening tabungan B")
+    assert [cid for cid, _, _ in store.search("rekening", owner="B")] == [b]
+    assert [cid for cid, _, _ in store.search("12345", owner="B")] == []
+    assert {cid for cid, _, _ in store.search("rekening")} == {a, b}  # owner=None: alat admin/CLI
+
+def test_search_prefix_snippet_and_one_hit_per_conversation(store):
+    a = store.create("resep", owner="A")
+    first = store.append_message(a, None, "user", "resep rendang padang")
+    store.append_message(a, first, "assistant", "rendang dimasak lama dengan santan")
+    store.append_message(store.create("lain", owner="A"), None, "user", "cuaca hari ini")
+    hits = store.search("rend", owner="A")  # kata terakhir dicari sebagai prefiks
+    assert [(cid, title) for cid, title, _ in hits] == [(a, "resep")]
+    assert "**" in hits[0][2]
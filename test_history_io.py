@@ -0,0 +1,54 @@
+import io
+import gzip
+import json
+
+import pytest
+
+from conversation_store import MemoryStore
+from history_io import export_bytes, import_ndjson
+
+BASE = {"v": 1, "conv": "c1", "title": "impor", "conv_created_at": "2024-01-01T00:00:00",
+        "created_at": "2024-01-01T00:00:00"}
+
+def _ndjson(*recs) -> io.BytesIO:
+    return io.BytesIO("".join(json.dumps(r) + "\n" for r in recs).encode("utf-8"))
+
+def test_import_is_atomic_and_defaults_head_to_last():
+    store = MemoryStore()
+    bad = _ndjson({**BASE, "id": 1, "parent": None, "role": "system", "content": "s"},
+                  {**BASE, "id": 2, "parent": 1, "role": "user", "content": "u"},
+                  {**BASE, "id": 3, "parent": 99, "role": "assistant", "content": "a"})
+    with pytest.raises(ValueError, match="parent 99"):
+        import_ndjson(store, bad)
+    assert store.list_conversations() == []
+
+    good = _ndjson({**BASE, "id": 1, "parent": None, "role": "system", "content": "s"},
+                   {**BASE, "id": 2, "parent": 1, "role": "user", "content": "u"})
+    assert import_ndjson(store, good) == {"conversations": 1, "messages": 2}
+    [(cid, _)] = store.list_conversations()
+    assert [m["content"] for m in store.load(cid)["messages"]] == ["s", "u"]
+
+def test_export_round_trip_keeps_branches_and_head():
+    src = MemoryStore()
+    cid = src.create("cabang", owner="A")
+    root = src.load(cid)["messages"][0]["id"]
+    q = src.append_message(cid, root, "user", "pertanyaan")
+    src.append_message(cid, q, "assistant", "jawaban lama")
+    src.append_message(cid, q, "assistant", "jawaban baru")
+
+    dst = MemoryStore()
+    assert import_ndjson(dst, io.BytesIO(export_bytes(src, owner="A")), owner="A") == {"conversations": 1, "messages": 4}
+    [(new_id, title)] = dst.list_conversations(owner="A")
+    assert title == "cabang"
+    assert [m["content"] for m in dst.load(new_id)["messages"]][1:] == ["pertanyaan", "jawaban baru"]
+
+def test_export_and_import_are_scoped_to_owner():
+    store = MemoryStore()
+    store.create("rahasia A", owner="A")
+    mine = store.create("punya B", owner="B")
+    lines = gzip.decompress(export_bytes(store, owner="B")).decode("utf-8").splitlines()
+    assert {json.loads(l)["conv"] for l in lines} == {mine}
+    assert gzip.decompress(export_bytes(store, [store.list_conversations(owner="A")[0][0]], owner="B")) == b""
+
+    import_ndjson(store, _ndjson({**BASE, "id": 1, "parent": None, "role": "user", "content": "u"}), owner="B")
+    assert store.count(owner="A") == 1 and store.count(owner="B") == 2
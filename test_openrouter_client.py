@@ -0,0 +1,12 @@
+MODEL = "mistralai/mistral-7b-instruct:free"
+MESSAGES = [{"role": "user", "content": "halo"}]
+
+def test_stream_yields_deltas_and_usage(mock, client_for):
+    meta = {}
+    deltas = list(client_for(mock).stream(MESSAGES, MODEL, "k", 64, 0.5, meta=meta))
+    assert deltas == [f"kata{i} " for i in range(5)]
+    assert meta["usage"]["completion_tokens"] == 5
+
+def test_chat_returns_same_text_as_stream(mock, client_for):
+    client = client_for(mock)
+    assert client.chat(MESSAGES, MODEL, "k", 64, 0.5) == "".join(client.stream(MESSAGES, MODEL, "k", 64, 0.5))
@@ -0,0 +1,50 @@
+import time
+
+import pytest
+
+from mock_openrouter import MockConfig
+from openrouter_client import CircuitBreaker
+
+MODEL = "mistralai/mistral-7b-instruct:free"
+MESSAGES = [{"role": "user", "content": "halo"}]
+ANSWER = "".join(f"kata{i} " for i in range(5))
+
+def _scripted(cfg: MockConfig, outcomes):
+    # Hasil per permintaan sesuai urutan ("429", "500", "ok"), lalu "ok" seterusnya.
+    outcomes = list(outcomes)
+    roll = cfg.roll
+
+    def scripted():
+        roll()  # tetap menghitung cfg.requests
+        return outcomes.pop(0) if outcomes else "ok"
+
+    cfg.roll = scripted
+
+@pytest.mark.parametrize("status", ["429", "500"])
+def test_retries_then_succeeds(mock, client_for, status):
+    _scripted(mock.config, [status, status])
+    assert client_for(mock, max_retries=3).chat(MESSAGES, MODEL, "k", 64, 0.5) == ANSWER
+    assert mock.config.requests == 3
+
+def test_gives_up_after_max_retries(mock, client_for):
+    _scripted(mock.config, ["500"] * 10)
+    with pytest.raises(RuntimeError, match="500"):
+        client_for(mock, max_retries=2).chat(MESSAGES, MODEL, "k", 64, 0.5)
+    assert mock.config.requests == 3
+
+def test_breaker_open_half_open_close(mock, client_for):
+    client = client_for(mock, max_retries=0)
+    client.breakers[MODEL] = breaker = CircuitBreaker(threshold=2, cooldown=0.2)
+    _scripted(mock.config, ["500", "500"])
+    for _ in range(2):
+        with pytest.raises(RuntimeError, match="500"):
+            client.chat(MESSAGES, MODEL, "k", 64, 0.5)
+    assert breaker.state == "open"
+    with pytest.raises(RuntimeError, match="sementara tidak tersedia"):
+        client.chat(MESSAGES, MODEL, "k", 64, 0.5)
+    assert mock.config.requests == 2  # ditolak tanpa menghubungi upstream
+
+    time.sleep(0.25)
+    assert breaker.state == "half-open"
+    assert client.chat(MESSAGES, MODEL, "k", 64, 0.5) == ANSWER
+    assert breaker.state == "closed"
@@ -0,0 +1,52 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from quiz_engine import QuizEngine
+from quiz_bulk import COMPLETE_COLUMN, LABEL_COLUMN, read_chunks, score_file, score_frame
+
+@pytest.fixture(scope="module")
+def engine():
+    return QuizEngine()
+
+def _answers(engine, n=1000, seed=1):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({"id": [f"r{i}" for i in range(n)]})
+    for q, opts in enumerate(engine.options):
+        picks = rng.integers(0, len(opts), n)
+        df[f"q{q}"] = [opts[p] if p % 2 else str(p) for p in picks]  # label dan nomor opsi campur
+    df.loc[3, "q0"] = None
+    df.loc[4, "q1"] = "opsi yang tidak ada"
+    return df
+
+@pytest.mark.parametrize("target_name", ["hasil.csv", "hasil.parquet"])
+def test_chunked_scoring_matches_whole_frame(engine, target_name):
+    df = _answers(engine)
+    source = io.BytesIO(df.to_csv(index=False).encode("utf-8"))
+    out = io.BytesIO()
+    stats = score_file(engine, source, out, name="jawaban.csv", target_name=target_name, chunk_rows=128)
+    assert stats["rows"] == len(df)
+    out.seek(0)
+    got = pd.concat(read_chunks(out, target_name), ignore_index=True)
+    want = score_frame(engine, df.astype(object).where(df.notna(), None))
+    assert got["id"].tolist() == want["id"].tolist()
+    assert got[LABEL_COLUMN].tolist() == want[LABEL_COLUMN].tolist()
+    for cat in engine.categories:
+        assert got[cat].astype(int).tolist() == want[cat].tolist()
+    assert got[COMPLETE_COLUMN].astype(str).str.lower().tolist() == want[COMPLETE_COLUMN].astype(str).str.lower().tolist()
+    assert want[COMPLETE_COLUMN].sum() == len(df) - 2
+
+def test_row_scores_match_single_answer_result(engine):
+    df = _answers(engine, n=50)
+    scored = score_frame(engine, df)
+    for i in (0, 1, 2, 5):
+        answers = [engine.options[q][int(v)] if str(v).isdigit() else v for q, v in enumerate(df.iloc[i, 1:])]
+        result = engine.result(answers)
+        assert {c: scored.loc[i, c] for c in engine.categories} == result["tally"]
+        assert scored.loc[i, LABEL_COLUMN] == result["label"]
+
+def test_missing_question_column_is_an_error(engine):
+    with pytest.raises(ValueError, match="q0"):
+        score_frame(engine, pd.DataFrame({"q1": ["a"]}))
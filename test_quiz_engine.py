@@ -0,0 +1,54 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from quiz_engine import CATEGORIES, QUESTIONS, QuizEngine, join_atau
+
+def _reference(answers):
+    # Skoring lama funpro1/funpro2: jumlahkan poin opsi yang dijawab, semua skor tertinggi menang.
+    tally = {c: 0 for c in CATEGORIES}
+    for item, ans in zip(QUESTIONS, answers):
+        if ans:
+            for cat, pts in item["options"][ans].items():
+                tally[cat] += pts
+    best = max(tally.values())
+    return tally, join_atau([c for c in CATEGORIES if tally[c] == best])
+
+def _all_answers():
+    return itertools.product(*[[None, *item["options"]] for item in QUESTIONS])
+
+@pytest.mark.parametrize("table_limit", [None, 16])  # 16: bank dipecah ke beberapa tabel parsial
+def test_every_combination_matches_old_scoring(table_limit):
+    engine = QuizEngine() if table_limit is None else QuizEngine(table_limit=table_limit)
+    assert engine.full_table == (table_limit is None)
+    for answers in _all_answers():
+        tally, label = _reference(answers)
+        result = engine.result(answers)
+        assert result["tally"] == tally and result["label"] == label
+
+def test_vectorised_outcome_matches_single_results():
+    engine = QuizEngine()
+    answers = list(_all_answers())
+    idx = np.stack([engine.encode(a) for a in answers])
+    tally, bits = engine.outcome(idx)
+    labels = engine.bit_labels(bits)
+    for i in range(0, len(answers), 97):
+        result = engine.result(answers[i])
+        assert [int(v) for v in tally[i]] == [result["tally"][c] for c in CATEGORIES]
+        assert labels[i] == result["label"]
+
+def test_outcome_distribution_counts_every_complete_combination():
+    from collections import Counter
+
+    want = Counter(_reference(a)[1] for a in itertools.product(*[list(item["options"]) for item in QUESTIONS]))
+    dist = QuizEngine().outcome_distribution()
+    assert dist["exact"] and dist["total"] == 4 ** len(QUESTIONS) == sum(r["count"] for r in dist["rows"])
+    assert {r["label"]: r["count"] for r in dist["rows"]} == dict(want)
+    assert [r["count"] for r in dist["rows"]] == sorted((r["count"] for r in dist["rows"]), reverse=True)
+
+def test_outcome_distribution_samples_when_too_large():
+    questions = QUESTIONS * 4  # 4^20 kombinasi: diambil sampel
+    dist = QuizEngine(questions, table_limit=1 << 12).outcome_distribution(samples=5000)
+    assert not dist["exact"] and dist["total"] == 5000
+    assert sum(r["share"] for r in dist["rows"]) == pytest.approx(1.0)
@@ -0,0 +1,76 @@
+import io
+import threading
+
+import pytest
+
+import quiz_history
+from quiz_history import ExportCache, make_history
+
+CATS = ["A", "B"]
+
+@pytest.fixture(params=["memory", "sqlite"])
+def history(request, tmp_path):
+    return make_history(request.param, CATS, str(tmp_path / "quiz.sqlite3"))
+
+def _fill(history, n=25):
+    for i in range(n):
+        history.append(f"r{i % 3}", "app", {"A": i % 4, "B": 3 - i % 4}, "AB"[i % 2], ts=1000.0 + i // 2)
+
+def _all_pages(history, **kw):
+    rows, cursor = [], None
+    while True:
+        page, cursor = history.page(cursor=cursor, limit=4, **kw)
+        rows += page
+        if cursor is None:
+            return rows
+
+@pytest.mark.parametrize("sort", ["ts", "hasil", "A"])
+@pytest.mark.parametrize("descending", [True, False])
+def test_keyset_pages_cover_every_row_once_in_order(history, sort, descending):
+    _fill(history)
+    rows = _all_pages(history, sort=sort, descending=descending)
+    keys = [(r[sort], r["id"]) for r in rows]
+    assert keys == sorted(keys, reverse=descending) and len(set(keys)) == 25
+
+def test_keyset_pages_filter_respondent_and_label(history):
+    _fill(history)
+    rows = _all_pages(history, respondent="r1", label="B")
+    assert rows and all(r["responden"] == "r1" and r["hasil"] == "B" for r in rows)
+    assert len(rows) == sum(1 for i in range(25) if i % 3 == 1 and i % 2 == 1)
+
+def test_export_cache_rebuilds_only_when_version_changes(history):
+    import pandas as pd
+
+    _fill(history, 5)
+    cache = ExportCache(history)
+    first = cache.read("csv")
+    assert cache.read("csv") == first and cache.builds == 1
+    assert len(pd.read_csv(io.BytesIO(first), sep=";", encoding="utf-8-sig")) == 5
+    history.append("r9", "app", {"A": 1}, "A")
+    assert len(pd.read_parquet(io.BytesIO(cache.read("parquet")))) == 6
+    assert len(pd.read_csv(io.BytesIO(cache.read("csv")), sep=";", encoding="utf-8-sig")) == 6
+    assert cache.builds == 3
+    assert len(pd.read_csv(io.BytesIO(cache.read("csv", "r9")), sep=";", encoding="utf-8-sig")) == 1
+
+def test_slow_export_does_not_block_other_formats(history, monkeypatch):
+    _fill(history, 3)
+    started, release = threading.Event(), threading.Event()
+    real = quiz_history.export_chunks
+
+    def chunks(store, fmt, respondent=None, version=None):
+        if fmt == "parquet":
+            started.set()
+            release.wait(5)
+        return real(store, fmt, respondent, version)
+
+    monkeypatch.setattr(quiz_history, "export_chunks", chunks)
+    cache = ExportCache(history)
+    slow = threading.Thread(target=cache.read, args=("parquet",))
+    slow.start()
+    assert started.wait(5)
+    try:
+        assert cache.read("csv")  # selesai walau ekspor parquet masih berjalan
+    finally:
+        release.set()
+        slow.join(5)
+    assert cache.builds == 2
@@ -0,0 +1,61 @@
+import pytest
+
+import response_cache
+from response_cache import cache_key, make_cache, should_cache
+
+MESSAGES = [{"role": "system", "content": "s"}, {"role": "user", "content": "halo"}]
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(response_cache.time, "time", lambda: now[0])
+    return now
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make(request, tmp_path):
+    return lambda **kw: make_cache(request.param, str(tmp_path / "cache.sqlite3"), **kw)
+
+def test_key_depends_only_on_request_content():
+    key = cache_key(MESSAGES, "m", 64, 0.0)
+    extra = [dict(m, id=7, ts="x") for m in MESSAGES]  # field lokal tidak dikirim ke upstream
+    assert cache_key(extra, "m", 64, 0) == key
+    assert cache_key(MESSAGES, "m2", 64, 0.0) != key
+    assert cache_key(MESSAGES, "m", 128, 0.0) != key
+    assert cache_key(MESSAGES[1:], "m", 64, 0.0) != key
+
+def test_should_cache_modes():
+    assert should_cache(0.0) and not should_cache(0.7)
+    assert should_cache(0.7, "always") and not should_cache(0.0, "off")
+
+def test_least_recently_used_is_evicted(make, clock):
+    cache = make(max_entries=2)
+    cache.set("a", "A")
+    clock[0] += 1
+    cache.set("b", "B")
+    clock[0] += 1
+    assert cache.get("a") == "A"  # "a" jadi yang terbaru dipakai
+    clock[0] += 1
+    cache.set("c", "C")
+    assert cache.get("b") is None and cache.get("a") == "A" and cache.get("c") == "C"
+    assert cache.stats()["evictions"] == 1 and len(cache) == 2
+
+def test_entries_expire_after_ttl(make, clock):
+    cache = make(ttl=10.0)
+    cache.set("a", "A")
+    clock[0] += 5
+    assert cache.get("a") == "A"
+    clock[0] += 6
+    assert cache.get("a") is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+def test_engine_answers_repeat_request_from_cache(mock, client_for):
+    from chat_core import make_engine
+
+    engine = make_engine(client_for(mock), cache=make_cache("memory"), max_workers=2)
+    first = engine.submit(MESSAGES, "m", "k", 64, 0.0)
+    assert first.wait(5) and not first.cache_hit
+    again = engine.submit(MESSAGES, "m", "k", 64, 0.0)
+    assert again.done and again.cache_hit and again.reply() == first.reply()
+    warm = engine.submit(MESSAGES, "m", "k", 64, 0.7)  # temperature > 0: tidak dari cache
+    assert warm.wait(5) and not warm.cache_hit
+    assert mock.config.requests == 2
@@ -0,0 +1,65 @@
+import time
+
+import pytest
+
+from mock_openrouter import MockConfig, start_mock
+from gen_engine import GenerationEngine
+from router import ModelRouter
+
+MESSAGES = [{"role": "user", "content": "halo"}]
+ANSWER = "".join(f"kata{i} " for i in range(5))
+
+@pytest.fixture
+def slow():
+    srv = start_mock(MockConfig(latency=2.0, token_delay=0.0, tokens=5))
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+
+class _PerModel:
+    # Model "utama" dan "cadangan" dilayani dua server mock yang berbeda.
+    def __init__(self, clients):
+        self.clients = clients
+
+    def breaker(self, model):
+        return self.clients[model].breaker(model)
+
+    def stream(self, *args, **kw):
+        return self.clients[args[1]].stream(*args, **kw)
+
+def _engine(clients, hedge_delay):
+    router = ModelRouter(_PerModel(clients), list(clients))
+    router.hedge_delay = lambda model: hedge_delay
+    return GenerationEngine(_PerModel(clients), max_workers=2, router=router), router
+
+@pytest.mark.parametrize("stream", [True, False])
+def test_hedge_wins_when_primary_is_slow(slow, mock, client_for, stream):
+    engine, router = _engine({"utama": client_for(slow), "cadangan": client_for(mock)}, hedge_delay=0.2)
+    job = engine.submit(MESSAGES, "utama", "k", 64, 0.5, stream=stream, route=True)
+    deadline = time.monotonic() + 1.5  # jawaban cadangan tampil sebelum latensi 2 dtk model utama
+    while job.text != ANSWER and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert job.text == ANSWER
+    assert job.wait(10)
+    assert job.answered_by == "cadangan" and job.reply() == ANSWER
+    assert router._stats("utama").error_rate == 0.0  # kalah balapan bukan error model
+
+def test_fallback_when_primary_fails(mock, client_for):
+    broken = start_mock(MockConfig(latency=0.0, token_delay=0.0, tokens=5, error_rate=1.0))
+    try:
+        engine, router = _engine({"utama": client_for(broken, max_retries=0), "cadangan": client_for(mock)},
+                                 hedge_delay=30.0)
+        job = engine.submit(MESSAGES, "utama", "k", 64, 0.5, route=True)
+        assert job.wait(10)
+        assert job.answered_by == "cadangan" and job.reply() == ANSWER
+        assert router.stats["utama"].error_rate == 1.0
+    finally:
+        broken.shutdown()
+        broken.server_close()
+
+def test_fallback_prefers_model_with_fewer_errors(client_for, mock):
+    clients = {m: client_for(mock) for m in ("utama", "b", "c")}
+    router = ModelRouter(_PerModel(clients), list(clients))
+    router.record("b", 0.1, False)
+    router.record("c", 0.5, True)
+    assert router.fallback_for("utama") == "c"
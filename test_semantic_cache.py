@@ -0,0 +1,40 @@
+from semantic_cache import SemanticCache, prompt_of, same_question, _words
+
+NS = SemanticCache.namespace("s", "m", 256, 0.5)
+
+def _cache(*prompts):
+    cache = SemanticCache()
+    for p in prompts:
+        cache.add(NS, p, "jawab: " + p, latency=1.5)
+    return cache
+
+def test_near_duplicates_hit():
+    cache = _cache("Jelaskan perbedaan TCP dan UDP", "Apa itu rekursi dalam pemrograman?")
+    answer, score, saved = cache.lookup(NS, "tolong jelaskan perbedaan tcp dan udp dong")
+    assert answer == "jawab: Jelaskan perbedaan TCP dan UDP" and score >= cache.threshold and saved == 1.5
+    assert cache.lookup(NS, "Apa itu rekrusi dalam pemrograman?")[0] == "jawab: Apa itu rekursi dalam pemrograman?"
+    assert cache.lookup(NS, "apa itu rekursi dalam pemrograman")[1] == 1.0  # sama setelah normalisasi
+
+def test_different_questions_with_high_cosine_miss():
+    cache = _cache("Terjemahkan ke Inggris: saya suka kopi", "Apa perbedaan list dan tuple di Python?",
+                   "Berapa 12 x 13?")
+    for prompt in ("Terjemahkan ke Inggris: saya tidak suka kopi", "Apa perbedaan list dan set di Python?",
+                   "Berapa 12 x 14?"):
+        assert cache.lookup(NS, prompt) is None
+    assert cache.stats()["misses"] == 3
+
+def test_namespace_must_match():
+    cache = _cache("Jelaskan perbedaan TCP dan UDP")
+    other = SemanticCache.namespace("s", "model-lain", 256, 0.5)
+    assert cache.lookup(other, "Jelaskan perbedaan TCP dan UDP") is None
+
+def test_same_question_guard():
+    assert same_question(_words("apa itu rekursi"), _words("apa sih itu rekursi ya"))
+    assert not same_question(_words("saya suka kopi"), _words("saya tidak suka kopi"))
+    assert not same_question(_words("list"), _words("lisp"))  # kata pendek bukan salah ketik
+
+def test_prompt_of_skips_long_conversations():
+    system = {"role": "system", "content": "s"}
+    turns = [{"role": r, "content": "x"} for r in ("user", "assistant", "user", "assistant", "user")]
+    assert prompt_of([system] + turns[:1])[1] == "x"
+    assert prompt_of([system] + turns) is None